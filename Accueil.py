@@ -7,6 +7,8 @@ import numpy as np
 from pathlib import Path
 import base64
 
+from culinary.resources import warm_up
+
 # ------------------------------------------
 # 🔧 CONFIGURATION DE LA PAGE
 # ------------------------------------------
@@ -21,6 +23,11 @@ st.set_page_config(
 with open("style.css") as f:
     st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
 
+# ------------------------------------------
+# 🔥 PRÉCHARGEMENT (données + index des autres pages, en arrière-plan)
+# ------------------------------------------
+warm_up()
+
 
 # ------------------------------------------
 # 🖼️ HELPER : IMG → BACKGROUND
@@ -0,0 +1,5 @@
+"""Briques partagées par les pages Streamlit du Culinary Road Trip.
+
+Le code de ce paquet ne dépend pas de Streamlit (sauf ``culinary.resources``),
+il peut donc être réutilisé dans des scripts ou des tests.
+"""
@@ -0,0 +1,77 @@
+import os
+import shutil
+import urllib.request
+from pathlib import Path
+
+import pandas as pd
+
+# ==============================
+# 🔹 SOURCE DES DONNÉES
+# ==============================
+DATASET_URL = os.environ.get(
+    "CULINARY_DATA_URL",
+    "https://huggingface.co/datasets/Amoham16/resto-europe/"
+    "resolve/main/tripadvisor_clean.csv",
+)
+
+# Union des colonnes utilisées par les différentes pages
+ALL_COLUMNS = [
+    "restaurant_name", "country", "region", "province", "city",
+    "address", "latitude", "longitude",
+    "price_level", "price_range", "cuisines",
+    "avg_rating", "total_reviews_count",
+]
+
+NUMERIC_COLUMNS = ["latitude", "longitude", "avg_rating", "total_reviews_count"]
+
+
+def download(url: str, dest: Path) -> Path:
+    """Copy ``url`` (http(s)://, file:// or local path) into ``dest``."""
+    dest = Path(dest)
+    if "://" not in url:
+        shutil.copyfile(url, dest)
+        return dest
+    with urllib.request.urlopen(url, timeout=60) as resp, open(dest, "wb") as f:
+        shutil.copyfileobj(resp, f)
+    return dest
+
+
+def read_raw(path) -> pd.DataFrame:
+    """Lecture du CSV avec les seules colonnes connues (certaines versions n'ont pas province/address)."""
+    df = pd.read_csv(path, usecols=lambda c: c in ALL_COLUMNS)
+
+    # Colonnes numériques
+    for col in NUMERIC_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    # Colonnes absentes de la source : on les crée vides pour que toutes les pages
+    # puissent demander les mêmes colonnes
+    for col in ALL_COLUMNS:
+        if col not in df.columns:
+            df[col] = pd.NA
+
+    return df[ALL_COLUMNS].reset_index(drop=True)
+
+
+# ==============================
+# 🔹 LIBELLÉS DES VALEURS MANQUANTES
+# ==============================
+# Les snapshots gardent de vrais NA (voir culinary.ingest) ; les pages les
+# affichent avec le même libellé partout.
+UNKNOWN_LABELS = {"region": "Inconnue", "city": "Inconnue", "cuisines": "Inconnue", "cuisine_main": "Inconnue"}
+
+# Valeurs affichées qui signifient « pas de donnée » (libellés ci-dessus, ou vide)
+UNKNOWN_VALUES = frozenset(UNKNOWN_LABELS.values()) | {"Inconnu", ""}
+
+
+def with_labels(df: pd.DataFrame, columns) -> pd.DataFrame:
+    """Copie de ``df[columns]`` où les NA des colonnes texte deviennent « Inconnu » / « Inconnue »."""
+    df = df[list(columns)].copy()
+    for col in df.columns:
+        if col in NUMERIC_COLUMNS or not df[col].hasnans:
+            continue
+        label = UNKNOWN_LABELS.get(col, "Inconnu")
+        if isinstance(df[col].dtype, pd.CategoricalDtype) and label not in df[col].cat.categories:
+            df[col] = df[col].cat.add_categories(label)
+        df[col] = df[col].fillna(label)
+    return df
@@ -0,0 +1,189 @@
+"""Export d'un itinéraire en GeoJSON, GPX (applis de navigation) et ICS (agendas).
+
+Chaque format est un générateur de morceaux de texte qui consomme les étapes
+une à une, dans l'ordre du trajet. ``stop_records`` les produit directement
+depuis le résultat compact du trip (ses row_id) et les colonnes du snapshot,
+sans ``df.loc[row_ids]`` ni ``to_dict`` : seul le dict de l'étape en cours
+existe. On peut écrire l'export dans un fichier, le renvoyer en réponse HTTP
+en streaming, ou le joindre pour ``st.download_button`` ::
+
+    with open("trip.gpx", "w") as f:
+        f.writelines(iter_gpx(stop_records(snapshot.df, trip["row_ids"])))
+"""
+import hashlib
+import json
+import math
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, Iterator, Optional
+from xml.sax.saxutils import escape
+
+import pandas as pd
+
+from culinary.data import UNKNOWN_VALUES
+
+MIME_TYPES = {
+    "geojson": "application/geo+json",
+    "gpx": "application/gpx+xml",
+    "ics": "text/calendar",
+}
+
+# Colonnes lues par les formats d'export
+STOP_COLUMNS = [
+    "restaurant_name", "city", "country", "address", "latitude", "longitude",
+    "cuisines", "price_level", "avg_rating", "total_reviews_count",
+]
+
+
+def _number(value):
+    """float Python, ou None pour NaN / valeur absente (JSON n'a pas de NaN)."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
+
+
+def _text(value) -> str:
+    """Texte affichable ; vide pour NA et pour les libellés « Inconnu(e) »."""
+    if value is None or value is pd.NA or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    value = str(value)
+    return "" if value in UNKNOWN_VALUES else value
+
+
+def stop_records(df: pd.DataFrame, row_ids,
+                 computed: Optional[Dict[str, Callable[[dict], object]]] = None) -> Iterator[dict]:
+    """Étapes ``row_ids`` (dans cet ordre), lues une par une dans les colonnes de ``df``.
+
+    ``computed`` ajoute des champs calculés à partir de l'étape (coût estimé…).
+    """
+    positions = df.index.get_indexer(row_ids)
+    if (positions < 0).any():
+        raise KeyError(f"row_id absents du DataFrame : {list(pd.Index(row_ids)[positions < 0])}")
+    # ``Series.array`` : accès par position sans matérialiser la colonne (catégories comprises)
+    columns = {name: df[name].array for name in STOP_COLUMNS if name in df}
+    for pos in positions.tolist():
+        stop = {name: values[pos] for name, values in columns.items()}
+        for name, compute in (computed or {}).items():
+            stop[name] = compute(stop)
+        yield stop
+
+
+# ==============================
+# 🔹 GEOJSON
+# ==============================
+def iter_geojson(stops: Iterable[dict]) -> Iterator[str]:
+    """FeatureCollection : un Point par étape, puis la LineString du trajet."""
+    yield '{"type": "FeatureCollection", "features": ['
+    route = []
+    for day, stop in enumerate(stops, start=1):
+        lon, lat = _number(stop["longitude"]), _number(stop["latitude"])
+        route.append([lon, lat])
+        feature = {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [lon, lat]},
+            "properties": {
+                "day": day,
+                "name": _text(stop["restaurant_name"]),
+                "city": _text(stop["city"]),
+                "country": _text(stop["country"]),
+                "cuisines": _text(stop.get("cuisines")),
+                "price_level": _text(stop.get("price_level")),
+                "avg_rating": _number(stop.get("avg_rating")),
+                "total_reviews_count": _number(stop.get("total_reviews_count")),
+                "estimated_cost": _number(stop.get("estimated_cost")),
+            },
+        }
+        yield ("" if day == 1 else ", ") + json.dumps(feature, ensure_ascii=False)
+    if len(route) > 1:
+        line = {
+            "type": "Feature",
+            "geometry": {"type": "LineString", "coordinates": route},
+            "properties": {"name": "Road trip"},
+        }
+        yield ", " + json.dumps(line)
+    yield "]}\n"
+
+
+# ==============================
+# 🔹 GPX
+# ==============================
+def iter_gpx(stops: Iterable[dict], name: str = "Culinary road trip") -> Iterator[str]:
+    """GPX 1.1 : un waypoint par étape et une route qui les relie dans l'ordre."""
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<gpx version="1.1" creator="Culinary Road Trip" xmlns="http://www.topografix.com/GPX/1/1">\n'
+        f"<metadata><name>{escape(name)}</name></metadata>\n"
+    )
+    route = []
+    for day, stop in enumerate(stops, start=1):
+        attrs = f'lat="{_number(stop["latitude"])}" lon="{_number(stop["longitude"])}"'
+        title = escape(f"Day {day}: {_text(stop['restaurant_name'])}")
+        desc = escape(
+            f"{_text(stop['city'])}, {_text(stop['country'])} — "
+            f"{_text(stop.get('cuisines'))} — ⭐ {_text(stop.get('avg_rating'))}"
+        )
+        route.append(f"<rtept {attrs}><name>{title}</name></rtept>\n")
+        yield f"<wpt {attrs}><name>{title}</name><desc>{desc}</desc><sym>Restaurant</sym></wpt>\n"
+    yield f"<rte><name>{escape(name)}</name>\n"
+    yield from route
+    yield "</rte>\n</gpx>\n"
+
+
+# ==============================
+# 🔹 ICS (iCalendar)
+# ==============================
+def _ics_escape(value) -> str:
+    return (
+        _text(value).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+    )
+
+
+def _ics_line(line: str) -> str:
+    """Ligne repliée à 75 octets (RFC 5545 §3.1), terminée par CRLF."""
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line + "\r\n"
+    parts, start, limit = [], 0, 75
+    while start < len(data):
+        end = min(start + limit, len(data))
+        while end < len(data) and (data[end] & 0xC0) == 0x80:   # pas de coupure dans un caractère UTF-8
+            end -= 1
+        parts.append(data[start:end].decode("utf-8"))
+        start, limit = end, 74   # les lignes de continuation commencent par une espace
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def iter_ics(stops: Iterable[dict], start: date, name: str = "Culinary road trip") -> Iterator[str]:
+    """Un événement « journée entière » par étape, à partir du jour ``start``."""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    yield _ics_line("BEGIN:VCALENDAR")
+    yield _ics_line("VERSION:2.0")
+    yield _ics_line("PRODID:-//Culinary Road Trip//Itinerary//EN")
+    yield _ics_line(f"X-WR-CALNAME:{_ics_escape(name)}")
+    for day, stop in enumerate(stops, start=1):
+        when = start + timedelta(days=day - 1)
+        lat, lon = _number(stop["latitude"]), _number(stop["longitude"])
+        # UID stable : réimporter le même trip met à jour les événements au lieu de les dupliquer
+        uid = hashlib.sha1(f"{day}|{stop['restaurant_name']}|{lat}|{lon}".encode()).hexdigest()[:16]
+        lines = [
+            "BEGIN:VEVENT",
+            f"UID:{when:%Y%m%d}-{uid}@culinary-road-trip",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART;VALUE=DATE:{when:%Y%m%d}",
+            f"DTEND;VALUE=DATE:{when + timedelta(days=1):%Y%m%d}",
+            f"SUMMARY:{_ics_escape(f'Day {day}: ' + _text(stop['restaurant_name']))}",
+            f"LOCATION:{_ics_escape(_text(stop.get('address')) or _text(stop['city']) + ', ' + _text(stop['country']))}",
+            f"DESCRIPTION:{_ics_escape(_text(stop.get('cuisines')) + ' — ' + _text(stop.get('price_level')))}",
+        ]
+        if lat is not None and lon is not None:
+            lines.append(f"GEO:{lat:.6f};{lon:.6f}")
+        lines.append("END:VEVENT")
+        yield "".join(_ics_line(line) for line in lines)
+    yield _ics_line("END:VCALENDAR")
+
+
+def export_text(kind: str, df: pd.DataFrame, row_ids, computed=None, **kwargs) -> str:
+    """Fichier complet des étapes ``row_ids`` de ``df`` (``kind`` = geojson, gpx ou ics)."""
+    writers = {"geojson": iter_geojson, "gpx": iter_gpx, "ics": iter_ics}
+    return "".join(writers[kind](stop_records(df, row_ids, computed), **kwargs))
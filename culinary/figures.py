@@ -0,0 +1,35 @@
+"""Clés de cache courtes pour mémoriser les cartes déjà construites.
+
+Les pages passent ces clés à des fonctions ``@st.cache_resource(max_entries=...)``
+(éviction LRU) : tant que les filtres appliqués ou les restaurants affichés ne
+changent pas, la figure n'est pas reconstruite.
+"""
+import hashlib
+
+import numpy as np
+
+
+def _canonical(value):
+    # Seuls les ensembles sont triés : l'ordre d'une liste ou d'un tuple peut compter
+    # (location=(lat, lon), préférences classées…). Les filtres arrivent déjà
+    # canoniques via ``querystate.encode``.
+    if isinstance(value, (set, frozenset)):
+        return ("set", tuple(sorted((_canonical(v) for v in value), key=repr)))
+    if isinstance(value, (list, tuple)):
+        return tuple(_canonical(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _canonical(v)) for k, v in value.items()))
+    return value
+
+
+def state_key(*parts) -> str:
+    """Empreinte d'un état (dicts et ensembles sans ordre, listes et tuples dans l'ordre)."""
+    payload = repr(tuple(_canonical(p) for p in parts)).encode()
+    return hashlib.blake2b(payload, digest_size=12).hexdigest()
+
+
+def rows_key(version, row_ids) -> str:
+    """Empreinte d'une liste ordonnée de row_id d'un snapshot (l'ordre compte : numéros d'étape)."""
+    h = hashlib.blake2b(str(version).encode(), digest_size=12)
+    h.update(np.asarray(row_ids, dtype=np.int64).tobytes())
+    return h.hexdigest()
@@ -0,0 +1,138 @@
+"""Hiérarchie géographique pays → région → province → ville, avec agrégats pré-calculés.
+
+Les agrégats de chaque nœud (nombre de restaurants, distribution des notes,
+centroïde, rectangle englobant) sont calculés une fois par snapshot au niveau
+le plus fin, puis remontés niveau par niveau : un parent est la somme (ou le
+min / max) de ses enfants, sans relire les lignes brutes.
+
+Les pages lisent ces tables au lieu de regrouper le DataFrame à chaque
+exécution : centrage des cartes (``view``), exploration par niveau
+(``children`` / ``node``).
+"""
+import numpy as np
+import pandas as pd
+
+from culinary.data import with_labels
+from culinary.snapshots import register_index
+from culinary.spatial import zoom_for_bounds
+
+LEVELS = ("country", "region", "province", "city")
+
+# Classes de notes : 0, 0.5, …, 5
+RATING_BINS = np.arange(0, 5.5, 0.5)
+HIST_COLUMNS = [f"r{b:g}" for b in RATING_BINS]
+
+# Cadrage : rectangle englobant limité à centroïde ± VIEW_SIGMAS écarts-types
+# (une adresse mal géocodée ne dézoome pas tout un pays)
+VIEW_SIGMAS = 2.5
+
+# Sommes remontées telles quelles, puis extrema
+_SUMS = ["count", "rating_sum", "reviews_sum", "lat_sum", "lon_sum", "lat_sq", "lon_sq"] + HIST_COLUMNS
+_EXTREMA = {"south": "min", "west": "min", "north": "max", "east": "max"}
+
+
+def _finalize(sums: pd.DataFrame) -> pd.DataFrame:
+    """Colonnes lisibles (moyennes, centroïde, dispersion) à partir des sommes."""
+    out = sums.copy()
+    n = out["count"].astype(float)
+    out["mean_rating"] = out["rating_sum"] / n
+    out["lat"] = out["lat_sum"] / n
+    out["lon"] = out["lon_sum"] / n
+    out["lat_std"] = np.sqrt(np.maximum(out["lat_sq"] / n - out["lat"] ** 2, 0))
+    out["lon_std"] = np.sqrt(np.maximum(out["lon_sq"] / n - out["lon"] ** 2, 0))
+    return out
+
+
+class GeoHierarchy:
+    def __init__(self, df: pd.DataFrame):
+        # Niveaux renseignés dans ce dataset (province est vide dans certaines versions)
+        self.levels = [lvl for lvl in LEVELS if lvl in df and df[lvl].notna().any()]
+
+        # Clés = libellés affichés par les pages (« Inconnue » pour une région manquante…)
+        keys = with_labels(df, self.levels).astype(str)
+        lat = df["latitude"].astype(float)
+        lon = df["longitude"].astype(float)
+        rating = df["avg_rating"].astype(float)
+        bucket = np.clip(np.round(rating.fillna(0).to_numpy() * 2), 0, len(RATING_BINS) - 1).astype(int)
+
+        rows = keys.assign(
+            count=1,
+            rating_sum=rating.fillna(0),
+            reviews_sum=df["total_reviews_count"].astype(float).fillna(0),
+            lat_sum=lat, lon_sum=lon,
+            lat_sq=lat ** 2, lon_sq=lon ** 2,
+            south=lat, west=lon, north=lat, east=lon,
+            **{col: (bucket == i).astype(np.int64) for i, col in enumerate(HIST_COLUMNS)},
+        )
+
+        # Niveau le plus fin depuis les lignes, puis remontée parent par parent
+        agg = {**{c: "sum" for c in _SUMS}, **_EXTREMA}
+        sums = {self.levels[-1]: rows.groupby(self.levels, sort=True).agg(agg)}
+        for depth in range(len(self.levels) - 1, 0, -1):
+            child = sums[self.levels[depth]]
+            sums[self.levels[depth - 1]] = child.groupby(level=list(range(depth))).agg(agg)
+
+        self._sums = sums
+        self.rollups = {lvl: _finalize(table) for lvl, table in sums.items()}
+        self.total = _finalize(sums[self.levels[0]].agg(agg).to_frame().T).iloc[0]
+
+    # ------------------------------
+    # Lecture
+    # ------------------------------
+    def node(self, path=()) -> pd.Series:
+        """Agrégats d'un nœud ; ``path`` = (pays,), (pays, région)… ; () = tout le dataset."""
+        path = tuple(path)
+        if not path:
+            return self.total
+        table = self.rollups[self.levels[len(path) - 1]]
+        return table.loc[path if len(path) > 1 else path[0]]
+
+    def children(self, path=()) -> pd.DataFrame:
+        """Agrégats des enfants directs d'un nœud, indexés par leur nom."""
+        path = tuple(path)
+        if len(path) >= len(self.levels):
+            return self.rollups[self.levels[-1]].iloc[0:0]
+        table = self.rollups[self.levels[len(path)]]
+        if path:
+            table = table.xs(path, level=list(range(len(path))), drop_level=True)
+        return table.droplevel(list(range(table.index.nlevels - 1))) if table.index.nlevels > 1 else table
+
+    def combine(self, paths) -> pd.Series:
+        """Agrégats de plusieurs nœuds du même niveau (ex. plusieurs pays sélectionnés)."""
+        paths = [tuple(p) for p in paths]
+        if not paths:
+            return self.total
+        table = self._sums[self.levels[len(paths[0]) - 1]]
+        keys = [p if len(p) > 1 else p[0] for p in paths]
+        sel = table.loc[table.index.intersection(keys)]
+        if sel.empty:
+            return self.total
+        merged = sel.agg({**{c: "sum" for c in _SUMS}, **_EXTREMA})
+        return _finalize(merged.to_frame().T).iloc[0]
+
+    def rating_distribution(self, path=()) -> pd.Series:
+        """Nombre de restaurants par classe de note (0, 0.5, …, 5)."""
+        node = self.node(path)
+        return pd.Series(node[HIST_COLUMNS].to_numpy(dtype=int), index=RATING_BINS, name="count")
+
+    def view(self, paths=(), width_px=1000, height_px=650):
+        """(centre, zoom) pour cadrer un ou plusieurs nœuds sans relire les lignes."""
+        node = self.combine(paths) if paths else self.total
+        bounds = view_bounds(node)
+        center = (float(bounds[0] + bounds[2]) / 2, float(bounds[1] + bounds[3]) / 2)
+        return center, zoom_for_bounds(bounds, width_px, height_px)
+
+
+def view_bounds(node: pd.Series):
+    """Rectangle (sud, ouest, nord, est) à cadrer : englobant ∩ centroïde ± VIEW_SIGMAS σ."""
+    dlat = max(VIEW_SIGMAS * node["lat_std"], 0.05)
+    dlon = max(VIEW_SIGMAS * node["lon_std"], 0.05)
+    return (
+        max(node["south"], node["lat"] - dlat), max(node["west"], node["lon"] - dlon),
+        min(node["north"], node["lat"] + dlat), min(node["east"], node["lon"] + dlon),
+    )
+
+
+@register_index("geo")
+def build_geo_hierarchy(df: pd.DataFrame) -> GeoHierarchy:
+    return GeoHierarchy(df)
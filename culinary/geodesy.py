@@ -0,0 +1,204 @@
+"""Distances et cadrage sur la sphère (haversine), vectorisés.
+
+Toutes les fonctions prennent des degrés et rendent des kilomètres. Les calculs
+se font en place, dans le type demandé (float32 pour les grands tableaux), et
+le mode « toutes paires » travaille par blocs de lignes pour que la mémoire
+temporaire reste bornée quel que soit le nombre de points ::
+
+    haversine_km(48.8566, 2.3522, df["latitude"], df["longitude"])   # un -> plusieurs
+    distance_matrix(stops_lat, stops_lon)                             # toutes paires (n, n)
+    for start, block in iter_distance_blocks(lat, lon, lat, lon):     # toutes paires, par blocs
+        ...
+"""
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+# Mémoire temporaire d'un bloc (toutes paires) : quelques tableaux (lignes × colonnes)
+PAIRWISE_BLOCK_BYTES = 32 * 2 ** 20
+
+
+# ==============================
+# 🔹 NOYAU HAVERSINE
+# ==============================
+def _central_angle(lat0, lon0, lat, lon, cos_lat0, cos_lat) -> np.ndarray:
+    """Angle au centre (radians) ; entrées en radians, diffusées comme NumPy, calcul en place."""
+    a = np.subtract(lat, lat0)
+    a *= 0.5
+    np.sin(a, out=a)
+    a *= a
+    b = np.subtract(lon, lon0)
+    b *= 0.5
+    np.sin(b, out=b)
+    b *= b
+    b *= cos_lat
+    b *= cos_lat0
+    a += b
+    np.clip(a, 0, 1, out=a)
+    np.sqrt(a, out=a)
+    np.arcsin(a, out=a)
+    a *= 2
+    return a
+
+
+def central_angle(lat0: float, lon0: float, lat, lon, cos_lat=None) -> np.ndarray:
+    """Angle au centre (radians) entre un point et des points, tous en radians.
+
+    Le résultat garde le type de ``lat`` (float32 reste float32) ; ``cos_lat``
+    peut être précalculé par l'appelant quand les mêmes points servent souvent.
+    """
+    lat = np.asarray(lat)
+    dtype = lat.dtype if lat.dtype.kind == "f" else np.dtype(np.float64)
+    lat0, lon0 = dtype.type(lat0), dtype.type(lon0)
+    if cos_lat is None:
+        cos_lat = np.cos(lat.astype(dtype, copy=False))
+    return _central_angle(lat0, lon0, lat.astype(dtype, copy=False), np.asarray(lon, dtype=dtype),
+                          np.cos(lat0), cos_lat)
+
+
+def haversine_km(lat0: float, lon0: float, lat, lon, dtype=np.float64) -> np.ndarray:
+    """Distance (km) entre un point et des tableaux de points."""
+    lat = np.radians(np.asarray(lat, dtype=dtype))
+    lon = np.radians(np.asarray(lon, dtype=dtype))
+    d = central_angle(np.radians(lat0), np.radians(lon0), lat, lon)
+    d *= EARTH_RADIUS_KM
+    return d
+
+
+def paired_km(lat_a, lon_a, lat_b, lon_b, dtype=np.float64) -> np.ndarray:
+    """Distance (km) entre ``a[i]`` et ``b[i]``, élément par élément."""
+    lat_a, lon_a = np.radians(np.asarray(lat_a, dtype=dtype)), np.radians(np.asarray(lon_a, dtype=dtype))
+    lat_b, lon_b = np.radians(np.asarray(lat_b, dtype=dtype)), np.radians(np.asarray(lon_b, dtype=dtype))
+    d = _central_angle(lat_a, lon_a, lat_b, lon_b, np.cos(lat_a), np.cos(lat_b))
+    d *= EARTH_RADIUS_KM
+    return d
+
+
+def path_length_km(lat, lon) -> float:
+    """Somme des distances entre points consécutifs (itinéraire)."""
+    lat, lon = np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)
+    if len(lat) < 2:
+        return 0.0
+    return float(np.sum(paired_km(lat[:-1], lon[:-1], lat[1:], lon[1:])))
+
+
+# ==============================
+# 🔹 TOUTES PAIRES (PAR BLOCS)
+# ==============================
+def iter_distance_blocks(lat_a, lon_a, lat_b, lon_b, dtype=np.float32,
+                         max_bytes: int = PAIRWISE_BLOCK_BYTES) -> Iterator[Tuple[int, np.ndarray]]:
+    """(début, distances km de ``a[début:début + k]`` à tout ``b``) par blocs de lignes.
+
+    ``k`` est choisi pour que les tableaux temporaires d'un bloc (k × len(b))
+    tiennent dans ``max_bytes`` : la mémoire ne dépend pas de len(a).
+    """
+    lat_a, lon_a = np.radians(np.asarray(lat_a, dtype=dtype)), np.radians(np.asarray(lon_a, dtype=dtype))
+    lat_b, lon_b = np.radians(np.asarray(lat_b, dtype=dtype)), np.radians(np.asarray(lon_b, dtype=dtype))
+    cos_a, cos_b = np.cos(lat_a), np.cos(lat_b)
+    # Deux tableaux (k, len(b)) vivent en même temps dans le noyau
+    rows = max(1, int(max_bytes // (2 * max(len(lat_b), 1) * np.dtype(dtype).itemsize)))
+    for start in range(0, len(lat_a), rows):
+        stop = start + rows
+        d = _central_angle(
+            lat_a[start:stop, None], lon_a[start:stop, None], lat_b, lon_b,
+            cos_a[start:stop, None], cos_b,
+        )
+        d *= EARTH_RADIUS_KM
+        yield start, d
+
+
+def distance_matrix(lat_a, lon_a, lat_b=None, lon_b=None, dtype=np.float32,
+                    max_bytes: int = PAIRWISE_BLOCK_BYTES) -> np.ndarray:
+    """Matrice (len(a), len(b)) des distances en km ; ``b`` absent = ``a`` (matrice carrée)."""
+    if lat_b is None:
+        lat_b, lon_b = lat_a, lon_a
+    out = np.empty((len(lat_a), len(lat_b)), dtype=dtype)
+    for start, block in iter_distance_blocks(lat_a, lon_a, lat_b, lon_b, dtype, max_bytes):
+        out[start:start + len(block)] = block
+    return out
+
+
+def nearest_km(lat_a, lon_a, lat_b, lon_b, dtype=np.float32,
+               max_bytes: int = PAIRWISE_BLOCK_BYTES) -> Tuple[np.ndarray, np.ndarray]:
+    """Pour chaque point de ``a`` : (position du plus proche dans ``b``, distance km), sans matrice complète."""
+    index = np.empty(len(lat_a), dtype=np.int64)
+    dist = np.empty(len(lat_a), dtype=dtype)
+    for start, block in iter_distance_blocks(lat_a, lon_a, lat_b, lon_b, dtype, max_bytes):
+        block[np.isnan(block)] = np.inf
+        best = block.argmin(axis=1)
+        index[start:start + len(block)] = best
+        dist[start:start + len(block)] = block[np.arange(len(block)), best]
+    return index, dist
+
+
+# ==============================
+# 🔹 CENTROÏDE ET CADRAGE
+# ==============================
+def unit_vectors(lat, lon) -> np.ndarray:
+    """Points de la sphère unité (n, 3) ; float64 pour garder la précision avant centrage."""
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+def spherical_centroid(lat, lon, weights=None) -> Optional[Tuple[float, float]]:
+    """Centre (lat, lon) de points sur la sphère : moyenne des vecteurs unitaires, reprojetée.
+
+    Contrairement à la moyenne des degrés, reste juste de part et d'autre de
+    l'antiméridien. Points sans coordonnées ignorés ; None s'il n'en reste aucun.
+    """
+    xyz = unit_vectors(lat, lon)
+    keep = ~np.isnan(xyz).any(axis=1)
+    if not keep.any():
+        return None
+    w = None if weights is None else np.asarray(weights, dtype=np.float64)[keep]
+    x, y, z = np.average(xyz[keep], axis=0, weights=w)
+    return float(np.degrees(np.arctan2(z, np.hypot(x, y)))), float(np.degrees(np.arctan2(y, x)))
+
+
+def fit_bounds(lat, lon) -> Optional[Tuple[float, float, float, float]]:
+    """Plus petit rectangle (sud, ouest, nord, est) qui contient les points.
+
+    En longitude, le rectangle évite le plus grand écart entre points : s'il
+    traverse l'antiméridien, ``est`` dépasse 180 (convention Leaflet). None
+    sans point valide.
+    """
+    lat, lon = np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)
+    keep = ~(np.isnan(lat) | np.isnan(lon))
+    if not keep.any():
+        return None
+    lat, lon = lat[keep], np.sort(((lon[keep] + 180) % 360) - 180)
+    gaps = np.diff(np.r_[lon, lon[0] + 360])
+    widest = int(np.argmax(gaps))
+    # Le rectangle commence juste après le plus grand écart
+    west = lon[(widest + 1) % len(lon)]
+    east = west + 360 - gaps[widest]
+    return float(lat.min()), float(west), float(lat.max()), float(east)
+
+
+def great_circle_path(lat, lon, step_km: float = 50.0) -> np.ndarray:
+    """Points (n, 2) de l'itinéraire densifié le long des grands cercles, pour le tracer sur une carte.
+
+    Les longitudes sont déroulées (pas de saut de 360° à l'antiméridien) ; les
+    étapes sans coordonnées sont ignorées.
+    """
+    xyz = unit_vectors(lat, lon)
+    xyz = xyz[~np.isnan(xyz).any(axis=1)]
+    points = []
+    for a, b in zip(xyz[:-1], xyz[1:]):
+        angle = np.arccos(np.clip(a @ b, -1, 1))
+        n = max(1, int(np.ceil(angle * EARTH_RADIUS_KM / step_km)))
+        t = np.linspace(0, 1, n, endpoint=False)[:, None]
+        if angle < 1e-9:
+            points.append(a[None, :])
+            continue
+        # Interpolation sphérique (slerp) entre deux étapes
+        points.append((np.sin((1 - t) * angle) * a + np.sin(t * angle) * b) / np.sin(angle))
+    points.append(xyz[-1:])
+    p = np.vstack(points)
+    return np.column_stack([
+        np.degrees(np.arcsin(np.clip(p[:, 2], -1, 1))),
+        np.degrees(np.unwrap(np.arctan2(p[:, 1], p[:, 0]))),
+    ])
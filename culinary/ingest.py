@@ -0,0 +1,231 @@
+"""Étape d'ingestion : qualité et normalisation des données, une seule fois par snapshot.
+
+Toutes les pages lisent le résultat de ``ingest`` (via le snapshot) au lieu de
+nettoyer chacune à leur façon :
+
+* les valeurs sentinelles (« Inconnu », « Inconnue », « N/A »…) deviennent de vrais NA ;
+* espaces superflus supprimés ;
+* noms de villes / régions canonisés par pays (accents, casse, exonymes : Milano -> Milan) ;
+* doublons (même nom, à moins de ``radius_m`` mètres) supprimés, avec un
+  regroupement par cases de grille pour ne comparer que les voisins ;
+* types compacts (catégories, float32).
+
+Un ``IngestReport`` résume ce qui a été corrigé ; il est écrit dans le meta.json du snapshot.
+"""
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from culinary.geodesy import paired_km
+from culinary.search import fold
+
+TEXT_COLUMNS = [
+    "restaurant_name", "country", "region", "province", "city",
+    "address", "price_level", "price_range", "cuisines",
+]
+CATEGORY_COLUMNS = ["country", "region", "province", "city", "price_level", "price_range", "cuisine_main"]
+
+SENTINELS = {"inconnu", "inconnue", "unknown", "n/a", "na", "nan", "none", "null", "-", ""}
+
+# Exonymes fréquents -> nom utilisé par TripAdvisor (anglais)
+CITY_ALIASES = {
+    "milano": "Milan", "roma": "Rome", "firenze": "Florence", "venezia": "Venice",
+    "napoli": "Naples", "torino": "Turin", "genova": "Genoa", "padova": "Padua",
+    "mantova": "Mantua", "munchen": "Munich", "koln": "Cologne", "nurnberg": "Nuremberg",
+    "wien": "Vienna", "praha": "Prague", "lisboa": "Lisbon", "bruxelles": "Brussels",
+    "brussel": "Brussels", "antwerpen": "Antwerp", "gent": "Ghent", "brugge": "Bruges",
+    "sevilla": "Seville", "athina": "Athens", "warszawa": "Warsaw", "krakow": "Krakow",
+    "kobenhavn": "Copenhagen", "den haag": "The Hague", "'s-gravenhage": "The Hague",
+    "geneve": "Geneva", "zurich": "Zurich", "oporto": "Porto",
+}
+
+
+@dataclass
+class IngestReport:
+    rows_in: int = 0
+    rows_out: int = 0
+    dropped_missing: int = 0
+    sentinels_nulled: dict = field(default_factory=dict)
+    whitespace_fixed: dict = field(default_factory=dict)
+    renamed: dict = field(default_factory=dict)      # colonne -> {"ancien": "nouveau"}
+    duplicates_removed: int = 0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def summary(self) -> str:
+        renamed = sum(len(v) for v in self.renamed.values())
+        return (
+            f"{self.rows_in} lignes lues, {self.rows_out} gardées : "
+            f"{self.dropped_missing} sans coordonnées/note, "
+            f"{self.duplicates_removed} doublons, "
+            f"{sum(self.sentinels_nulled.values())} sentinelles -> NA, "
+            f"{sum(self.whitespace_fixed.values())} espaces corrigés, "
+            f"{renamed} noms de lieux canonisés."
+        )
+
+
+# ==============================
+# 🔹 TEXTE
+# ==============================
+def _fold_values(values: pd.Series) -> pd.Series:
+    """``fold`` appliqué une fois par valeur distincte."""
+    codes, uniques = pd.factorize(values)
+    folded = np.array([fold(u) for u in uniques] + [None], dtype=object)
+    return pd.Series(folded[codes], index=values.index)   # code -1 (NA) -> None
+
+
+def normalize_text(values: pd.Series):
+    """(valeurs nettoyées, nb de sentinelles, nb d'espaces corrigés)."""
+    values = values.astype("string")
+    cleaned = values.str.strip().str.replace(r"\s+", " ", regex=True)
+    whitespace = int((cleaned != values).fillna(False).sum())
+    sentinel = cleaned.str.casefold().isin(SENTINELS).fillna(False)
+    return cleaned.mask(sentinel), int(sentinel.sum()), whitespace
+
+
+def canonical_names(values: pd.Series, group: pd.Series, aliases: dict = None) -> dict:
+    """{(groupe, nom) -> nom canonique} pour les variantes d'un même lieu dans un pays.
+
+    Variantes = même forme repliée (accents/casse) ou exonyme connu ; le nom
+    canonique est l'alias s'il existe, sinon l'orthographe la plus fréquente.
+    """
+    aliases = aliases or {}
+    counts = (
+        pd.DataFrame({"group": group, "value": values})
+        .dropna()
+        .value_counts()
+        .reset_index(name="n")
+    )
+    if counts.empty:
+        return {}
+    counts["key"] = _fold_values(counts["value"])
+    counts["key"] = counts["key"].map(lambda k: fold(aliases[k]) if k in aliases else k)
+    counts["canonical"] = counts.groupby(["group", "key"])["value"].transform("first")
+
+    alias_targets = {fold(v): v for v in aliases.values()}
+    is_alias = counts["key"].isin(alias_targets)
+    counts.loc[is_alias, "canonical"] = counts.loc[is_alias, "key"].map(alias_targets)
+
+    changed = counts[counts["value"] != counts["canonical"]]
+    return dict(zip(zip(changed["group"], changed["value"]), changed["canonical"]))
+
+
+def apply_names(values: pd.Series, group: pd.Series, mapping: dict) -> pd.Series:
+    if not mapping:
+        return values
+    keys = pd.Series(list(zip(group, values)), index=values.index)
+    return keys.map(mapping).fillna(values).astype("string")
+
+
+# ==============================
+# 🔹 DOUBLONS
+# ==============================
+def duplicate_rows(df: pd.DataFrame, radius_m: float = 100.0) -> np.ndarray:
+    """Labels des lignes à supprimer : même nom (replié) à moins de ``radius_m`` mètres.
+
+    Regroupement par cases de grille : on ne compare une ligne qu'aux lignes du
+    même nom dans sa case et les 8 cases voisines. Dans chaque groupe de doublons
+    on garde la ligne qui a le plus d'avis.
+    """
+    name = _fold_values(df["restaurant_name"])
+    candidates = df[name.notna() & name.duplicated(keep=False)]
+    if candidates.empty:
+        return np.empty(0, dtype=df.index.dtype)
+
+    # Cases d'environ radius_m ; en longitude on élargit pour rester valable jusqu'à 72°N
+    cell_lat = radius_m / 111_320.0
+    cell_lon = cell_lat / np.cos(np.radians(72.0))
+    cells = pd.DataFrame({
+        "pos": np.arange(len(candidates)),
+        "name": pd.factorize(name[candidates.index])[0],
+        "cy": np.floor(candidates["latitude"].to_numpy() / cell_lat).astype(np.int64),
+        "cx": np.floor(candidates["longitude"].to_numpy() / cell_lon).astype(np.int64),
+    })
+
+    pairs = []
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            shifted = cells.assign(cy=cells["cy"] + dy, cx=cells["cx"] + dx)
+            merged = cells.merge(shifted, on=["name", "cy", "cx"], suffixes=("_a", "_b"))
+            pairs.append(merged.loc[merged["pos_a"] < merged["pos_b"], ["pos_a", "pos_b"]].to_numpy())
+    pairs = np.concatenate(pairs)
+    if len(pairs) == 0:
+        return np.empty(0, dtype=df.index.dtype)
+
+    # Distance réelle (haversine) pour les paires candidates
+    lat = candidates["latitude"].to_numpy(dtype=float)
+    lon = candidates["longitude"].to_numpy(dtype=float)
+    a, b = pairs[:, 0], pairs[:, 1]
+    pairs = pairs[paired_km(lat[a], lon[a], lat[b], lon[b]) * 1000 <= radius_m]
+    if len(pairs) == 0:
+        return np.empty(0, dtype=df.index.dtype)
+
+    # Composantes connexes par propagation du plus petit identifiant
+    cluster = np.arange(len(candidates))
+    while True:
+        low = np.minimum(cluster[pairs[:, 0]], cluster[pairs[:, 1]])
+        before = cluster.copy()
+        np.minimum.at(cluster, pairs[:, 0], low)
+        np.minimum.at(cluster, pairs[:, 1], low)
+        cluster = cluster[cluster]
+        if np.array_equal(cluster, before):
+            break
+
+    # Dans chaque groupe, on garde la ligne avec le plus d'avis
+    reviews = candidates["total_reviews_count"].fillna(0).to_numpy()
+    order = np.lexsort((-reviews, cluster))
+    keep = np.zeros(len(candidates), dtype=bool)
+    keep[order[np.r_[True, cluster[order][1:] != cluster[order][:-1]]]] = True
+    return candidates.index[~keep].to_numpy()
+
+
+# ==============================
+# 🔹 PIPELINE
+# ==============================
+def first_cuisine(cuisines: pd.Series) -> pd.Series:
+    return cuisines.str.split(",").str[0].str.strip()
+
+
+def ingest(df: pd.DataFrame, radius_m: float = 100.0):
+    """Nettoie ``df`` (sortie de ``read_raw``) ; renvoie (DataFrame propre, IngestReport)."""
+    report = IngestReport(rows_in=len(df))
+    df = df.copy()
+
+    for col in TEXT_COLUMNS:
+        df[col], n_sentinels, n_whitespace = normalize_text(df[col])
+        if n_sentinels:
+            report.sentinels_nulled[col] = n_sentinels
+        if n_whitespace:
+            report.whitespace_fixed[col] = n_whitespace
+
+    # Valeurs hors bornes -> NA, puis on retire ce qui est inutilisable partout
+    df["avg_rating"] = df["avg_rating"].where(df["avg_rating"].between(0, 5))
+    df["latitude"] = df["latitude"].where(df["latitude"].between(-90, 90))
+    df["longitude"] = df["longitude"].where(df["longitude"].between(-180, 180))
+    before = len(df)
+    df = df.dropna(subset=["latitude", "longitude", "avg_rating"])
+    report.dropped_missing = before - len(df)
+
+    for col, aliases in (("city", CITY_ALIASES), ("region", None)):
+        mapping = canonical_names(df[col], df["country"], aliases)
+        df[col] = apply_names(df[col], df["country"], mapping)
+        if mapping:
+            report.renamed[col] = {old: new for (_, old), new in mapping.items()}
+
+    drop = duplicate_rows(df, radius_m)
+    df = df.drop(index=drop)
+    report.duplicates_removed = len(drop)
+
+    df["cuisine_main"] = first_cuisine(df["cuisines"])
+
+    # Types compacts
+    for col in CATEGORY_COLUMNS:
+        df[col] = df[col].astype("category")
+    df["avg_rating"] = df["avg_rating"].astype(np.float32)
+    df["total_reviews_count"] = df["total_reviews_count"].astype(np.float32)
+
+    df = df.reset_index(drop=True)
+    report.rows_out = len(df)
+    return df, report
@@ -0,0 +1,113 @@
+"""Test de charge du service HTTP (``culinary.service``) lancé en local.
+
+Des workers concurrents (une connexion keep-alive chacun) rejouent un mélange
+de requêtes pendant ``--duration`` secondes ; on affiche le débit et les
+latences (p50 / p95 / p99) par route.
+
+Usage ::
+
+    python -m culinary.service --port 8080 &
+    python -m culinary.loadtest --url http://127.0.0.1:8080 --concurrency 16 --duration 20
+"""
+import argparse
+import http.client
+import itertools
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import numpy as np
+
+# Mélange par défaut : requêtes répétées (cache) et variées (calcul)
+DEFAULT_PATHS = [
+    "/top?city=Paris&n=10",
+    "/top?country=Italy&cuisine=Italian&min_rating=4.5&n=20",
+    "/top?country=Spain&n=5",
+    "/restaurants?country=France&min_rating=4&limit=50",
+    "/restaurants?country=Germany&price=%E2%82%AC%E2%82%AC-%E2%82%AC%E2%82%AC%E2%82%AC&offset=50&limit=50",
+    "/nearby?lat=48.8566&lon=2.3522&radius_km=1&n=20",
+    "/nearby?lat=41.9028&lon=12.4964&radius_km=2&n=10",
+    "/nearby?lat=45.764&lon=4.8357&radius_km=5&n=10&min_rating=4.5",
+    "/search?q=pizz",
+    "/trip?trip=Rome:2,Paris:2,Nice:2&min_rating=4",
+    "/trip?trip=Paris:3,Lyon:2&format=gpx",
+]
+
+
+def _worker(host: str, port: int, paths, deadline: float, results: dict, lock: threading.Lock):
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    local = defaultdict(list)
+    errors = defaultdict(int)
+    for path in paths:
+        if time.perf_counter() >= deadline:
+            break
+        route = path.split("?", 1)[0]
+        start = time.perf_counter()
+        try:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+            ok = False
+        local[route].append(time.perf_counter() - start)
+        if not ok:
+            errors[route] += 1
+    conn.close()
+    with lock:
+        for route, timings in local.items():
+            results["timings"][route].extend(timings)
+        for route, n in errors.items():
+            results["errors"][route] += n
+
+
+def run(url: str, concurrency: int = 16, duration: float = 20.0, paths=None) -> dict:
+    """Latences (s) et erreurs par route, et débit global (requêtes / s)."""
+    parts = urlsplit(url)
+    paths = paths or DEFAULT_PATHS
+    results = {"timings": defaultdict(list), "errors": defaultdict(int)}
+    lock = threading.Lock()
+
+    start = time.perf_counter()
+    deadline = start + duration
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i in range(concurrency):
+            # Chaque worker commence à un endroit différent du mélange
+            cycle = itertools.islice(itertools.cycle(paths), i % len(paths), None)
+            pool.submit(_worker, parts.hostname, parts.port or 80, cycle, deadline, results, lock)
+    elapsed = time.perf_counter() - start
+
+    total = sum(len(t) for t in results["timings"].values())
+    results["elapsed"] = elapsed
+    results["throughput"] = total / elapsed if elapsed else 0.0
+    return results
+
+
+def report(results: dict) -> str:
+    lines = [f"{'route':<14}{'requêtes':>10}{'erreurs':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"]
+    for route in sorted(results["timings"]):
+        timings = np.asarray(results["timings"][route]) * 1000
+        p50, p95, p99 = np.percentile(timings, [50, 95, 99])
+        lines.append(
+            f"{route:<14}{len(timings):>10}{results['errors'][route]:>9}{p50:>9.1f}{p95:>9.1f}{p99:>9.1f}"
+        )
+    lines.append(f"débit : {results['throughput']:.0f} requêtes/s sur {results['elapsed']:.1f} s")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Test de charge du service HTTP")
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--path", action="append", help="requête à rejouer (répétable), à la place du mélange par défaut")
+    args = parser.parse_args(argv)
+    print(report(run(args.url, args.concurrency, args.duration, args.path)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""Partitions par pays d'un snapshot, catalogue et chargement à la demande.
+
+À la construction d'un snapshot, les lignes de chaque pays sont écrites dans
+``partitions/part-NNN.parquet`` (index d'origine conservé : les row_id restent
+ceux du dataset complet) et ``catalog.json`` décrit chaque partition : nombre de
+lignes, valeurs proposées par les filtres (régions, cuisines, prix) et sommes
+nécessaires au cadrage des cartes (centroïde, dispersion, rectangle englobant),
+par pays et par région.
+
+Les pages qui travaillent sur une sélection de pays lisent le catalogue pour
+leurs widgets et leur cadrage, puis ne chargent que les partitions choisies ;
+celles-ci sont gardées dans un LRU borné en octets (``PartitionCache``).
+"""
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable
+
+import numpy as np
+import pandas as pd
+
+from culinary.data import with_labels
+from culinary.geo import view_bounds
+from culinary.querystate import sizeof
+from culinary.spatial import zoom_for_bounds
+
+CATALOG_FILE = "catalog.json"
+PARTITION_DIR = "partitions"
+
+# Valeurs proposées par les filtres des pages, par partition
+OPTION_COLUMNS = ["region", "cuisine_main", "price_level"]
+
+# Sommes (additives) et extrema pour le cadrage, comme dans culinary.geo
+_VIEW_SUMS = ["count", "lat_sum", "lon_sum", "lat_sq", "lon_sq"]
+_VIEW_EXTREMA = {"south": "min", "west": "min", "north": "max", "east": "max"}
+
+
+# ==============================
+# 🔹 ÉCRITURE (construction du snapshot)
+# ==============================
+def _view_stats(keys: pd.DataFrame, lat: pd.Series, lon: pd.Series, by) -> pd.DataFrame:
+    rows = keys.assign(
+        count=1, lat_sum=lat, lon_sum=lon, lat_sq=lat ** 2, lon_sq=lon ** 2,
+        south=lat, west=lon, north=lat, east=lon,
+    )
+    return rows.groupby(by, sort=True).agg({**{c: "sum" for c in _VIEW_SUMS}, **_VIEW_EXTREMA})
+
+
+def _stats_dict(row: pd.Series) -> dict:
+    return {k: (None if pd.isna(v) else float(v)) for k, v in row.items()}
+
+
+def write_partitions(df: pd.DataFrame, folder: Path) -> dict:
+    """Écrit une partition par pays et le catalogue dans ``folder`` ; renvoie le catalogue."""
+    folder = Path(folder)
+    (folder / PARTITION_DIR).mkdir(parents=True, exist_ok=True)
+
+    # Clés = libellés affichés par les pages (« Inconnu » pour un pays manquant…)
+    keys = with_labels(df, ["country"] + OPTION_COLUMNS).astype(str)
+    lat = df["latitude"].astype(float)
+    lon = df["longitude"].astype(float)
+    countries = _view_stats(keys, lat, lon, "country")
+    regions = _view_stats(keys, lat, lon, ["country", "region"])
+
+    partitions = {}
+    for i, (country, positions) in enumerate(sorted(keys.groupby("country").indices.items())):
+        path = f"{PARTITION_DIR}/part-{i:03d}.parquet"
+        df.iloc[positions].to_parquet(folder / path)
+        part_keys = keys.iloc[positions]
+        partitions[country] = {
+            "file": path,
+            "rows": len(positions),
+            "view": _stats_dict(countries.loc[country]),
+            "regions": {
+                region: _stats_dict(stats) for region, stats in regions.loc[country].iterrows()
+            },
+            **{col: sorted(part_keys[col].unique().tolist()) for col in OPTION_COLUMNS},
+        }
+
+    catalog = {
+        "rows": len(df),
+        "columns": list(df.columns),
+        "dtypes": {col: str(dtype) for col, dtype in df.dtypes.items()},
+        "partitions": partitions,
+    }
+    (folder / CATALOG_FILE).write_text(json.dumps(catalog, ensure_ascii=False))
+    return catalog
+
+
+# ==============================
+# 🔹 CATALOGUE
+# ==============================
+class Catalog:
+    def __init__(self, catalog: dict):
+        self.partitions: Dict[str, dict] = catalog["partitions"]
+        self.total_rows = catalog["rows"]
+        self.columns = catalog["columns"]
+        self.dtypes: Dict[str, str] = catalog["dtypes"]
+
+    @classmethod
+    def read(cls, folder: Path) -> "Catalog":
+        return cls(json.loads((Path(folder) / CATALOG_FILE).read_text()))
+
+    @property
+    def countries(self) -> list:
+        return sorted(self.partitions)
+
+    def empty_frame(self) -> pd.DataFrame:
+        """DataFrame vide avec les colonnes et les types des partitions, sans lire de fichier."""
+        return pd.DataFrame(
+            {col: pd.Series(dtype=self.dtypes[col]) for col in self.columns},
+            index=pd.Index([], dtype=np.int64),
+        )
+
+    def rows(self, countries: Iterable = ()) -> int:
+        countries = list(countries)
+        if not countries:
+            return self.total_rows
+        return sum(self.partitions[c]["rows"] for c in countries if c in self.partitions)
+
+    def options(self, column: str, countries: Iterable = ()) -> list:
+        """Valeurs de ``column`` (region, cuisine_main, price_level) dans les pays choisis (tous si vide)."""
+        countries = [c for c in countries if c in self.partitions] or self.countries
+        return sorted({v for c in countries for v in self.partitions[c][column]})
+
+    def view(self, countries: Iterable = (), regions: Iterable = (), width_px=1000, height_px=650):
+        """(centre, zoom) des pays (et éventuellement régions) choisis, sans charger de partition.
+
+        Même calcul que ``GeoHierarchy.view`` : sommes fusionnées, puis rectangle
+        englobant limité à centroïde ± quelques écarts-types.
+        """
+        countries = [c for c in countries if c in self.partitions] or self.countries
+        regions = set(regions)
+        stats = []
+        for country in countries:
+            part = self.partitions[country]
+            picked = [s for r, s in part["regions"].items() if r in regions]
+            stats.extend(picked if regions else [part["view"]])
+        if not stats:
+            stats = [self.partitions[c]["view"] for c in countries]
+
+        table = pd.DataFrame(stats)
+        n = float(table["count"].sum())
+        lat, lon = table["lat_sum"].sum() / n, table["lon_sum"].sum() / n
+        node = pd.Series({
+            "lat": lat, "lon": lon,
+            "lat_std": np.sqrt(max(table["lat_sq"].sum() / n - lat ** 2, 0)),
+            "lon_std": np.sqrt(max(table["lon_sq"].sum() / n - lon ** 2, 0)),
+            "south": table["south"].min(), "west": table["west"].min(),
+            "north": table["north"].max(), "east": table["east"].max(),
+        })
+        bounds = view_bounds(node)
+        center = (float(bounds[0] + bounds[2]) / 2, float(bounds[1] + bounds[3]) / 2)
+        return center, zoom_for_bounds(bounds, width_px, height_px)
+
+
+# ==============================
+# 🔹 CHARGEMENT À LA DEMANDE (LRU EN OCTETS)
+# ==============================
+class PartitionCache:
+    """Partitions lues à la demande, gardées tant que le total reste sous ``max_bytes``."""
+
+    def __init__(self, folder: Path, catalog: Catalog, max_bytes: int = 256 * 2 ** 20):
+        self.folder = Path(folder)
+        self.catalog = catalog
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: Dict[str, threading.Lock] = {}
+
+    def __contains__(self, country):
+        return country in self._entries
+
+    def get(self, country: str) -> pd.DataFrame:
+        """Lignes d'un pays (index = row_id du dataset complet)."""
+        with self._lock:
+            entry = self._entries.get(country)
+            if entry is not None:
+                self._entries.move_to_end(country)
+                return entry[0]
+            loading = self._loading.setdefault(country, threading.Lock())
+
+        # Une seule lecture par partition, même si plusieurs sessions la demandent en même temps
+        with loading:
+            with self._lock:
+                entry = self._entries.get(country)
+            if entry is not None:
+                return entry[0]
+            part = pd.read_parquet(self.folder / self.catalog.partitions[country]["file"])
+            size = sizeof(part)
+            with self._lock:
+                self._entries[country] = (part, size)
+                self.bytes += size
+                # On garde toujours la dernière partition lue, même si elle dépasse seule la limite
+                while self.bytes > self.max_bytes and len(self._entries) > 1:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self.bytes -= evicted
+            return part
+
+    def load(self, countries: Iterable) -> pd.DataFrame:
+        """Lignes des pays choisis, dans l'ordre du dataset complet (pays inconnus ignorés)."""
+        countries = sorted({c for c in countries if c in self.catalog.partitions})
+        if not countries:
+            return self.catalog.empty_frame()
+        parts = [self.get(c) for c in countries]
+        if len(parts) == 1:
+            return parts[0]
+        df = pd.concat(parts).sort_index()
+        # Les catégories peuvent différer d'une partition à l'autre : on les réunit
+        for col in parts[0].columns:
+            if isinstance(parts[0][col].dtype, pd.CategoricalDtype) and not isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype("category")
+        return df
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"partitions": len(self._entries), "bytes": self.bytes, "max_bytes": self.max_bytes}
@@ -0,0 +1,69 @@
+"""Affichage progressif des figures lourdes : aperçu dans un budget de temps, puis résultat exact.
+
+La figure exacte est construite dans un thread en arrière-plan (``submit``) ;
+les pages mémorisent le ``Future`` avec ``st.cache_resource`` pour que les
+réexécutions et les autres sessions retrouvent le même calcul (``cached_job``
+oublie et relance un calcul terminé en erreur).
+``show_progressively`` attend ce calcul au plus ``PREVIEW_BUDGET_S`` : s'il
+n'est pas prêt, un aperçu (échantillon régulier des lignes + comptes) est
+affiché tout de suite dans un ``st.empty()``, puis remplacé par la figure
+exacte dès qu'elle est prête.
+"""
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Callable, Optional
+
+import numpy as np
+
+# Délai avant d'afficher un aperçu plutôt que d'attendre la figure exacte
+PREVIEW_BUDGET_S = float(os.environ.get("CULINARY_PREVIEW_BUDGET_MS", 300)) / 1000
+
+# Lignes gardées dans un aperçu (assez peu pour qu'il se construise dans le budget)
+PREVIEW_ROWS = 2000
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="culinary-progressive")
+
+
+def submit(fn: Callable, *args) -> Future:
+    """Lance ``fn(*args)`` en arrière-plan (pas d'appel Streamlit dans ``fn``)."""
+    return _executor.submit(fn, *args)
+
+
+def cached_job(job_fn: Callable[..., Future], *args) -> Future:
+    """``job_fn(*args)``, fonction ``st.cache_resource`` qui renvoie un ``Future``.
+
+    Un ``Future`` terminé en erreur resterait en cache jusqu'au redémarrage du
+    processus : on efface cette entrée et on relance le calcul.
+    """
+    future = job_fn(*args)
+    if future.done() and future.exception() is not None:
+        job_fn.clear(*args)
+        future = job_fn(*args)
+    return future
+
+
+def preview_positions(n_rows: int, max_rows: Optional[int] = None) -> np.ndarray:
+    """Positions d'un échantillon régulier (1 ligne sur k) : garde la répartition spatiale des lignes."""
+    max_rows = PREVIEW_ROWS if max_rows is None else max_rows
+    if n_rows <= max_rows:
+        return np.arange(n_rows)
+    return np.linspace(0, n_rows - 1, max_rows).astype(np.int64)
+
+
+def show_progressively(slot, future: Future, render_preview: Callable[[], None],
+                       render_exact: Callable[[object], None], budget_s: float = PREVIEW_BUDGET_S):
+    """Affiche le résultat de ``future`` dans ``slot`` (``st.empty()``), après un aperçu s'il tarde.
+
+    ``render_preview`` à None (résultat assez petit pour ne pas avoir d'aperçu) :
+    on attend simplement la figure exacte. Renvoie le résultat exact.
+    """
+    try:
+        result = future.result(timeout=None if render_preview is None else budget_s)
+    except FutureTimeout:
+        with slot.container():
+            render_preview()
+        result = future.result()
+    with slot.container():
+        render_exact(result)
+    return result
@@ -0,0 +1,163 @@
+"""Requêtes de l'application, hors Streamlit : filtres, Top N, restaurants proches, road trip.
+
+Les pages et le service HTTP (``culinary.service``) appellent les mêmes
+fonctions. Elles lisent le DataFrame partagé sans le copier : les filtres
+produisent un masque booléen (codes des colonnes catégorielles), et seules les
+lignes du résultat final sont extraites. Les résultats sont des row_id (index du
+DataFrame), comme ceux que les pages gardent en session ::
+
+    snapshot = SnapshotStore().current()
+    rows = top_rows(snapshot.df, {"city": ["Lyon"], "min_rating": 4.5}, n=10)
+    snapshot.df.loc[rows]
+"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from culinary.geodesy import EARTH_RADIUS_KM, haversine_km
+from culinary.querystate import FLOAT, LIST
+from culinary.scoring import Profile, ScoringData, top_k
+from culinary.snapshots import register_index
+from culinary.spatial import GridIndex, popularity
+from culinary.trips import POOL_FILTERS, CityPools, plan_from_pools, plan_trip, trip_distance_km
+
+# Filtres communs (noms des paramètres d'URL de l'API et des pages)
+FILTERS = {
+    "country": LIST, "region": LIST, "city": LIST,
+    "cuisine": LIST, "price": LIST, "min_rating": FLOAT,
+}
+FILTER_COLUMNS = {
+    "country": "country", "region": "region", "city": "city",
+    "cuisine": "cuisine_main", "price": "price_level",
+}
+
+
+# ==============================
+# 🔹 FILTRES
+# ==============================
+def isin(column: pd.Series, values) -> np.ndarray:
+    """``column.isin(values)`` en booléens NumPy ; sur une catégorie, compare les codes."""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        codes = column.cat.categories.get_indexer(list(values))
+        return np.isin(column.cat.codes.to_numpy(), codes[codes >= 0])
+    return column.isin(list(values)).to_numpy()
+
+
+def filter_mask(df: pd.DataFrame, filters: dict, cuisine_col: str = "cuisine_main") -> np.ndarray:
+    """Masque des lignes qui passent ``filters`` (listes vides ou absentes = pas de filtre)."""
+    columns = {**FILTER_COLUMNS, "cuisine": cuisine_col}
+    mask = np.ones(len(df), dtype=bool)
+    for name, col in columns.items():
+        values = filters.get(name)
+        if values:
+            mask &= isin(df[col], values)
+    if filters.get("min_rating") is not None:
+        mask &= df["avg_rating"].to_numpy() >= filters["min_rating"]
+    return mask
+
+
+def filter_rows(df: pd.DataFrame, filters: dict, cuisine_col: str = "cuisine_main") -> np.ndarray:
+    """row_id des lignes qui passent ``filters``, dans l'ordre du DataFrame."""
+    return df.index.to_numpy()[filter_mask(df, filters, cuisine_col)]
+
+
+# ==============================
+# 🔹 TOP N
+# ==============================
+def top_rows(df: pd.DataFrame, filters: dict, n: int = 5, profile: Optional[Profile] = None,
+             scoring: Optional[ScoringData] = None, cuisine_col: str = "cuisine_main") -> np.ndarray:
+    """row_id des ``n`` meilleurs : note puis nombre d'avis, ou score de ``profile`` (avec ``scoring``)."""
+    mask = filter_mask(df, filters, cuisine_col)
+    if profile is not None:
+        positions, _ = top_k(scoring, profile, k=n, mask=mask)
+        return df.index.to_numpy()[positions]
+
+    positions = np.flatnonzero(mask)
+    rating = df["avg_rating"].to_numpy(dtype=float)[positions]
+    reviews = df["total_reviews_count"].to_numpy(dtype=float)[positions]
+    # lexsort : dernière clé = clé principale ; stable -> égalités dans l'ordre du dataset
+    order = np.lexsort((-np.nan_to_num(reviews, nan=-np.inf), -np.nan_to_num(rating, nan=-np.inf)))
+    return df.index.to_numpy()[positions[order[:n]]]
+
+
+# ==============================
+# 🔹 RESTAURANTS PROCHES
+# ==============================
+@register_index("nearby")
+def build_nearby_index(df: pd.DataFrame) -> GridIndex:
+    return GridIndex(df["latitude"], df["longitude"], popularity(df["avg_rating"], df["total_reviews_count"]))
+
+
+def nearby_rows(df: pd.DataFrame, grid: GridIndex, lat: float, lon: float, radius_km: float = 2.0,
+                filters: Optional[dict] = None, n: int = 10):
+    """(row_id, distances en km) des ``n`` restaurants les plus proches dans ``radius_km``.
+
+    Le rectangle englobant du cercle passe par l'index en grille ; la distance
+    exacte n'est calculée que sur ces candidats.
+    """
+    dlat = np.degrees(radius_km / EARTH_RADIUS_KM)
+    dlon = dlat / max(np.cos(np.radians(lat)), 1e-6)
+    positions = grid.query_bbox(lat - dlat, lon - dlon, lat + dlat, lon + dlon)
+    if filters:
+        positions = positions[filter_mask(df, filters)[positions]]
+
+    distances = haversine_km(lat, lon, grid.lat[positions], grid.lon[positions])
+    inside = distances <= radius_km
+    positions, distances = positions[inside], distances[inside]
+    order = np.argsort(distances, kind="stable")[:n]
+    return df.index.to_numpy()[positions[order]], distances[order]
+
+
+# ==============================
+# 🔹 ROAD TRIP
+# ==============================
+def parse_trip(text: str) -> dict:
+    """« Rome:2,Paris:3 » -> {"Rome": 2, "Paris": 3} ; les morceaux mal formés sont ignorés."""
+    days = {}
+    for part in text.split(","):
+        city, _, n = part.rpartition(":")
+        if city and n.isdigit():
+            days[city] = int(np.clip(int(n), 1, 30))
+    return days
+
+
+def trip_rows(df: pd.DataFrame, days_per_city: dict, filters: Optional[dict] = None,
+              cuisine_col: str = "cuisine_main", pools: Optional[CityPools] = None) -> dict:
+    """Étapes d'un road trip (un restaurant par jour, villes dans l'ordre de ``days_per_city``).
+
+    Avec ``pools`` (``snapshot.city_pools``), les villes sont servies par leurs
+    candidats pré-classés ; seules celles dont le pool ne suffit pas sont
+    recalculées sur ``df``. Renvoie les row_id, les avertissements (villes sans
+    assez de candidats) et les distances : un résultat compact, mis en cache tel
+    quel par les appelants.
+    """
+    filters = filters or {}
+    usable = (
+        pools is not None and cuisine_col == POOL_FILTERS["cuisine"]
+        and all(name in POOL_FILTERS or name == "min_rating" for name, v in filters.items() if v)
+    )
+    city_plans = plan_from_pools(pools, days_per_city, filters) if usable else [None] * len(days_per_city)
+
+    missing = {city: n for (city, n), plan in zip(days_per_city.items(), city_plans) if plan is None}
+    if missing:
+        mask = filter_mask(df, {**filters, "city": list(missing)}, cuisine_col)
+        computed = iter(plan_trip(df[mask], missing))
+        city_plans = [plan if plan is not None else next(computed) for plan in city_plans]
+
+    warnings = []
+    for plan in city_plans:
+        if plan.n_available == 0:
+            warnings.append(f"No restaurants found for {plan.city} with these filters.")
+        elif plan.n_available < days_per_city[plan.city]:
+            warnings.append(
+                f"Only {plan.n_available} restaurants found for {plan.city} (need {days_per_city[plan.city]})."
+            )
+
+    stop_rows = np.asarray([row for plan in city_plans for row in plan.rows], dtype=np.int64)
+    return {
+        "row_ids": stop_rows,
+        "warnings": warnings,
+        "distance_km": trip_distance_km(city_plans),
+        "city_distance_km": sum(plan.route_km for plan in city_plans),
+    }
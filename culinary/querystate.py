@@ -0,0 +1,173 @@
+"""Filtres encodés dans l'URL et cache de résultats partagé entre les sessions.
+
+Chaque page décrit ses filtres par un ``spec`` (nom -> type). ``encode`` en
+tire des paramètres d'URL canoniques (listes triées, nombres normalisés,
+valeurs vides omises) : deux utilisateurs qui demandent « France, 4.5 ★ » dans
+n'importe quel ordre obtiennent la même chaîne, qui sert à la fois de lien
+partageable et de clé pour ``ResultCache``.
+
+``ResultCache`` est un LRU borné en octets (et non en nombre d'entrées) : les
+pages y rangent des résultats compacts (tableaux de row_id) calculés une fois
+pour tout le processus.
+"""
+import math
+import sys
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable
+from urllib.parse import urlencode
+
+import numpy as np
+import pandas as pd
+
+LIST, FLOAT, INT, TEXT = "list", "float", "int", "text"
+
+
+# ==============================
+# 🔹 PARAMÈTRES D'URL
+# ==============================
+def float_text(value) -> str:
+    """Forme la plus courte qui relit exactement ``value`` (``repr``), sans « .0 » final.
+
+    Pas de ``:g`` (6 chiffres) : deux points à quelques mètres près donneraient
+    la même clé de cache.
+    """
+    text = repr(float(value))
+    return text[:-2] if text.endswith(".0") else text
+
+
+def encode(values: dict, spec: Dict[str, str]) -> dict:
+    """Paramètres canoniques : ``{nom: str}`` ou ``{nom: [str, …]}`` pour les listes."""
+    params = {}
+    for name in sorted(spec):
+        value = values.get(name)
+        if value is None or (isinstance(value, (list, tuple, set)) and not value) or value == "":
+            continue
+        kind = spec[name]
+        if kind == LIST:
+            params[name] = sorted({str(v) for v in value})
+        elif kind == FLOAT:
+            params[name] = float_text(value)
+        elif kind == INT:
+            params[name] = str(int(value))
+        else:
+            params[name] = str(value)
+    return params
+
+
+def decode(get_all: Callable[[str], list], spec: Dict[str, str]) -> dict:
+    """Valeurs présentes et bien formées ; ``get_all(nom)`` renvoie toutes les valeurs du paramètre."""
+    values = {}
+    for name, kind in spec.items():
+        raw = get_all(name)
+        if not raw:
+            continue
+        try:
+            if kind == LIST:
+                values[name] = list(dict.fromkeys(raw))
+            elif kind == FLOAT:
+                values[name] = float(raw[-1])
+            elif kind == INT:
+                values[name] = int(raw[-1])
+            else:
+                values[name] = raw[-1]
+        except ValueError:
+            continue   # lien modifié à la main : on ignore le paramètre
+    return values
+
+
+def query_string(params: dict) -> str:
+    """Forme texte stable (« country=France&min_rating=4.5 »), utilisable comme clé."""
+    return urlencode(sorted(params.items()), doseq=True)
+
+
+def only_known(values: Iterable, options) -> list:
+    """Valeurs d'URL encore proposées par le widget (un lien ancien peut citer une ville disparue)."""
+    options = set(options)
+    return [v for v in values if v in options]
+
+
+def slider_value(value, low: float, high: float, step: float, default: float) -> float:
+    """Valeur d'URL utilisable par ``st.slider`` : bornée à [low, high] et arrondie au pas.
+
+    Un lien modifié à la main (``?min_rating=7`` ou ``4.3`` avec un pas de 0.5)
+    ferait sinon échouer la page ; une valeur absente ou non finie donne ``default``.
+    """
+    value = default if value is None or not math.isfinite(value) else value
+    value = min(max(float(value), low), high)
+    return round(low + round((value - low) / step) * step, 10)
+
+
+# ==============================
+# 🔹 CACHE DE RÉSULTATS (LRU EN OCTETS)
+# ==============================
+def sizeof(value) -> int:
+    """Taille approximative en mémoire d'un résultat."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(value.memory_usage(deep=True).sum()) if isinstance(value, pd.DataFrame) \
+            else int(value.memory_usage(deep=True))
+    if isinstance(value, pd.Index):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(k) + sizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    def __init__(self, max_bytes: int = 64 * 2 ** 20):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = sizeof(value)
+        if size > self.max_bytes:
+            return   # trop gros pour être gardé
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+
+    def get_or_compute(self, key, compute: Callable[[], object]):
+        """Résultat en cache, sinon ``compute()`` (hors verrou) puis mémorisé."""
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
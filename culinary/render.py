@@ -0,0 +1,196 @@
+"""Rendu HTML groupé des listes de résultats et des popups de cartes.
+
+Au lieu d'un ``st.markdown`` par ligne (un message envoyé au navigateur à chaque
+appel), on construit tout le bloc HTML en une fois à partir des colonnes, avec
+des opérations vectorisées pandas, puis la page fait un seul ``st.markdown``.
+
+Les popups des marqueurs folium sont générés de la même façon, une seule fois
+par restaurant et par snapshot (``FragmentCache``), et les icônes numérotées
+partagent une classe CSS au lieu de répéter un style en ligne par marqueur.
+"""
+import sys
+import threading
+from collections import OrderedDict
+from typing import Callable, List
+
+import numpy as np
+import pandas as pd
+
+ITINERARY_CSS = """<style>
+.itinerary-city {font-size: 1.8rem; font-weight: 700; margin: 1.5rem 0 0.5rem 0;}
+.itinerary-stop {display: grid; grid-template-columns: 3fr 1fr 1fr; gap: 1rem;
+  padding: 0.5rem 0 1rem 0; border-bottom: 1px solid rgba(49, 51, 63, 0.1);}
+.itinerary-stop h4 {grid-column: 1 / -1; margin: 0;}
+.itinerary-stop p {margin: 0.2rem 0;}
+</style>"""
+
+
+def escape(values: pd.Series) -> pd.Series:
+    """Équivalent vectorisé de ``html.escape(quote=True)`` (les noms peuvent contenir &, < ou ')."""
+    return (
+        values.astype("string")
+        .fillna("")
+        .str.replace("&", "&amp;", regex=False)
+        .str.replace("<", "&lt;", regex=False)
+        .str.replace(">", "&gt;", regex=False)
+        .str.replace('"', "&quot;", regex=False)
+        .str.replace("'", "&#x27;", regex=False)
+        .astype(object)
+    )
+
+
+def fmt_rating(values: pd.Series) -> pd.Series:
+    return values.astype(float).round(1).astype(str)
+
+
+def fmt_count(values: pd.Series) -> pd.Series:
+    return values.fillna(0).astype(int).astype(str)
+
+
+# ==============================
+# 🔹 TOP N
+# ==============================
+def result_cards_html(df: pd.DataFrame, cuisine_col: str = "cuisines_clean") -> str:
+    cards = (
+        "<div class=\"result-card\"><h3>" + escape(df["restaurant_name"]) + "</h3>"
+        + "<p>" + escape(df[cuisine_col]) + " • " + escape(df["city"])
+        + " • " + escape(df["country"]) + " • " + escape(df["price_level"]) + "</p>"
+        + "<p><strong>⭐ " + fmt_rating(df["avg_rating"]) + "</strong> — "
+        + fmt_count(df["total_reviews_count"]) + " avis</p></div>"
+    )
+    return "".join(cards.tolist())
+
+
+# ==============================
+# 🔹 ITINÉRAIRE
+# ==============================
+def itinerary_html(stops: pd.DataFrame, days_per_city: dict) -> str:
+    """Une étape par ligne de ``stops`` (dans l'ordre du voyage), avec un titre à chaque nouvelle ville."""
+    if stops.empty:
+        return ""
+
+    city = stops["city"].astype(str)
+    new_city = city.ne(city.shift()).to_numpy()
+    n_days = city.map(days_per_city).fillna(0).astype(int).astype(str)
+    city_header = np.where(
+        new_city,
+        ("<div class=\"itinerary-city\">📍 " + escape(city) + " — " + n_days + " day(s)</div>").to_numpy(),
+        "",
+    )
+
+    day = pd.Series(np.arange(1, len(stops) + 1), index=stops.index).astype(str)
+
+    price = escape(stops["price_level"])
+    if "estimated_cost" in stops:
+        cost = stops["estimated_cost"]
+        price = price + np.where(
+            cost.notna(), " (~€" + cost.fillna(0).astype(int).astype(str) + ")", ""
+        )
+
+    if "address" in stops:
+        address = escape(stops["address"])
+    else:
+        address = "Address not available"
+
+    if "phone" in stops:
+        phone = escape(stops["phone"])
+    else:
+        phone = "N/A"  # le dataset n'a pas de téléphone
+
+    rows = (
+        city_header
+        + "<div class=\"itinerary-stop\"><h4>Day " + day + "</h4>"
+        + "<div><p><strong>Restaurant: " + escape(stops["restaurant_name"]) + "</strong></p>"
+        + "<p>📍 " + escape(stops["city"]) + ", " + escape(stops["country"])
+        + " | 🍴 " + escape(stops["cuisines"]) + "</p>"
+        + "<p>📧 " + address + "</p></div>"
+        + "<div><p>⭐ <strong>" + fmt_rating(stops["avg_rating"]) + "</strong></p>"
+        + "<p>💰 " + price + "</p>"
+        + "<p>🧾 " + fmt_count(stops["total_reviews_count"]) + " reviews</p></div>"
+        + "<div><p>📞 " + phone + "</p></div></div>"
+    )
+    return ITINERARY_CSS + "".join(rows.tolist())
+
+
+# ==============================
+# 🔹 POPUPS ET ICÔNES DES CARTES
+# ==============================
+STOP_ICON_CSS = """<style>
+.stop-icon {background-color: #FF4B4B; color: white; border-radius: 50%; width: 30px; height: 30px;
+  display: flex; align-items: center; justify-content: center; font-weight: bold; font-size: 14px;
+  border: 2px solid white;}
+</style>"""
+
+
+def stop_icon_html(number: int) -> str:
+    """Icône numérotée d'une étape (style dans ``STOP_ICON_CSS``, ajouté une fois par carte)."""
+    return f'<div class="stop-icon">{number}</div>'
+
+
+def trip_popup_html(stops: pd.DataFrame) -> pd.Series:
+    """Corps du popup d'une étape ; la page ajoute devant « <b>Stop n: »."""
+    return (
+        escape(stops["restaurant_name"]) + "</b><br>"
+        + escape(stops["city"]) + ", " + escape(stops["country"]) + "<br>"
+        + "⭐ " + fmt_rating(stops["avg_rating"]) + " (" + fmt_count(stops["total_reviews_count"]) + " reviews)<br>"
+        + "🍴 " + escape(stops["cuisines"]) + "<br>"
+        + "💰 " + escape(stops["price_level"])
+    )
+
+
+def top_popup_html(df: pd.DataFrame, cuisine_col: str = "cuisines_clean") -> pd.Series:
+    return (
+        "<b>" + escape(df["restaurant_name"]) + "</b><br>"
+        + escape(df[cuisine_col]) + "<br>"
+        + escape(df["city"]) + " – " + escape(df["country"]) + "<br>"
+        + "⭐ " + fmt_rating(df["avg_rating"]) + " (" + fmt_count(df["total_reviews_count"]) + " avis)"
+    )
+
+
+def viewport_tooltip(df: pd.DataFrame) -> pd.Series:
+    return (
+        escape(df["restaurant_name"]) + " — " + escape(df["city"])
+        + " ⭐ " + df["avg_rating"].astype(float).map("{:.1f}".format).astype(object)
+    )
+
+
+class FragmentCache:
+    """Fragments HTML par (version du snapshot, row_id), partagés entre sessions.
+
+    Les lignes absentes sont générées en un seul appel vectorisé à ``build``,
+    puis internées (``sys.intern``) : une carte reconstruite, ou la même
+    étape dans un autre trip, réutilise la même chaîne. LRU borné en entrées.
+    """
+
+    def __init__(self, build: Callable[[pd.DataFrame], pd.Series], max_entries: int = 100_000):
+        self.build = build
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, version: str, df: pd.DataFrame) -> List[str]:
+        """Fragments des lignes de ``df`` (index = row_id), dans l'ordre de ``df``."""
+        keys = [(version, row) for row in df.index.tolist()]
+        with self._lock:
+            fragments = [self._entries.get(key) for key in keys]
+            for key, fragment in zip(keys, fragments):
+                if fragment is not None:
+                    self._entries.move_to_end(key)
+
+        missing = [i for i, fragment in enumerate(fragments) if fragment is None]
+        if missing:
+            built = self.build(df.iloc[missing]).tolist()
+            with self._lock:
+                for i, fragment in zip(missing, built):
+                    fragments[i] = self._entries[keys[i]] = sys.intern(fragment)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return fragments
+
+
+TRIP_POPUPS = FragmentCache(trip_popup_html)
+TOP_POPUPS = FragmentCache(top_popup_html)
+VIEWPORT_TOOLTIPS = FragmentCache(viewport_tooltip)
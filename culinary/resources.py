@@ -0,0 +1,93 @@
+"""Ressources partagées entre les sessions Streamlit (une instance par processus)."""
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import streamlit as st
+
+# Modules qui enregistrent un index construit avec chaque snapshot
+import culinary.geo  # noqa: F401
+import culinary.queries  # noqa: F401
+import culinary.sampling  # noqa: F401
+import culinary.scoring  # noqa: F401
+import culinary.search  # noqa: F401
+import culinary.sketches  # noqa: F401
+import culinary.similar  # noqa: F401
+from culinary.querystate import ResultCache, decode, encode, query_string
+from culinary.snapshots import BackgroundRefresher, Snapshot, SnapshotStore
+
+REFRESH_INTERVAL = float(os.environ.get("CULINARY_REFRESH_INTERVAL", 3600))
+
+# Pays sélectionnés par défaut par les pages (Maps : France, Road Trip : France + Italie, Carte 3D : Belgique)
+DEFAULT_COUNTRIES = ["France", "Italy", "Belgium"]
+
+
+@st.cache_resource
+def get_store() -> SnapshotStore:
+    store = SnapshotStore()
+    # Chaque nouvelle version est préchauffée comme au démarrage, dans le thread du rafraîchissement
+    BackgroundRefresher(store, interval=REFRESH_INTERVAL, on_refresh=_warm).start()
+    return store
+
+
+def current_snapshot() -> Snapshot:
+    """À appeler une fois en haut de page : le snapshot reste le même pendant toute l'exécution."""
+    return get_store().current()
+
+
+def _warm(snapshot: Snapshot) -> str:
+    # D'abord les partitions des vues par défaut (premier affichage des cartes)…
+    for country in DEFAULT_COUNTRIES:
+        if country in snapshot.catalog.partitions:
+            snapshot.partitions.get(country)
+    # … puis le dataset complet et les index globaux (recherche, Top 5, statistiques)
+    snapshot.indexes.build_all()
+    # La version seulement : le Future mémorisé ne doit pas retenir le snapshot (et son dossier)
+    return snapshot.version
+
+
+@st.cache_resource
+def warm_up() -> Future:
+    """Ouvre le snapshot, lit les partitions par défaut et construit les index en arrière-plan, une fois par processus.
+
+    Appelé depuis la page d'accueil : elle s'affiche sans attendre, et la
+    première page qui en a besoin trouve le travail fait (ou attend la fin de
+    la même construction au lieu d'en lancer une autre). Les snapshots
+    suivants sont préchauffés par le rafraîchissement (voir ``get_store``).
+    """
+    store = get_store()
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="culinary-warmup")
+    future = executor.submit(lambda: _warm(store.current()))
+    executor.shutdown(wait=False)
+    return future
+
+
+# ==============================
+# 🔹 FILTRES DANS L'URL & CACHE DE RÉSULTATS
+# ==============================
+RESULT_CACHE_MB = float(os.environ.get("CULINARY_RESULT_CACHE_MB", 64))
+
+
+@st.cache_resource
+def result_cache() -> ResultCache:
+    """Résultats de filtres partagés par toutes les sessions (LRU borné en octets)."""
+    return ResultCache(max_bytes=int(RESULT_CACHE_MB * 2 ** 20))
+
+
+def url_filters(page: str, spec: dict) -> dict:
+    """Filtres présents dans l'URL à l'arrivée sur la page (lus une fois par session).
+
+    Sert de valeurs par défaut aux widgets : un lien partagé rouvre la même vue.
+    """
+    key = f"_url_filters_{page}"
+    if key not in st.session_state:
+        st.session_state[key] = decode(st.query_params.get_all, spec)
+    return st.session_state[key]
+
+
+def publish_filters(values: dict, spec: dict) -> str:
+    """Écrit les filtres dans l'URL (forme canonique) et renvoie la requête, clé du cache de résultats."""
+    params = encode(values, spec)
+    current = {name: st.query_params.get_all(name) for name in st.query_params}
+    if current != {k: v if isinstance(v, list) else [v] for k, v in params.items()}:
+        st.query_params.from_dict(params)
+    return query_string(params)
@@ -0,0 +1,107 @@
+"""Échantillon stratifié par (pays, cuisine) pour les statistiques approchées.
+
+Construit une fois par snapshot : chaque strate (pays, cuisine principale)
+reçoit une part de ``SAMPLE_SIZE`` proportionnelle à sa taille, avec au moins
+``MIN_PER_STRATUM`` lignes (toutes si la strate est plus petite), tirées sans
+remise avec une graine fixe. Une strate tirée en partie a toujours au moins
+2 lignes ; si sa variance reste indéfinie (notes manquantes), on prend la
+variance de tout l'échantillon, plus prudente qu'une variance nulle.
+
+Les filtres de la page Stats portent sur des pays et des cuisines : une
+sélection est donc toujours une union de strates. Les nombres de restaurants
+sont exacts (tailles des strates) ; les notes moyennes sont estimées sur
+l'échantillon (estimateur stratifié) avec un intervalle de confiance à 95 % ::
+
+    sample = snapshot.indexes["stratified_sample"]
+    sample.estimate(cuisines=["Pizza"], by="country")   # count, mean_rating, ci, sampled
+"""
+import numpy as np
+import pandas as pd
+
+from culinary.data import with_labels
+from culinary.snapshots import register_index
+
+GROUP_COLUMNS = ["country", "cuisine_main"]
+
+SAMPLE_SIZE = 20_000
+MIN_PER_STRATUM = 30
+
+# Quantile de la loi normale pour un intervalle à 95 %
+Z_95 = 1.96
+
+
+class StratifiedSample:
+    def __init__(self, df: pd.DataFrame, size: int = SAMPLE_SIZE, min_per_stratum: int = MIN_PER_STRATUM,
+                 seed: int = 0):
+        # Clés = libellés affichés par les pages (« Inconnue » pour une cuisine manquante…)
+        keys = with_labels(df, GROUP_COLUMNS).astype(str)
+        grouped = keys.groupby(GROUP_COLUMNS, sort=True)
+        stratum = grouped.ngroup().to_numpy()
+        groups = pd.MultiIndex.from_tuples(list(grouped.groups), names=GROUP_COLUMNS)
+
+        population = np.bincount(stratum, minlength=len(groups))
+        share = np.round(size * population / max(len(df), 1)).astype(np.int64)
+        # Au moins 2 lignes par strate : avec une seule, la variance (et donc l'IC) serait inconnue
+        allocated = np.minimum(population, np.maximum(share, max(min_per_stratum, 2)))
+
+        # Tirage sans remise : ordre aléatoire dans chaque strate, on garde les premiers
+        order = np.lexsort((np.random.default_rng(seed).random(len(df)), stratum))
+        starts = np.r_[0, np.cumsum(population)[:-1]]
+        rank = np.arange(len(order)) - starts[stratum[order]]
+        keep = np.sort(order[rank < allocated[stratum[order]]])
+
+        self.strata = groups.to_frame(index=False).assign(population=population, sampled=allocated)
+        self.sample = pd.DataFrame({
+            "stratum": stratum[keep],
+            "avg_rating": df["avg_rating"].to_numpy(dtype=float)[keep],
+        })
+        self.row_ids = df.index.to_numpy()[keep]
+        # Variance de repli des strates où elle n'est pas estimable
+        self.pooled_var = float(np.nan_to_num(self.sample["avg_rating"].var()))
+
+    def __len__(self):
+        return len(self.sample)
+
+    def estimate(self, countries=(), cuisines=(), by: str = None) -> pd.DataFrame:
+        """Restaurants (exact) et note moyenne estimée ± ``ci`` (95 %) des strates choisies.
+
+        Vide = tous les pays / toutes les cuisines. ``by`` : "country" ou
+        "cuisine_main" pour une ligne par valeur, sinon une seule ligne.
+        """
+        strata = self.strata
+        mask = np.ones(len(strata), dtype=bool)
+        if countries:
+            mask &= strata["country"].isin(list(countries)).to_numpy()
+        if cuisines:
+            mask &= strata["cuisine_main"].isin(list(cuisines)).to_numpy()
+        strata = strata[mask]
+
+        # Moyenne et variance de la note par strate, sur l'échantillon
+        sample = self.sample[self.sample["stratum"].isin(strata.index)]
+        stats = sample.groupby("stratum")["avg_rating"].agg(["mean", "var", "count"])
+        strata = strata.join(stats)
+        # Strate entièrement tirée : pas d'erreur d'échantillonnage (fpc = 0)
+        fpc = 1 - strata["count"] / strata["population"]
+        var = strata["var"].fillna(self.pooled_var)
+        strata = strata.assign(
+            weighted_mean=strata["population"] * strata["mean"],
+            weighted_var=strata["population"] ** 2 * fpc * var / strata["count"],
+        )
+
+        totals = strata.groupby(by if by else np.zeros(len(strata), dtype=int), sort=True).agg(
+            count=("population", "sum"),
+            sampled=("count", "sum"),
+            weighted_mean=("weighted_mean", "sum"),
+            weighted_var=("weighted_var", "sum"),
+        )
+        return pd.DataFrame({
+            "count": totals["count"],
+            "mean_rating": totals["weighted_mean"] / totals["count"],
+            "ci": Z_95 * np.sqrt(totals["weighted_var"]) / totals["count"],
+            "sampled": totals["sampled"].astype(int),
+        }, index=totals.index)
+
+
+@register_index("stratified_sample")
+def build_stratified_sample(df: pd.DataFrame) -> StratifiedSample:
+    return StratifiedSample(df)
@@ -0,0 +1,193 @@
+"""Classement multi-critères selon un profil utilisateur, en une passe NumPy.
+
+Les colonnes utiles sont converties une seule fois en tableaux float32
+(``ScoringData``) ; ensuite ``score`` calcule la note de profil de tous les
+candidats d'un coup et ``top_k`` garde les meilleurs avec ``argpartition``.
+
+Utilisable hors Streamlit ::
+
+    data = ScoringData.from_frame(df)
+    profile = Profile(cuisines={"Italian": 1.0, "Pizza": 0.5}, budget="€", location=(48.85, 2.35))
+    positions, scores = top_k(data, profile, k=10)
+    df.iloc[positions]
+
+Benchmark : ``python -m culinary.scoring --rows 1000000``.
+"""
+import argparse
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from culinary.geodesy import EARTH_RADIUS_KM, central_angle
+from culinary.similar import PRICE_SCALE, split_cuisines
+from culinary.snapshots import register_index
+
+# 63 cuisines les plus fréquentes sur un bit chacune, le bit 63 pour « autre »
+MAX_CUISINE_BITS = 63
+
+
+@dataclass
+class Profile:
+    cuisines: Dict[str, float] = field(default_factory=dict)   # cuisine -> poids (0..1)
+    budget: Optional[str] = None                                # "€", "€€-€€€", "€€€€"…
+    location: Optional[Tuple[float, float]] = None              # (lat, lon)
+    distance_km: float = 50.0                                   # distance à laquelle le score tombe à ~0.37
+    w_cuisine: float = 1.0
+    w_budget: float = 0.5
+    w_popularity: float = 0.5
+    w_rating: float = 1.0
+    w_distance: float = 0.5
+
+
+@dataclass
+class ScoringData:
+    rating: np.ndarray        # float32, 0..1
+    popularity: np.ndarray    # float32, 0..1 (log des avis)
+    price: np.ndarray         # float32, 0..1 (0 si inconnu)
+    price_unknown: np.ndarray # positions des prix inconnus
+    lat: np.ndarray           # float32, radians
+    lon: np.ndarray           # float32, radians
+    cos_lat: np.ndarray       # float32
+    cuisine_bits: np.ndarray  # uint64, un bit par cuisine
+    cuisine_codes: Dict[str, int]
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "ScoringData":
+        n = len(df)
+
+        tags = split_cuisines(df["cuisines"])
+        vocab = tags.value_counts().index[:MAX_CUISINE_BITS].tolist()
+        codes = pd.Categorical(tags, categories=vocab).codes.astype(np.int64)
+        codes[codes < 0] = MAX_CUISINE_BITS
+        bits = np.zeros(n, dtype=np.uint64)
+        np.bitwise_or.at(bits, tags.index.to_numpy(), np.left_shift(np.uint64(1), codes.astype(np.uint64)))
+
+        reviews = np.log1p(df["total_reviews_count"].astype(float).fillna(0).to_numpy())
+        max_reviews = reviews.max() if n else 0.0
+        lat = np.radians(df["latitude"].astype(float).to_numpy())
+        price = df["price_level"].astype("string").map(PRICE_SCALE).astype(float).to_numpy(np.float32)
+
+        return cls(
+            rating=(df["avg_rating"].astype(float).fillna(0).to_numpy() / 5.0).astype(np.float32),
+            popularity=(reviews / max_reviews if max_reviews > 0 else reviews).astype(np.float32),
+            price=np.nan_to_num(price),
+            price_unknown=np.flatnonzero(np.isnan(price)),
+            lat=lat.astype(np.float32),
+            lon=np.radians(df["longitude"].astype(float).to_numpy()).astype(np.float32),
+            cos_lat=np.cos(lat).astype(np.float32),
+            cuisine_bits=bits,
+            cuisine_codes={c: i for i, c in enumerate(vocab)},
+        )
+
+    def __len__(self):
+        return len(self.rating)
+
+
+def score(data: ScoringData, profile: Profile) -> np.ndarray:
+    """Score (0..1, float32) de chaque restaurant pour ``profile``."""
+    total = np.zeros(len(data), dtype=np.float32)
+    weight_sum = 0.0
+
+    if profile.cuisines and profile.w_cuisine:
+        # Meilleur poids parmi les cuisines du restaurant qui sont dans le profil
+        best = np.zeros(len(data), dtype=np.float32)
+        for cuisine, w in profile.cuisines.items():
+            code = data.cuisine_codes.get(cuisine)
+            if code is None:
+                continue
+            has = (data.cuisine_bits & np.uint64(1 << code)) != 0
+            np.maximum(best, np.float32(w) * has, out=best)
+        total += np.float32(profile.w_cuisine) * best
+        weight_sum += profile.w_cuisine
+
+    if profile.budget in PRICE_SCALE and profile.w_budget:
+        closeness = np.subtract(data.price, np.float32(PRICE_SCALE[profile.budget]))
+        np.abs(closeness, out=closeness)
+        np.subtract(np.float32(1), closeness, out=closeness)
+        closeness[data.price_unknown] = 0.5   # prix inconnu : neutre
+        closeness *= np.float32(profile.w_budget)
+        total += closeness
+        weight_sum += profile.w_budget
+
+    if profile.w_popularity:
+        total += np.float32(profile.w_popularity) * data.popularity
+        weight_sum += profile.w_popularity
+
+    if profile.w_rating:
+        total += np.float32(profile.w_rating) * data.rating
+        weight_sum += profile.w_rating
+
+    if profile.location is not None and profile.w_distance:
+        # Haversine en place (float32) pour limiter les tableaux temporaires
+        lat0, lon0 = np.radians(profile.location)
+        a = central_angle(lat0, lon0, data.lat, data.lon, data.cos_lat)
+        # exp(-distance / distance_km), distance = R × angle
+        a *= np.float32(-EARTH_RADIUS_KM / profile.distance_km)
+        np.exp(a, out=a)
+        a[np.isnan(a)] = 0   # restaurants sans coordonnées
+        a *= np.float32(profile.w_distance)
+        total += a
+        weight_sum += profile.w_distance
+
+    return total / np.float32(weight_sum) if weight_sum else total
+
+
+def top_k(data: ScoringData, profile: Profile, k: int = 5, mask=None):
+    """Positions et scores des ``k`` meilleurs (``mask`` : booléens des candidats autorisés)."""
+    scores = score(data, profile)
+    if mask is not None:
+        scores = np.where(mask, scores, -np.inf)
+
+    k = min(k, int(np.isfinite(scores).sum()))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return top, scores[top]
+
+
+@register_index("scoring")
+def build_scoring_data(df: pd.DataFrame) -> ScoringData:
+    return ScoringData.from_frame(df)
+
+
+# ==============================
+# 🔹 BENCHMARK
+# ==============================
+def synthetic_frame(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    cuisines = np.array(["Italian", "French", "Pizza", "Spanish", "Asian", "Cafe", "Bar", "Seafood"])
+    return pd.DataFrame({
+        "cuisines": pd.Series(cuisines[rng.integers(0, len(cuisines), n_rows)]) + ", "
+        + cuisines[rng.integers(0, len(cuisines), n_rows)],
+        "price_level": np.array(["€", "€€-€€€", "€€€€", "Inconnu"])[rng.integers(0, 4, n_rows)],
+        "avg_rating": rng.integers(2, 11, n_rows) / 2,
+        "total_reviews_count": rng.integers(0, 5000, n_rows).astype(float),
+        "latitude": rng.uniform(36, 60, n_rows),
+        "longitude": rng.uniform(-9, 25, n_rows),
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark du classement par profil")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    data = ScoringData.from_frame(synthetic_frame(args.rows))
+    profile = Profile(cuisines={"Italian": 1.0, "Pizza": 0.6}, budget="€€-€€€", location=(48.85, 2.35))
+    top_k(data, profile, k=10)  # échauffement
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        top_k(data, profile, k=10)
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"{args.rows} lignes : médiane {np.median(timings):.1f} ms, min {min(timings):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""Service HTTP sans interface : filtres, Top N, restaurants proches et road trips en JSON.
+
+Un seul processus garde le snapshot et ses index en mémoire (rafraîchis en
+arrière-plan comme pour l'application Streamlit) ; chaque requête lit le
+snapshot courant sans le copier et appelle ``culinary.queries`` dans le pool de
+threads, pour ne pas bloquer la boucle asynchrone. Les résultats (row_id) sont
+rangés dans un ``ResultCache`` partagé, indexé par la requête canonique.
+
+Usage ::
+
+    python -m culinary.service --port 8080
+    curl 'http://127.0.0.1:8080/top?city=Lyon&n=10'
+    curl 'http://127.0.0.1:8080/nearby?lat=48.8566&lon=2.3522&radius_km=1'
+    curl 'http://127.0.0.1:8080/trip?trip=Rome:2,Paris:3&format=gpx'
+
+Charge : ``python -m culinary.loadtest --url http://127.0.0.1:8080``.
+"""
+import argparse
+import contextlib
+import os
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+# Modules qui enregistrent un index construit avec chaque snapshot
+import culinary.queries as queries
+import culinary.search  # noqa: F401
+from culinary.export import MIME_TYPES, iter_geojson, iter_gpx, iter_ics, stop_records
+from culinary.querystate import FLOAT, INT, TEXT, ResultCache, decode, encode, query_string
+from culinary.snapshots import BackgroundRefresher, SnapshotStore
+
+REFRESH_INTERVAL = float(os.environ.get("CULINARY_REFRESH_INTERVAL", 3600))
+RESULT_CACHE_MB = float(os.environ.get("CULINARY_RESULT_CACHE_MB", 64))
+
+RECORD_COLUMNS = [
+    "restaurant_name", "country", "region", "city", "address",
+    "latitude", "longitude", "price_level", "cuisines", "cuisine_main",
+    "avg_rating", "total_reviews_count",
+]
+MAX_RESULTS = 500
+
+# Paramètres de chaque route (en plus des filtres communs)
+PAGE = {"limit": INT, "offset": INT}
+TOP = {"n": INT}
+NEARBY = {"lat": FLOAT, "lon": FLOAT, "radius_km": FLOAT, "n": INT}
+SEARCH = {"q": TEXT, "limit": INT}
+TRIP = {"trip": TEXT, "format": TEXT, "start": TEXT}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def only_filters(params: dict) -> dict:
+    return {name: value for name, value in params.items() if name in queries.FILTERS}
+
+
+def records(df: pd.DataFrame, row_ids, extra: dict = None) -> list:
+    """Lignes ``row_ids`` en dicts JSON (NA -> null) ; seules ces lignes sont extraites."""
+    rows = df.loc[row_ids, RECORD_COLUMNS]
+    rows = rows.astype(object).where(rows.notna(), None)
+    rows.insert(0, "row_id", rows.index.to_numpy().tolist())
+    for name, values in (extra or {}).items():
+        rows[name] = values
+    return rows.to_dict("records")
+
+
+class QueryService:
+    """Snapshot partagé + cache de résultats ; les méthodes sont sûres entre threads."""
+
+    def __init__(self, store: SnapshotStore, cache: ResultCache):
+        self.store = store
+        self.cache = cache
+
+    def _cached(self, route: str, version: str, params: dict, spec: dict, compute):
+        key = f"api/{route}/{version}?{query_string(encode(params, spec))}"
+        return self.cache.get_or_compute(key, compute)
+
+    def health(self, params: dict) -> dict:
+        snapshot = self.store.current()
+        return {"version": snapshot.version, "rows": len(snapshot.df), "cache": self.cache.stats()}
+
+    def restaurants(self, params: dict) -> dict:
+        snapshot = self.store.current()
+        rows = self._cached(
+            "restaurants", snapshot.version, params, queries.FILTERS,
+            lambda: queries.filter_rows(snapshot.df, params),
+        )
+        offset = max(params.get("offset", 0), 0)
+        limit = int(np.clip(params.get("limit", 50), 0, MAX_RESULTS))
+        return {
+            "version": snapshot.version,
+            "total": len(rows),
+            "offset": offset,
+            "results": records(snapshot.df, rows[offset:offset + limit]),
+        }
+
+    def top(self, params: dict) -> dict:
+        snapshot = self.store.current()
+        n = int(np.clip(params.get("n", 5), 1, MAX_RESULTS))
+        rows = self._cached(
+            "top", snapshot.version, {**params, "n": n}, {**queries.FILTERS, **TOP},
+            lambda: queries.top_rows(snapshot.df, params, n=n),
+        )
+        return {"version": snapshot.version, "results": records(snapshot.df, rows)}
+
+    def nearby(self, params: dict) -> dict:
+        if "lat" not in params or "lon" not in params:
+            raise BadRequest("lat and lon are required")
+        snapshot = self.store.current()
+        radius = float(np.clip(params.get("radius_km", 2.0), 0.0, 100.0))
+        n = int(np.clip(params.get("n", 10), 1, MAX_RESULTS))
+        rows, distances = self._cached(
+            "nearby", snapshot.version, {**params, "radius_km": radius, "n": n}, {**queries.FILTERS, **NEARBY},
+            lambda: queries.nearby_rows(
+                snapshot.df, snapshot.indexes["nearby"], params["lat"], params["lon"],
+                radius_km=radius, filters=only_filters(params), n=n,
+            ),
+        )
+        return {
+            "version": snapshot.version,
+            "results": records(snapshot.df, rows, {"distance_km": np.round(distances, 3).tolist()}),
+        }
+
+    def search(self, params: dict) -> dict:
+        snapshot = self.store.current()
+        limit = int(np.clip(params.get("limit", 8), 1, 50))
+        suggestions = snapshot.indexes["search"].search(params.get("q", ""), limit=limit)
+        return {
+            "version": snapshot.version,
+            "results": [
+                {"field": s.field, "text": s.text, "context": s.context,
+                 "score": round(s.score, 4), "row_ids": np.asarray(s.rows)[:MAX_RESULTS].tolist()}
+                for s in suggestions
+            ],
+        }
+
+    def trip(self, params: dict):
+        days_per_city = queries.parse_trip(params.get("trip", ""))
+        if not days_per_city:
+            raise BadRequest("trip is required, e.g. trip=Rome:2,Paris:3")
+        kind = params.get("format", "json")
+        if kind != "json" and kind not in MIME_TYPES:
+            raise BadRequest(f"format must be json or one of {sorted(MIME_TYPES)}")
+        snapshot = self.store.current()
+        # « trip » garde l'ordre des villes : c'est l'itinéraire
+        key_params = {**only_filters(params), "trip": ",".join(f"{city}:{n}" for city, n in days_per_city.items())}
+        trip = self._cached(
+            "trip", snapshot.version, key_params, {**queries.FILTERS, "trip": TEXT},
+            lambda: queries.trip_rows(snapshot.df, days_per_city, only_filters(params), pools=snapshot.city_pools),
+        )
+        if kind == "json":
+            return {
+                "version": snapshot.version,
+                "days_per_city": days_per_city,
+                "warnings": trip["warnings"],
+                "distance_km": round(trip["distance_km"], 3),
+                "city_distance_km": round(trip["city_distance_km"], 3),
+                "stops": records(snapshot.df, trip["row_ids"]),
+            }
+        # Exports en streaming, une étape à la fois depuis les colonnes du snapshot
+        stops = stop_records(snapshot.df, trip["row_ids"])
+        if kind == "ics":
+            try:
+                start = date.fromisoformat(params["start"]) if "start" in params else date.today()
+            except ValueError:
+                raise BadRequest("start must be an ISO date (YYYY-MM-DD)")
+            return kind, iter_ics(stops, start)
+        return kind, (iter_gpx(stops) if kind == "gpx" else iter_geojson(stops))
+
+
+# ==============================
+# 🔹 APPLICATION ASGI
+# ==============================
+def _endpoint(method: str, spec: dict):
+    async def endpoint(request: Request):
+        service: QueryService = request.app.state.service
+        params = decode(request.query_params.getlist, spec)
+        try:
+            # NumPy / pandas dans le pool de threads : la boucle reste disponible
+            result = await run_in_threadpool(getattr(service, method), params)
+        except BadRequest as exc:
+            return JSONResponse({"error": str(exc)}, status_code=400)
+        if isinstance(result, tuple):
+            kind, chunks = result
+            return StreamingResponse(
+                chunks, media_type=MIME_TYPES[kind],
+                headers={"Content-Disposition": f'attachment; filename="road_trip.{kind}"'},
+            )
+        return JSONResponse(result)
+    return endpoint
+
+
+def create_app(store: SnapshotStore = None, refresh_interval: float = REFRESH_INTERVAL) -> Starlette:
+    store = store or SnapshotStore()
+    service = QueryService(store, ResultCache(max_bytes=int(RESULT_CACHE_MB * 2 ** 20)))
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        # Snapshot complet et index prêts avant la première requête
+        await run_in_threadpool(lambda: store.current().indexes.build_all())
+        refresher = BackgroundRefresher(store, interval=refresh_interval).start() if refresh_interval else None
+        yield
+        if refresher is not None:
+            refresher.stop(timeout=0)
+
+    app = Starlette(
+        routes=[
+            Route("/health", _endpoint("health", {})),
+            Route("/restaurants", _endpoint("restaurants", {**queries.FILTERS, **PAGE})),
+            Route("/top", _endpoint("top", {**queries.FILTERS, **TOP})),
+            Route("/nearby", _endpoint("nearby", {**queries.FILTERS, **NEARBY})),
+            Route("/search", _endpoint("search", SEARCH)),
+            Route("/trip", _endpoint("trip", {**queries.FILTERS, **TRIP})),
+        ],
+        lifespan=lifespan,
+    )
+    app.state.service = service
+    return app
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Service HTTP des requêtes restaurants")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args(argv)
+    uvicorn.run(create_app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
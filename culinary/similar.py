@@ -0,0 +1,102 @@
+"""Moteur « restaurants similaires » sur une matrice de caractéristiques float32.
+
+Chaque restaurant est encodé une seule fois en un vecteur compact :
+cuisines (multi-hot normalisé), niveau de prix, note, popularité et position
+(vecteur 3D sur la sphère, à l'échelle ``location_km``). Les voisins sont ceux
+à la plus petite distance euclidienne dans cet espace, calculée pour tout le
+dataset par un seul produit matrice-vecteur :
+``‖a − q‖² = ‖a‖² − 2·a·q + ‖q‖²``.
+"""
+import numpy as np
+import pandas as pd
+
+from culinary.data import UNKNOWN_VALUES
+from culinary.geodesy import EARTH_RADIUS_KM, unit_vectors
+from culinary.snapshots import register_index
+
+PRICE_SCALE = {"€": 0.0, "€€": 1 / 3, "€€-€€€": 0.5, "€€€": 2 / 3, "€€€€": 1.0}
+
+DEFAULT_WEIGHTS = {
+    "cuisine": 1.0,
+    "price": 0.5,
+    "rating": 0.5,
+    "popularity": 0.3,
+    "location": 1.0,
+}
+
+
+def split_cuisines(cuisines: pd.Series) -> pd.Series:
+    """Une ligne par (restaurant, cuisine) ; l'index est la position du restaurant."""
+    tags = pd.Series(cuisines.to_numpy(), index=np.arange(len(cuisines)))
+    tags = tags.astype("string").fillna("").str.split(",").explode().str.strip()
+    return tags[~tags.isin(UNKNOWN_VALUES) & tags.notna()]
+
+
+class SimilarityIndex:
+    def __init__(self, df: pd.DataFrame, n_cuisines: int = 64, weights: dict = None,
+                 location_km: float = 100.0):
+        self.labels = df.index
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        w = self.weights
+        n = len(df)
+
+        # --- Cuisines : multi-hot sur les n_cuisines plus fréquentes
+        tags = split_cuisines(df["cuisines"])
+        self.cuisines = tags.value_counts().index[:n_cuisines].tolist()
+        codes = pd.Categorical(tags, categories=self.cuisines).codes
+        keep = codes >= 0
+        cuisine = np.zeros((n, len(self.cuisines)), dtype=np.float32)
+        cuisine[tags.index.to_numpy()[keep], codes[keep]] = 1.0
+        norms = np.linalg.norm(cuisine, axis=1, keepdims=True)
+        np.divide(cuisine, norms, out=cuisine, where=norms > 0)
+
+        # --- Prix, note, popularité (0..1) ; prix inconnu = milieu de gamme
+        price = df["price_level"].astype("string").map(PRICE_SCALE).astype(float).fillna(0.5)
+        rating = df["avg_rating"].astype(float).fillna(0) / 5.0
+        reviews = np.log1p(df["total_reviews_count"].astype(float).fillna(0).to_numpy())
+        pop = reviews / reviews.max() if n and reviews.max() > 0 else reviews
+
+        # --- Position : centrée sur la moyenne pour limiter les erreurs d'arrondi float32
+        xyz = unit_vectors(df["latitude"], df["longitude"])
+        self.center = np.nanmean(xyz, axis=0) if n else np.zeros(3)
+        xyz = np.nan_to_num((xyz - self.center) * EARTH_RADIUS_KM / location_km)
+
+        self.matrix = np.hstack([
+            cuisine * w["cuisine"],
+            price.to_numpy()[:, None] * w["price"],
+            rating.to_numpy()[:, None] * w["rating"],
+            pop[:, None] * w["popularity"],
+            xyz * w["location"],
+        ]).astype(np.float32)
+        self.sq_norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def _distances(self, query: np.ndarray) -> np.ndarray:
+        d2 = self.sq_norms - 2.0 * (self.matrix @ query) + float(query @ query)
+        return np.maximum(d2, 0.0)
+
+    def similar(self, label, k: int = 5, mask=None) -> pd.Series:
+        """Les ``k`` restaurants les plus proches de ``label`` (hors lui-même).
+
+        ``mask`` (booléens alignés sur le DataFrame) restreint les candidats.
+        Renvoie une Series label → similarité (1 / (1 + distance)), triée.
+        """
+        pos = self.labels.get_loc(label)
+        d2 = self._distances(self.matrix[pos])
+        d2[pos] = np.inf
+        if mask is not None:
+            d2[~np.asarray(mask, dtype=bool)] = np.inf
+
+        k = min(k, int(np.isfinite(d2).sum()))
+        if k <= 0:
+            return pd.Series(dtype=float)
+        top = np.argpartition(d2, k - 1)[:k]
+        top = top[np.argsort(d2[top], kind="stable")]
+        return pd.Series(1.0 / (1.0 + np.sqrt(d2[top])), index=self.labels[top], name="similarity")
+
+
+@register_index("similar")
+def build_similarity_index(df: pd.DataFrame) -> SimilarityIndex:
+    return SimilarityIndex(df)
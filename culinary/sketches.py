@@ -0,0 +1,122 @@
+"""Distributions des notes et du nombre d'avis, par (pays, cuisine), fusionnables.
+
+Chaque groupe (pays, cuisine principale) est résumé une fois par snapshot par
+deux vecteurs de comptes sur une grille commune à tous les groupes :
+
+* notes : une case par demi-étoile (0, 0.5, …, 5), comme ``culinary.geo`` ;
+* avis : cases logarithmiques ``]γ^(i-1), γ^i]`` (principe de DDSketch), avec
+  γ = (1 + α) / (1 − α) : tout quantile est rendu avec une erreur relative ≤ α.
+
+Comme la grille est la même partout, fusionner des groupes revient à additionner
+leurs lignes : les percentiles et histogrammes d'une combinaison quelconque de
+pays et de cuisines se calculent sans relire le DataFrame ::
+
+    sketch = snapshot.indexes["distributions"].merge(countries=["Italy"], cuisines=["Pizza"])
+    sketch.reviews_quantiles([0.5, 0.9])
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from culinary.data import with_labels
+from culinary.geo import RATING_BINS
+from culinary.snapshots import register_index
+
+GROUP_COLUMNS = ["country", "cuisine_main"]
+
+# Erreur relative maximale des quantiles du nombre d'avis
+REVIEWS_ALPHA = 0.01
+
+
+@dataclass
+class Sketch:
+    rating: np.ndarray    # comptes par demi-étoile (len(RATING_BINS))
+    reviews: np.ndarray   # case 0 : aucun avis ; case i + 1 : ]γ^(i-1), γ^i]
+    gamma: float
+
+    @property
+    def count(self) -> int:
+        """Nombre de restaurants avec une note."""
+        return int(self.rating.sum())
+
+    def __add__(self, other: "Sketch") -> "Sketch":
+        return Sketch(self.rating + other.rating, self.reviews + other.reviews, self.gamma)
+
+    def rating_histogram(self) -> pd.Series:
+        return pd.Series(self.rating, index=RATING_BINS, name="count")
+
+    def rating_quantiles(self, qs) -> np.ndarray:
+        """Quantiles exacts (les notes sont sur la grille des demi-étoiles)."""
+        return _quantiles(self.rating, RATING_BINS, qs)
+
+    def reviews_values(self) -> np.ndarray:
+        """Valeur représentative de chaque case (erreur relative ≤ α)."""
+        keys = np.arange(len(self.reviews) - 1)
+        return np.r_[0.0, 2 * self.gamma ** keys / (self.gamma + 1)]
+
+    def reviews_quantiles(self, qs) -> np.ndarray:
+        return _quantiles(self.reviews, self.reviews_values(), qs)
+
+    def reviews_mean(self) -> float:
+        n = self.reviews.sum()
+        return float(self.reviews @ self.reviews_values() / n) if n else float("nan")
+
+
+def _quantiles(counts: np.ndarray, values: np.ndarray, qs) -> np.ndarray:
+    """Quantiles (rang le plus proche) d'une distribution donnée par case."""
+    qs = np.atleast_1d(np.asarray(qs, dtype=float))
+    total = counts.sum()
+    if total == 0:
+        return np.full(len(qs), np.nan)
+    cumulative = np.cumsum(counts)
+    ranks = np.clip(np.ceil(qs * total), 1, total)
+    return values[np.searchsorted(cumulative, ranks, side="left")]
+
+
+class DistributionSketches:
+    def __init__(self, df: pd.DataFrame, alpha: float = REVIEWS_ALPHA):
+        self.gamma = (1 + alpha) / (1 - alpha)
+
+        # Clés = libellés affichés par les pages (« Inconnue » pour une cuisine manquante…)
+        keys = with_labels(df, GROUP_COLUMNS).astype(str)
+        grouped = keys.groupby(GROUP_COLUMNS, sort=True)
+        group = grouped.ngroup().to_numpy()
+        self.groups = pd.MultiIndex.from_tuples(list(grouped.groups), names=GROUP_COLUMNS)
+        n_groups = len(self.groups)
+
+        rating = df["avg_rating"].to_numpy(dtype=float)
+        rated = ~np.isnan(rating)
+        rating_bin = np.clip(np.round(rating[rated] * 2), 0, len(RATING_BINS) - 1).astype(np.int64)
+        self.rating = np.bincount(
+            group[rated] * len(RATING_BINS) + rating_bin, minlength=n_groups * len(RATING_BINS)
+        ).reshape(n_groups, len(RATING_BINS))
+
+        reviews = df["total_reviews_count"].to_numpy(dtype=float)
+        known = ~np.isnan(reviews)
+        reviews, reviews_group = reviews[known], group[known]
+        # Case 0 pour « aucun avis », puis ceil(log_γ(x)) + 1 pour x ≥ 1
+        bucket = np.zeros(len(reviews), dtype=np.int64)
+        positive = reviews >= 1
+        bucket[positive] = np.ceil(np.log(reviews[positive]) / np.log(self.gamma) - 1e-9).astype(np.int64) + 1
+        n_buckets = int(bucket.max()) + 1 if len(bucket) else 1
+        self.reviews = np.bincount(
+            reviews_group * n_buckets + bucket, minlength=n_groups * n_buckets
+        ).reshape(n_groups, n_buckets)
+
+    def __len__(self):
+        return len(self.groups)
+
+    def merge(self, countries=(), cuisines=()) -> Sketch:
+        """Sketch fusionné des groupes sélectionnés (vide = tous les pays / toutes les cuisines)."""
+        mask = np.ones(len(self.groups), dtype=bool)
+        if countries:
+            mask &= self.groups.get_level_values("country").isin(list(countries))
+        if cuisines:
+            mask &= self.groups.get_level_values("cuisine_main").isin(list(cuisines))
+        return Sketch(self.rating[mask].sum(axis=0), self.reviews[mask].sum(axis=0), self.gamma)
+
+
+@register_index("distributions")
+def build_distribution_sketches(df: pd.DataFrame) -> DistributionSketches:
+    return DistributionSketches(df)
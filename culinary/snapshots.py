@@ -0,0 +1,386 @@
+"""Snapshots versionnés du dataset et rafraîchissement en arrière-plan.
+
+Chaque version du CSV distant est matérialisée une seule fois dans
+``<root>/<version>/`` (parquet complet, une partition par pays + catalogue,
+candidats pré-classés des road trips, meta.json) ; le fichier ``CURRENT`` pointe vers
+la version active et est remplacé atomiquement (``os.replace``).
+
+Un ``Snapshot`` est immuable : une exécution de page qui a récupéré un snapshot
+continue de l'utiliser jusqu'à la fin, même si une nouvelle version est
+publiée entre-temps. Son dossier n'est supprimé qu'une fois le snapshot
+libéré (il lit ses partitions et ses index à la demande).
+
+Le CSV brut passe par ``culinary.ingest`` avant d'être écrit : les pages lisent
+des données déjà normalisées et dédoublonnées.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import urllib.request
+import weakref
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import pandas as pd
+
+from culinary.data import DATASET_URL, read_raw
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROOT = Path(
+    os.environ.get(
+        "CULINARY_CACHE_DIR",
+        Path(__file__).resolve().parent.parent / "cache",
+    )
+) / "snapshots"
+
+# À incrémenter quand le contenu d'un snapshot change (nettoyage, colonnes…) :
+# les snapshots d'un schéma plus ancien sont reconstruits au démarrage.
+SCHEMA_VERSION = 6
+
+# Partitions par pays gardées en mémoire par snapshot (LRU)
+PARTITION_CACHE_MB = float(os.environ.get("CULINARY_PARTITION_CACHE_MB", 256))
+
+# ==============================
+# 🔹 INDEX CONSTRUITS AVEC CHAQUE SNAPSHOT
+# ==============================
+# nom -> fonction(df) -> index ; les modules qui ont besoin d'un index
+# s'enregistrent ici pour qu'il soit reconstruit hors du chemin des requêtes.
+INDEX_BUILDERS: Dict[str, Callable[[pd.DataFrame], object]] = {}
+
+
+def register_index(name: str):
+    """Décorateur : ajoute ``fn(df)`` aux index construits pour chaque snapshot."""
+    def decorator(fn):
+        INDEX_BUILDERS[name] = fn
+        return fn
+    return decorator
+
+
+def build_indexes(df: pd.DataFrame) -> dict:
+    """Construit tous les index en parallèle : ils sont indépendants et passent
+    l'essentiel de leur temps dans NumPy / pandas, qui relâchent le GIL."""
+    if len(INDEX_BUILDERS) <= 1:
+        return {name: builder(df) for name, builder in INDEX_BUILDERS.items()}
+    with ThreadPoolExecutor(max_workers=len(INDEX_BUILDERS), thread_name_prefix="culinary-index") as pool:
+        futures = {name: pool.submit(builder, df) for name, builder in INDEX_BUILDERS.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
+class SnapshotIndexes(Mapping):
+    """Index d'un snapshot, construits au premier accès (``build_all`` : tous, en parallèle)."""
+
+    def __init__(self, snapshot: "Snapshot", built: Optional[dict] = None):
+        self._snapshot = snapshot
+        self._built = dict(built or {})
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def __getitem__(self, name: str):
+        index = self._built.get(name)
+        if index is None:
+            with self._guard:
+                lock = self._locks.setdefault(name, threading.Lock())
+            with lock:
+                index = self._built.get(name)
+                if index is None:
+                    index = self._built[name] = INDEX_BUILDERS[name](self._snapshot.df)
+        return index
+
+    def __iter__(self):
+        return iter(INDEX_BUILDERS)
+
+    def __len__(self):
+        return len(INDEX_BUILDERS)
+
+    @property
+    def built(self) -> frozenset:
+        """Noms des index déjà construits."""
+        return frozenset(self._built)
+
+    def build_all(self):
+        missing = [name for name in INDEX_BUILDERS if name not in self._built]
+        if missing:
+            self._snapshot.df   # une seule lecture du DataFrame avant de lancer les threads
+            with ThreadPoolExecutor(max_workers=len(missing), thread_name_prefix="culinary-index") as pool:
+                list(pool.map(self.__getitem__, missing))
+
+
+class Snapshot:
+    """Version immuable du dataset.
+
+    Le catalogue des partitions par pays est lu à l'ouverture ; le DataFrame
+    complet et les index ne sont chargés qu'au premier accès. Une page qui
+    travaille sur quelques pays passe par ``partitions`` et ne paie que pour eux.
+    """
+
+    def __init__(self, version: str, folder: Path, source_tag: str = "", created_at: float = 0.0,
+                 report: Optional[dict] = None, df: Optional[pd.DataFrame] = None,
+                 indexes: Optional[dict] = None, catalog=None, city_pools=None):
+        from culinary.partitions import Catalog, PartitionCache   # import tardif : partitions -> geo -> snapshots
+
+        self.version = version
+        self.folder = Path(folder)
+        self.source_tag = source_tag
+        self.created_at = created_at
+        self.report = report or {}   # IngestReport.to_dict()
+        self.catalog = catalog or Catalog.read(self.folder)
+        self.partitions = PartitionCache(self.folder, self.catalog, max_bytes=int(PARTITION_CACHE_MB * 2 ** 20))
+        self.indexes = SnapshotIndexes(self, indexes)
+        self._df = df
+        self._df_lock = threading.Lock()
+        self._city_pools = city_pools
+
+    @property
+    def df(self) -> pd.DataFrame:
+        """Dataset complet (tous les pays)."""
+        if self._df is None:
+            with self._df_lock:
+                if self._df is None:
+                    self._df = pd.read_parquet(self.folder / "restaurants.parquet")
+        return self._df
+
+    @property
+    def city_pools(self):
+        """Candidats pré-classés par ville (``culinary.trips.CityPools``), sans charger le DataFrame."""
+        if self._city_pools is None:
+            from culinary.trips import POOL_FILE, CityPools
+            with self._df_lock:
+                if self._city_pools is None:
+                    self._city_pools = CityPools.load(self.folder / POOL_FILE)
+        return self._city_pools
+
+    def countries_df(self, countries) -> pd.DataFrame:
+        """Lignes des pays choisis ; tout le dataset si la sélection est vide."""
+        countries = [c for c in countries if c in self.catalog.partitions]
+        return self.partitions.load(countries) if countries else self.df
+
+
+# ==============================
+# 🔹 VERSION DE LA SOURCE
+# ==============================
+def _is_local(url: str) -> bool:
+    return "://" not in url or url.startswith("file://")
+
+
+def _stat_tag(stat: os.stat_result) -> str:
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def _headers_tag(headers) -> str:
+    # HuggingFace expose l'ETag du fichier LFS dans X-Linked-Etag
+    tag = headers.get("X-Linked-Etag") or headers.get("ETag")
+    if not tag:
+        tag = f"{headers.get('Last-Modified')}-{headers.get('Content-Length')}"
+    return tag.strip('"')
+
+
+def probe_source_tag(url: str) -> str:
+    """ETag (ou équivalent) de la source, sans télécharger le fichier."""
+    if _is_local(url):
+        return _stat_tag(Path(url.replace("file://", "", 1)).stat())
+
+    req = urllib.request.Request(url, method="HEAD")
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        return _headers_tag(resp.headers)
+
+
+def fetch_source(url: str, dest: Path) -> str:
+    """Copie la source dans ``dest`` et renvoie le tag du contenu effectivement lu.
+
+    Le tag vient de la réponse du téléchargement (ou du fichier ouvert), pas
+    d'une sonde antérieure : un snapshot ne porte jamais le tag d'une autre version.
+    """
+    if _is_local(url):
+        with open(url.replace("file://", "", 1), "rb") as src, open(dest, "wb") as f:
+            tag = _stat_tag(os.fstat(src.fileno()))
+            shutil.copyfileobj(src, f)
+        return tag
+    with urllib.request.urlopen(url, timeout=60) as resp, open(dest, "wb") as f:
+        shutil.copyfileobj(resp, f)
+        return _headers_tag(resp.headers)
+
+
+class SnapshotStore:
+    def __init__(self, root: Path = DEFAULT_ROOT, source_url: str = DATASET_URL, keep: int = 2):
+        self.root = Path(root)
+        self.source_url = source_url
+        self.keep = keep
+        self._current: Optional[Snapshot] = None
+        # Snapshots encore tenus par une exécution de page : leur dossier est gardé
+        self._open: "weakref.WeakValueDictionary[str, Snapshot]" = weakref.WeakValueDictionary()
+        self._swap_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    # ------------------------------
+    # Lecture
+    # ------------------------------
+    def current(self) -> Snapshot:
+        """Snapshot actif. Ne bloque sur un téléchargement que si aucun n'existe encore."""
+        snapshot = self._current
+        if snapshot is not None:
+            return snapshot
+
+        with self._refresh_lock:
+            if self._current is None:
+                version = self._read_pointer()
+                if version is not None:
+                    self._swap(self._load(version))
+                else:
+                    self._refresh_locked(force=True)
+        return self._current
+
+    def _read_pointer(self) -> Optional[str]:
+        pointer = self.root / "CURRENT"
+        if not pointer.exists():
+            return None
+        version = pointer.read_text().strip()
+        meta = self.root / version / "meta.json"
+        if not (self.root / version / "restaurants.parquet").exists() or not meta.exists():
+            return None
+        return version if json.loads(meta.read_text()).get("schema") == SCHEMA_VERSION else None
+
+    def _load(self, version: str) -> Snapshot:
+        folder = self.root / version
+        meta = json.loads((folder / "meta.json").read_text())
+        return Snapshot(
+            version=version,
+            folder=folder,
+            source_tag=meta["source_tag"],
+            created_at=meta["created_at"],
+            report=meta.get("ingest", {}),
+        )
+
+    # ------------------------------
+    # Rafraîchissement
+    # ------------------------------
+    def refresh(self, force: bool = False) -> bool:
+        """Reconstruit un snapshot si la source a changé. Renvoie True si une nouvelle version est active."""
+        with self._refresh_lock:
+            return self._refresh_locked(force)
+
+    def _refresh_locked(self, force: bool) -> bool:
+        from culinary.ingest import ingest   # import tardif : ingest -> search -> snapshots
+        from culinary.partitions import Catalog, write_partitions
+        from culinary.trips import POOL_FILE, build_city_pools
+
+        probed = probe_source_tag(self.source_url)
+        current = self._current
+        if current is None:
+            version = self._read_pointer()
+            if version is not None:
+                current = self._load(version)
+                self._swap(current)
+        if not force and current is not None and current.source_tag == probed:
+            return False
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        created_at = time.time()
+
+        # Construction dans un dossier temporaire puis renommage atomique
+        tmp_dir = Path(tempfile.mkdtemp(prefix=".build-", dir=self.root))
+        try:
+            raw_csv = tmp_dir / "source.csv"
+            tag = fetch_source(self.source_url, raw_csv)
+            version = f"{int(created_at * 1e6)}-{hashlib.sha1(tag.encode()).hexdigest()[:10]}"
+            df, report = ingest(read_raw(raw_csv))
+            raw_csv.unlink()
+            df.to_parquet(tmp_dir / "restaurants.parquet", index=False)
+            catalog = Catalog(write_partitions(df, tmp_dir))
+            city_pools = build_city_pools(df)
+            city_pools.save(tmp_dir / POOL_FILE)
+            meta = {
+                "schema": SCHEMA_VERSION,
+                "version": version,
+                "source_url": self.source_url,
+                "source_tag": tag,
+                "created_at": created_at,
+                "rows": len(df),
+                "ingest": report.to_dict(),
+            }
+            (tmp_dir / "meta.json").write_text(json.dumps(meta, indent=2))
+            indexes = build_indexes(df)
+            os.replace(tmp_dir, self.root / version)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        self._write_pointer(version)
+        self._swap(Snapshot(
+            version, self.root / version, tag, created_at, report.to_dict(),
+            df=df, indexes=indexes, catalog=catalog, city_pools=city_pools,
+        ))
+        self._prune()
+        logger.info("Snapshot %s actif — %s", version, report.summary())
+        return True
+
+    def _write_pointer(self, version: str):
+        tmp = self.root / "CURRENT.tmp"
+        tmp.write_text(version)
+        os.replace(tmp, self.root / "CURRENT")
+
+    def _swap(self, snapshot: Snapshot):
+        with self._swap_lock:
+            self._open[snapshot.version] = snapshot
+            self._current = snapshot
+
+    def _prune(self):
+        """Supprime les vieux snapshots sur disque, au-delà des ``keep`` plus récents.
+
+        Un ``Snapshot`` lit son DataFrame, ses partitions et ses index à la
+        demande depuis son dossier : une version encore tenue par une exécution
+        de page n'est pas supprimée (elle le sera à un prochain rafraîchissement).
+        """
+        versions = sorted(
+            p for p in self.root.iterdir()
+            if p.is_dir() and not p.name.startswith(".")
+        )
+        with self._swap_lock:
+            pinned = set(self._open.keys())
+            if self._current is not None:
+                pinned.add(self._current.version)
+        for old in versions[:-self.keep]:
+            if old.name not in pinned:
+                shutil.rmtree(old, ignore_errors=True)
+
+
+class BackgroundRefresher:
+    """Thread démon qui appelle ``store.refresh()`` toutes les ``interval`` secondes.
+
+    ``on_refresh(snapshot)`` est appelé dans ce même thread après chaque
+    nouvelle version (préchauffage des partitions, par exemple).
+    """
+
+    def __init__(self, store: SnapshotStore, interval: float = 3600,
+                 on_refresh: Optional[Callable[[Snapshot], object]] = None):
+        self.store = store
+        self.interval = interval
+        self.on_refresh = on_refresh
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="culinary-refresh", daemon=True
+        )
+
+    def start(self) -> "BackgroundRefresher":
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if self.store.refresh() and self.on_refresh is not None:
+                    self.on_refresh(self.store.current())
+            except Exception:
+                # On garde le snapshot courant, nouvel essai au prochain tour
+                logger.exception("Échec du rafraîchissement des données")
@@ -0,0 +1,146 @@
+"""Index spatial en grille pour ne servir que les points visibles à l'écran.
+
+Les points sont triés par numéro de cellule (grille régulière en degrés) : une
+requête sur un rectangle se ramène à une recherche dichotomique par ligne de
+cellules, sans parcourir tout le dataset. Quand le rectangle contient trop de
+points, on ne garde que le plus populaire par case d'une grille plus ou moins
+fine selon le zoom (niveau de détail).
+
+L'index est partagé entre les sessions (``st.cache_resource``) : les niveaux
+de détail, calculés à la demande, sont protégés par un verrou.
+"""
+import threading
+
+import numpy as np
+
+# Une tuile Leaflet fait 256 px ; on garde au plus un point par case de 32 px
+_TILE_PX = 256
+_LOD_PX = 32
+
+
+def popularity(avg_rating, total_reviews_count) -> np.ndarray:
+    """Score de priorité d'affichage : note × log(1 + nombre d'avis)."""
+    rating = np.nan_to_num(np.asarray(avg_rating, dtype=np.float32))
+    reviews = np.nan_to_num(np.asarray(total_reviews_count, dtype=np.float32))
+    return rating * np.log1p(reviews)
+
+
+def bounds_around(center, zoom, width_px=1000, height_px=650):
+    """Rectangle (sud, ouest, nord, est) approximatif d'une carte Leaflet centrée sur ``center``."""
+    lat, lon = center
+    deg_per_px = 360.0 / (_TILE_PX * 2 ** zoom)
+    half_w = deg_per_px * width_px / 2
+    half_h = deg_per_px * height_px / 2 * np.cos(np.radians(lat))
+    return (
+        max(lat - half_h, -90.0), max(lon - half_w, -180.0),
+        min(lat + half_h, 90.0), min(lon + half_w, 180.0),
+    )
+
+
+def zoom_for_bounds(bounds, width_px=1000, height_px=650, max_zoom=12) -> int:
+    """Plus grand zoom entier où ``bounds`` (sud, ouest, nord, est) tient dans la carte (inverse de ``bounds_around``)."""
+    south, west, north, east = bounds
+    lat = (south + north) / 2
+    span_lon = max(east - west, 1e-3)
+    span_lat = max(north - south, 1e-3)
+    zoom_w = np.log2(360.0 * width_px / (_TILE_PX * span_lon))
+    zoom_h = np.log2(360.0 * height_px * np.cos(np.radians(lat)) / (_TILE_PX * span_lat))
+    return int(np.clip(np.floor(min(zoom_w, zoom_h)), 0, max_zoom))
+
+
+class GridIndex:
+    def __init__(self, lat, lon, priority=None, cell_deg: float = 0.1):
+        self.lat = np.asarray(lat, dtype=np.float32)
+        self.lon = np.asarray(lon, dtype=np.float32)
+        if priority is None:
+            priority = np.zeros(len(self.lat), dtype=np.float32)
+        self.priority = np.asarray(priority, dtype=np.float32)
+        self.cell_deg = cell_deg
+        self.n_rows = int(np.ceil(180 / cell_deg)) + 1
+        self.n_cols = int(np.ceil(360 / cell_deg)) + 1
+
+        cells = self._row(self.lat) * self.n_cols + self._col(self.lon)
+        self.order = np.argsort(cells, kind="stable")
+        self.cells = cells[self.order]
+
+        self._by_priority = None
+        self._levels = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.lat)
+
+    def _row(self, lat):
+        return np.clip(((np.asarray(lat) + 90) / self.cell_deg).astype(np.int64), 0, self.n_rows - 1)
+
+    def _col(self, lon):
+        return np.clip(((np.asarray(lon) + 180) / self.cell_deg).astype(np.int64), 0, self.n_cols - 1)
+
+    def query_bbox(self, south, west, north, east) -> np.ndarray:
+        """Positions (dans les tableaux d'origine) des points du rectangle."""
+        rows = np.arange(self._row(south), self._row(north) + 1)
+        c0, c1 = self._col(west), self._col(east)
+
+        starts = np.searchsorted(self.cells, rows * self.n_cols + c0, side="left")
+        ends = np.searchsorted(self.cells, rows * self.n_cols + c1, side="right")
+        lengths = ends - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64)
+
+        # Concaténation vectorisée des tranches [start, end) de chaque ligne
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        idx = self.order[offsets + np.arange(total)]
+
+        # Les cellules du bord débordent du rectangle : filtre exact
+        lat, lon = self.lat[idx], self.lon[idx]
+        inside = (lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)
+        return idx[inside]
+
+    def _level(self, zoom: int):
+        """Sous-ensemble « niveau de détail » d'un zoom : le point le plus populaire par case de ~32 px.
+
+        Calculé une fois par zoom puis gardé : (positions, GridIndex des représentants).
+        """
+        level = self._levels.get(zoom)
+        if level is not None:
+            return level
+        with self._lock:
+            level = self._levels.get(zoom)
+            if level is None:
+                if self._by_priority is None:
+                    self._by_priority = np.argsort(-self.priority, kind="stable")
+                by_prio = self._by_priority
+                lod_deg = 360.0 / (2 ** zoom) / (_TILE_PX / _LOD_PX)
+                # Ligne et colonne sur 32 bits chacune (2^25 cases au zoom 22) : pas de collision
+                buckets = (
+                    (np.floor((self.lat[by_prio] + 90) / lod_deg).astype(np.int64) << 32)
+                    | np.floor((self.lon[by_prio] + 180) / lod_deg).astype(np.int64)
+                )
+                _, first = np.unique(buckets, return_index=True)
+                keep = by_prio[first]
+                level = self._levels[zoom] = (
+                    keep,
+                    GridIndex(self.lat[keep], self.lon[keep], self.priority[keep],
+                              cell_deg=max(self.cell_deg, lod_deg)),
+                )
+        return level
+
+    def query_viewport(self, bounds, zoom: int, max_points: int = 1000):
+        """Points à afficher pour une vue : (positions triées par priorité, nb de points dans la vue)."""
+        south, west, north, east = bounds
+        idx = self.query_bbox(south, west, north, east)
+        n_in_view = len(idx)
+
+        if n_in_view > max_points:
+            # Niveau le plus fin (jusqu'à 3 zooms plus loin) qui tient dans max_points
+            zoom = int(np.clip(zoom, 0, 22))
+            for z in range(zoom, min(zoom + 3, 22) + 1):
+                keep, level = self._level(z)
+                candidates = keep[level.query_bbox(south, west, north, east)]
+                if z > zoom and len(candidates) > max_points:
+                    break
+                idx = candidates
+
+        idx = idx[np.argsort(-self.priority[idx], kind="stable")][:max_points]
+        return idx, n_in_view
@@ -0,0 +1,237 @@
+"""Export hors ligne des restaurants en tuiles vectorielles (Mapbox Vector Tiles).
+
+La pyramide est écrite dans un dossier ``<out>/{z}/{x}/{y}.pbf`` (+ ``metadata.json``)
+et servie telle quelle par un serveur statique : le navigateur ne télécharge
+que les tuiles visibles, de taille bornée, et les garde en cache.
+
+À chaque zoom on garde au plus un restaurant (le plus populaire) par case de
+quelques pixels, donc les tuiles à petite échelle restent légères.
+
+Usage ::
+
+    python -m culinary.tiles build --out tiles --max-zoom 12
+    python -m culinary.tiles serve --dir tiles --port 8001
+"""
+import argparse
+import json
+import math
+import struct
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from culinary.spatial import popularity
+
+EXTENT = 4096
+LAYER_NAME = "restaurants"
+TILE_PROPERTIES = ["restaurant_name", "city", "country", "avg_rating", "total_reviews_count"]
+
+
+# ==============================
+# 🔹 ENCODAGE PROTOBUF (sous-ensemble MVT pour des points)
+# ==============================
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 63)
+
+
+def _field(number: int, wire_type: int) -> bytes:
+    return _varint((number << 3) | wire_type)
+
+
+def _bytes_field(number: int, payload: bytes) -> bytes:
+    return _field(number, 2) + _varint(len(payload)) + payload
+
+
+def _packed(number: int, values) -> bytes:
+    return _bytes_field(number, b"".join(_varint(v) for v in values))
+
+
+def _value(v) -> bytes:
+    if isinstance(v, str):
+        return _bytes_field(1, v.encode("utf-8"))
+    if isinstance(v, float):
+        return _field(3, 1) + struct.pack("<d", v)   # double_value
+    return _field(6, 0) + _varint(_zigzag(int(v)))   # sint_value
+
+
+def encode_tile(px, py, properties: dict) -> bytes:
+    """Une tuile MVT d'une couche de points ; ``px``/``py`` en coordonnées tuile (0..EXTENT)."""
+    keys = list(properties)
+    values, value_ids, features = [], {}, []
+
+    for i in range(len(px)):
+        tags = []
+        for k_id, key in enumerate(keys):
+            v = properties[key][i]
+            if v is None or (isinstance(v, float) and math.isnan(v)):
+                continue
+            v_id = value_ids.get((type(v), v))
+            if v_id is None:
+                v_id = value_ids[(type(v), v)] = len(values)
+                values.append(v)
+            tags += [k_id, v_id]
+        geometry = [9, _zigzag(int(px[i])), _zigzag(int(py[i]))]  # MoveTo(1)
+        features.append(
+            _packed(2, tags)
+            + _field(3, 0) + _varint(1)                            # type = POINT
+            + _packed(4, geometry)
+        )
+
+    layer = (
+        _field(15, 0) + _varint(2)                                 # version
+        + _bytes_field(1, LAYER_NAME.encode())
+        + b"".join(_bytes_field(2, f) for f in features)
+        + b"".join(_bytes_field(3, k.encode()) for k in keys)
+        + b"".join(_bytes_field(4, _value(v)) for v in values)
+        + _field(5, 0) + _varint(EXTENT)
+    )
+    return _bytes_field(3, layer)
+
+
+# ==============================
+# 🔹 PYRAMIDE DE TUILES
+# ==============================
+def mercator(lat, lon):
+    """Coordonnées Web Mercator normalisées (0..1) ; y croît vers le sud."""
+    lat = np.clip(np.asarray(lat, dtype=np.float64), -85.0511, 85.0511)
+    x = (np.asarray(lon, dtype=np.float64) + 180.0) / 360.0
+    rad = np.radians(lat)
+    y = (1.0 - np.log(np.tan(rad) + 1.0 / np.cos(rad)) / math.pi) / 2.0
+    return x, y
+
+
+def build_tiles(df: pd.DataFrame, out_dir, min_zoom: int = 0, max_zoom: int = 12,
+                cell_px: int = 8, max_per_tile: int = 4000) -> dict:
+    """Écrit la pyramide dans ``out_dir`` et renvoie les métadonnées (format TileJSON)."""
+    out_dir = Path(out_dir)
+    df = df.dropna(subset=["latitude", "longitude"]).reset_index(drop=True)
+
+    x, y = mercator(df["latitude"], df["longitude"])
+    by_priority = np.argsort(-popularity(df["avg_rating"], df["total_reviews_count"]), kind="stable")
+    df["total_reviews_count"] = df["total_reviews_count"].fillna(0).astype(int)
+    props = {
+        col: df[col].astype(object).where(df[col].notna(), None).to_numpy()
+        for col in TILE_PROPERTIES if col in df
+    }
+
+    n_tiles = 0
+    for z in range(min_zoom, max_zoom + 1):
+        scale = 2 ** z
+        gx, gy = x[by_priority] * scale, y[by_priority] * scale
+
+        keep = np.arange(len(by_priority))
+        if z < max_zoom:
+            # Un point par case de cell_px pixels (tuile de 256 px), le plus populaire d'abord
+            cells_per_tile = 256 // cell_px
+            cell = (np.floor(gx * cells_per_tile).astype(np.int64) << 32) + np.floor(gy * cells_per_tile).astype(np.int64)
+            _, first = np.unique(cell, return_index=True)
+            keep = np.sort(first)
+
+        rows = by_priority[keep]
+        tx = np.minimum(np.floor(gx[keep]), scale - 1).astype(np.int64)
+        ty = np.minimum(np.floor(gy[keep]), scale - 1).astype(np.int64)
+        tile_key = tx * scale + ty
+        order = np.argsort(tile_key, kind="stable")   # garde l'ordre de priorité dans chaque tuile
+        tile_key, rows = tile_key[order], rows[order]
+        if len(rows) == 0:
+            continue
+        splits = np.flatnonzero(np.diff(tile_key)) + 1
+
+        for start, chunk_rows in zip(np.r_[0, splits], np.split(rows, splits)):
+            chunk_rows = chunk_rows[:max_per_tile]
+            tx_, ty_ = divmod(int(tile_key[start]), scale)
+            px = np.round((x[chunk_rows] * scale - tx_) * EXTENT)
+            py = np.round((y[chunk_rows] * scale - ty_) * EXTENT)
+            tile = encode_tile(px, py, {k: v[chunk_rows] for k, v in props.items()})
+
+            path = out_dir / str(z) / str(tx_) / f"{ty_}.pbf"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(tile)
+            n_tiles += 1
+
+    metadata = {
+        "tilejson": "3.0.0",
+        "name": LAYER_NAME,
+        "format": "pbf",
+        "tiles": ["{z}/{x}/{y}.pbf"],
+        "minzoom": min_zoom,
+        "maxzoom": max_zoom,
+        "bounds": [
+            float(df["longitude"].min()), float(df["latitude"].min()),
+            float(df["longitude"].max()), float(df["latitude"].max()),
+        ],
+        "vector_layers": [{"id": LAYER_NAME, "fields": {c: "" for c in props}}],
+        "tile_count": n_tiles,
+        "feature_count": len(df),
+    }
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / "metadata.json").write_text(json.dumps(metadata, indent=2))
+    return metadata
+
+
+# ==============================
+# 🔹 SERVEUR STATIQUE LOCAL
+# ==============================
+class TileRequestHandler(SimpleHTTPRequestHandler):
+    """Fichiers statiques + CORS (la carte est servie depuis une autre origine que Streamlit)."""
+
+    extensions_map = {**SimpleHTTPRequestHandler.extensions_map, ".pbf": "application/x-protobuf"}
+
+    def end_headers(self):
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Cache-Control", "public, max-age=86400")
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(directory, host: str = "127.0.0.1", port: int = 8001):
+    handler = partial(TileRequestHandler, directory=str(directory))
+    with ThreadingHTTPServer((host, port), handler) as httpd:
+        print(f"Tuiles servies sur http://{host}:{port}/{{z}}/{{x}}/{{y}}.pbf")
+        httpd.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tuiles vectorielles des restaurants")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="construit la pyramide depuis le snapshot courant")
+    build.add_argument("--out", default="tiles")
+    build.add_argument("--min-zoom", type=int, default=0)
+    build.add_argument("--max-zoom", type=int, default=12)
+
+    srv = sub.add_parser("serve", help="sert un dossier de tuiles en local")
+    srv.add_argument("--dir", default="tiles")
+    srv.add_argument("--host", default="127.0.0.1")
+    srv.add_argument("--port", type=int, default=8001)
+
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        from culinary.snapshots import SnapshotStore
+
+        snapshot = SnapshotStore().current()
+        meta = build_tiles(snapshot.df, args.out, args.min_zoom, args.max_zoom)
+        print(f"✅ {meta['tile_count']} tuiles écrites dans {args.out} (snapshot {snapshot.version})")
+    else:
+        serve(args.dir, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""Moteur de génération des road trips (sélection des étapes ville par ville).
+
+Les candidats sont regroupés par ville en une seule passe (``groupby().indices``),
+puis chaque ville est traitée indépendamment : classement (note puis nombre
+d'avis, tri stable -> résultat déterministe) et score de l'itinéraire (distance
+cumulée entre les étapes).
+
+Les villes sont indépendantes : au-delà de ``PARALLEL_MIN_CITIES`` et si la
+machine a plusieurs cœurs, elles sont réparties sur un pool de processus. Chaque
+tâche ne reçoit que quelques tableaux NumPy (pas le DataFrame), et
+``Executor.map`` garde l'ordre des villes : le résultat est identique au
+chemin séquentiel.
+
+Chemin rapide : à la construction du snapshot, ``build_city_pools`` range pour
+chaque couple (pays, ville) ses ``POOL_SIZE`` meilleurs restaurants, déjà dans
+l'ordre du classement, en tableaux compacts (codes de pays, cuisine, prix).
+``plan_from_pools`` n'a plus qu'à filtrer ces petites listes triées, et à
+fusionner par rang global celles d'une ville présente dans plusieurs pays
+(Porto, Newport…) ; une ville dont un pool tronqué ne suffit pas après
+filtrage repasse par ``plan_trip``.
+"""
+import contextlib
+import multiprocessing
+import os
+import sys
+import threading
+import types
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from culinary.data import with_labels
+from culinary.geodesy import path_length_km
+
+# En dessous, le coût d'envoi aux processus dépasse le gain
+PARALLEL_MIN_CITIES = 8
+
+# Candidats pré-classés gardés par ville (un trip dure au plus 30 jours par ville)
+POOL_SIZE = 300
+POOL_FILE = "city_pools.npz"
+
+# Filtres que les pools savent appliquer (colonne codée -> nom du filtre)
+POOL_FILTERS = {"country": "country", "cuisine": "cuisine_main", "price": "price_level"}
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+@dataclass
+class CityPlan:
+    city: str
+    rows: list            # labels des étapes dans le DataFrame source, dans l'ordre des jours
+    n_available: int      # nombre de candidats dans la ville (au moins, si le pool est tronqué)
+    route_km: float       # distance cumulée entre les étapes de la ville
+    lat: np.ndarray = None   # coordonnées des étapes, dans l'ordre
+    lon: np.ndarray = None
+
+
+def plan_city(job) -> CityPlan:
+    """Étapes d'une ville : les ``n_days`` meilleures (note, puis avis), ordre initial en cas d'égalité."""
+    city, labels, rating, reviews, lat, lon, n_days = job
+    # lexsort : dernière clé = clé principale ; stable -> égalités dans l'ordre d'origine
+    order = np.lexsort((-np.nan_to_num(reviews, nan=-np.inf), -np.nan_to_num(rating, nan=-np.inf)))
+    chosen = order[:n_days]
+    return CityPlan(
+        city=city,
+        rows=labels[chosen].tolist(),
+        n_available=len(labels),
+        route_km=path_length_km(lat[chosen], lon[chosen]),
+        lat=lat[chosen],
+        lon=lon[chosen],
+    )
+
+
+def _shared_pool() -> ProcessPoolExecutor:
+    """Pool créé à la première utilisation puis réutilisé (spawn : sûr dans un serveur multi-thread)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+@contextlib.contextmanager
+def _neutral_main():
+    """``__main__`` vide le temps de démarrer des workers.
+
+    Un processus « spawn » réexécute le fichier de ``__main__`` : sous
+    Streamlit, c'est la page en cours, qui serait relancée dans chaque worker.
+    """
+    main = sys.modules.get("__main__")
+    sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = main
+
+
+def plan_trip(trip_df: pd.DataFrame, days_per_city: dict, parallel: Optional[bool] = None) -> List[CityPlan]:
+    """Un ``CityPlan`` par ville de ``days_per_city`` (dans cet ordre).
+
+    ``parallel`` : None = automatique (plusieurs cœurs et assez de villes),
+    True / False pour forcer un chemin.
+    """
+    groups = trip_df.groupby("city", observed=True, sort=False).indices
+    labels = trip_df.index.to_numpy()
+    rating = trip_df["avg_rating"].to_numpy(dtype=float)
+    reviews = trip_df["total_reviews_count"].to_numpy(dtype=float)
+    lat = trip_df["latitude"].to_numpy(dtype=float)
+    lon = trip_df["longitude"].to_numpy(dtype=float)
+
+    empty = np.empty(0, dtype=np.int64)
+    jobs = []
+    for city, n_days in days_per_city.items():
+        pos = groups.get(city, empty)
+        jobs.append((city, labels[pos], rating[pos], reviews[pos], lat[pos], lon[pos], int(n_days)))
+
+    if parallel is None:
+        parallel = (os.cpu_count() or 1) > 1 and len(jobs) >= PARALLEL_MIN_CITIES
+    if not parallel:
+        return [plan_city(job) for job in jobs]
+
+    pool = _shared_pool()
+    chunksize = max(1, len(jobs) // (4 * (os.cpu_count() or 1)))
+    # ``map`` soumet toutes les tâches (et démarre les workers manquants) avant de rendre la main
+    with _pool_lock, _neutral_main():
+        results = pool.map(plan_city, jobs, chunksize=chunksize)
+    return list(results)
+
+
+def trip_distance_km(plans: List[CityPlan]) -> float:
+    """Distance totale : trajets dans chaque ville + liaisons entre la dernière étape d'une ville et la première de la suivante."""
+    if not plans:
+        return 0.0
+    return path_length_km(np.concatenate([p.lat for p in plans]), np.concatenate([p.lon for p in plans]))
+
+
+# ==============================
+# 🔹 POOLS DE CANDIDATS PAR VILLE
+# ==============================
+@dataclass
+class CityPools:
+    countries: np.ndarray   # pays de chaque pool ; pools triés par (pays, ville)
+    cities: np.ndarray      # ville de chaque pool
+    offsets: np.ndarray     # int64 : candidats du pool i = [offsets[i], offsets[i + 1])
+    sizes: np.ndarray       # int64 : nombre total de restaurants de (pays, ville), pool compris
+    row_id: np.ndarray      # int64 : index dans le dataset complet
+    rank: np.ndarray        # int64 : rang dans le classement de tout le dataset (ordre de ``plan_city``)
+    rating: np.ndarray      # float32
+    reviews: np.ndarray     # float32
+    lat: np.ndarray         # float64
+    lon: np.ndarray         # float64
+    country: np.ndarray     # int16, codes dans ``vocab["country"]``
+    cuisine_main: np.ndarray  # int16, codes dans ``vocab["cuisine_main"]``
+    price_level: np.ndarray   # int16, codes dans ``vocab["price_level"]``
+    vocab: Dict[str, np.ndarray]
+
+    def __post_init__(self):
+        self._lookup: Dict[str, List[int]] = {}
+        for i, city in enumerate(self.cities.tolist()):
+            self._lookup.setdefault(city, []).append(i)
+
+    def __len__(self):
+        return len(self.row_id)
+
+    def save(self, path: Path):
+        arrays = {k: v for k, v in vars(self).items() if isinstance(v, np.ndarray)}
+        np.savez(path, **arrays, **{f"vocab_{k}": v for k, v in self.vocab.items()})
+
+    @classmethod
+    def load(cls, path: Path) -> "CityPools":
+        with np.load(path, allow_pickle=False) as data:
+            vocab = {k[len("vocab_"):]: data[k] for k in data.files if k.startswith("vocab_")}
+            return cls(**{k: data[k] for k in data.files if not k.startswith("vocab_")}, vocab=vocab)
+
+    def _codes(self, column: str, values) -> np.ndarray:
+        vocab = self.vocab[column]
+        pos = np.searchsorted(vocab, values)
+        pos = np.clip(pos, 0, len(vocab) - 1)
+        return pos[vocab[pos] == np.asarray(values, dtype=vocab.dtype)]
+
+    def plan(self, city: str, n_days: int, filters: dict) -> Optional[CityPlan]:
+        """Étapes d'une ville lues dans ses pools (un par pays) ; None si un pool tronqué ne suffit pas."""
+        pools = self._lookup.get(city, [])
+        if filters.get("country"):
+            allowed = set(filters["country"])
+            pools = [i for i in pools if self.countries[i] in allowed]
+        if not pools:
+            return CityPlan(city, [], 0, 0.0, np.empty(0), np.empty(0))
+
+        candidates, cutoffs = [], []
+        for i in pools:
+            start, end = self.offsets[i], self.offsets[i + 1]
+            mask = np.ones(end - start, dtype=bool)
+            if filters.get("min_rating") is not None:
+                mask &= self.rating[start:end] >= filters["min_rating"]
+            for name, column in POOL_FILTERS.items():
+                if filters.get(name):
+                    codes = self._codes(column, list(filters[name]))
+                    mask &= np.isin(getattr(self, column)[start:end], codes)
+            candidates.append(start + np.flatnonzero(mask))
+            if self.sizes[i] > end - start:
+                # Pool tronqué : les restaurants hors pool sont classés après son dernier candidat
+                cutoffs.append(self.rank[end - 1])
+
+        chosen = np.concatenate(candidates)
+        if len(pools) > 1:
+            chosen = chosen[np.argsort(self.rank[chosen], kind="stable")]
+        if cutoffs and (len(chosen) < n_days or self.rank[chosen[n_days - 1]] > min(cutoffs)):
+            return None   # des candidats au-delà d'un pool pourraient passer les filtres
+        n_available = len(chosen)
+        chosen = chosen[:n_days]
+        return CityPlan(
+            city=city,
+            rows=self.row_id[chosen].tolist(),
+            n_available=n_available,
+            route_km=path_length_km(self.lat[chosen], self.lon[chosen]),
+            lat=self.lat[chosen],
+            lon=self.lon[chosen],
+        )
+
+
+def build_city_pools(df: pd.DataFrame, size: int = POOL_SIZE) -> CityPools:
+    """Les ``size`` meilleurs restaurants de chaque (pays, ville), dans l'ordre de ``plan_city``."""
+    # Codes sur les libellés affichés par les pages (« Inconnue »…)
+    labels = with_labels(df, ["city"] + list(POOL_FILTERS.values())).astype(str)
+    codes, vocab = {}, {}
+    for column in ["city"] + list(POOL_FILTERS.values()):
+        cat = pd.Categorical(labels[column])
+        codes[column] = cat.codes.astype(np.int16 if column != "city" else np.int64)
+        vocab[column] = np.asarray(cat.categories, dtype=str)
+
+    rating = df["avg_rating"].to_numpy(dtype=float)
+    reviews = df["total_reviews_count"].to_numpy(dtype=float)
+    # Note, puis avis (décroissants) ; lexsort stable -> ordre du dataset en cas d'égalité
+    by_rank = np.lexsort((-np.nan_to_num(reviews, nan=-np.inf), -np.nan_to_num(rating, nan=-np.inf)))
+    rank = np.empty(len(df), dtype=np.int64)
+    rank[by_rank] = np.arange(len(df))
+
+    # Un pool par (pays, ville), puis le classement à l'intérieur de chaque pool
+    n_cities = len(vocab["city"])
+    key = codes["country"].astype(np.int64) * n_cities + codes["city"]
+    pool_keys, pool = np.unique(key, return_inverse=True)
+    order = np.lexsort((rank, pool))
+    pool = pool[order]
+    sizes = np.bincount(pool, minlength=len(pool_keys))
+    starts = np.r_[0, np.cumsum(sizes)[:-1]]
+    keep = order[np.arange(len(order)) - starts[pool] < size]
+    kept = np.minimum(sizes, size)
+
+    return CityPools(
+        countries=vocab["country"][pool_keys // n_cities],
+        cities=vocab.pop("city")[pool_keys % n_cities],
+        offsets=np.r_[0, np.cumsum(kept)].astype(np.int64),
+        sizes=sizes.astype(np.int64),
+        row_id=df.index.to_numpy()[keep].astype(np.int64),
+        rank=rank[keep],
+        rating=df["avg_rating"].to_numpy()[keep].astype(np.float32),
+        reviews=reviews[keep].astype(np.float32),
+        lat=df["latitude"].to_numpy(dtype=float)[keep],
+        lon=df["longitude"].to_numpy(dtype=float)[keep],
+        **{column: codes[column][keep] for column in POOL_FILTERS.values()},
+        vocab=vocab,
+    )
+
+
+def plan_from_pools(pools: CityPools, days_per_city: dict, filters: dict) -> List[Optional[CityPlan]]:
+    """Un ``CityPlan`` par ville (None : à recalculer sur le DataFrame)."""
+    return [pools.plan(city, int(n_days), filters) for city, n_days in days_per_city.items()]
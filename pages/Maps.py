@@ -1,6 +1,19 @@
+import os
+
 import streamlit as st
-import pandas as pd
 import plotly.express as px
+import pydeck as pdk
+import folium
+from streamlit_folium import st_folium
+
+from culinary.data import with_labels
+from culinary.figures import state_key
+from culinary.progressive import PREVIEW_ROWS, cached_job, preview_positions, show_progressively, submit
+from culinary.queries import filter_rows
+from culinary.render import VIEWPORT_TOOLTIPS
+from culinary.querystate import FLOAT, LIST, only_known, slider_value
+from culinary.resources import current_snapshot, publish_filters, result_cache, url_filters
+from culinary.spatial import GridIndex, bounds_around, popularity
 
 # ==============================
 # 🔹 CONFIG
@@ -10,156 +23,164 @@ st.set_page_config(
     layout="wide"
 )
 
-@st.cache_data(ttl=3600)
-def load_data():
+@st.cache_data(max_entries=4)
+def load_data(version, countries, _snapshot):
+    """Restaurants des pays choisis (tous si aucun) : seules leurs partitions sont lues."""
     # Colonnes à charger
     usecols = [
         "restaurant_name", "country", "region", "city",
         "latitude", "longitude", "avg_rating", "total_reviews_count",
         "price_level", "cuisines"
     ]
-    url = (
-        "https://huggingface.co/datasets/Amoham16/resto-europe/"
-        "resolve/main/tripadvisor_clean.csv"
-    )
-    df = pd.read_csv(url, usecols=usecols)
-
-    # Nettoyage et typage
-    df = df.dropna(subset=["latitude", "longitude", "avg_rating"])
-    df["price_level"] = df["price_level"].fillna("Inconnu")
-    df["region"] = df["region"].fillna("Inconnue")
-    df["country"] = df["country"].fillna("Inconnu")
-    df["cuisines"] = df["cuisines"].fillna("Inconnue")
-
-    # Colonnes catégorielles pour accélérer les filtres
-    for col in ["country", "region", "city", "price_level"]:
-        df[col] = df[col].astype("category")
-
-    # Colonne simplifiée de cuisine
-    df["cuisines_clean"] = df["cuisines"].apply(lambda x: x.split(",")[0].strip())
-
-    # Valeurs uniques pré-calculées pour les filtres
-    country_list = sorted(df["country"].unique().tolist())
-    cuisine_list = sorted(df["cuisines_clean"].unique().tolist())
-    price_list = sorted(df["price_level"].unique().tolist())
-
-    return df, country_list, cuisine_list, price_list
+    # Données déjà nettoyées à l'ingestion (catégories, cuisine principale)
+    df = with_labels(_snapshot.countries_df(countries), usecols + ["cuisine_main"])
+    return df.rename(columns={"cuisine_main": "cuisines_clean"})
 
 
 # ==============================
-# 🔹 CHARGEMENT AVEC SPINNER
+# 🔹 CATALOGUE (valeurs des filtres sans charger les données)
 # ==============================
-with st.spinner("Chargement des données... 🍽️"):
-    df, country_list, cuisine_list, price_list = load_data()
-
-st.success("Données prêtes à être explorées !")
+snapshot = current_snapshot()
+catalog = snapshot.catalog
+country_list = catalog.countries
+cuisine_list = catalog.options("cuisine_main")
+price_list = catalog.options("price_level")
 
 # ==============================
 # 🎛️ BARRE LATÉRALE DE FILTRES
 # ==============================
 st.sidebar.header("Filtres")
 
-
+# Filtres partageables : ?country=France&min_rating=4.5…
+MAP_FILTERS = {"country": LIST, "region": LIST, "cuisine": LIST, "price": LIST, "min_rating": FLOAT}
+url = url_filters("maps", MAP_FILTERS)
 
 selected_countries = st.sidebar.multiselect(
     "Pays",
     country_list,
-    default=["France"]  
+    # Dans un lien, une liste absente veut dire « aucune sélection » (pas la valeur par défaut)
+    default=only_known(url.get("country", [] if url else ["France"]), country_list),
 )
 
 # --- Filtre Région dépendant ---
-if selected_countries:
-    possible_regions = sorted(
-        df[df["country"].isin(selected_countries)]["region"].unique().tolist()
-    )
-else:
-    possible_regions = sorted(df["region"].unique().tolist())
+possible_regions = catalog.options("region", selected_countries)
 
 
 selected_regions = st.sidebar.multiselect(
     "Région",
     options=possible_regions,
-    default=[]
+    default=only_known(url.get("region", []), possible_regions),
 )
 
 # --- Cuisine ---
 selected_cuisines = st.sidebar.multiselect(
     "Cuisine",
     cuisine_list,
-    default=[]  # pas de cuisine imposée au départ
+    default=only_known(url.get("cuisine", []), cuisine_list),  # pas de cuisine imposée au départ
 )
 
 # --- Prix (tous sélectionnés par défaut) ---
 selected_prices = st.sidebar.multiselect(
     "Prix",
     price_list,
-    default=price_list
+    default=only_known(url.get("price", [] if url else price_list), price_list),
 )
 
 # --- Note ---
 min_rating = st.sidebar.slider(
     "Note minimale",
-    0.0, 5.0, 4.0, 0.5
+    0.0, 5.0, slider_value(url.get("min_rating"), 0.0, 5.0, 0.5, default=4.0), 0.5
 )
 
 # --- Bouton ---
 apply_filters = st.sidebar.button("Appliquer les filtres")
 
+# --- Mode de carte ---
+map_mode = st.sidebar.radio(
+    "Mode de carte",
+    ["Carte complète", "Chargement par zone", "Tuiles vectorielles"],
+    help="« Chargement par zone » n'envoie que les restaurants visibles, "
+         "avec moins de détails quand on dézoome. « Tuiles vectorielles » lit "
+         "les tuiles générées par `python -m culinary.tiles build`.",
+)
+
 # ==============================
 # MÉMORISATION DES FILTRES & PREMIER CHARGEMENT
 # ==============================
-if "filtered_df" not in st.session_state:
-    st.session_state.filtered_df = pd.DataFrame(columns=df.columns)
+if "filtered_rows" not in st.session_state:
+    st.session_state.filtered_rows = None
+    st.session_state.filtered_version = None
+    st.session_state.filtered_countries = ()
 
 if "first_run" not in st.session_state:
     st.session_state.first_run = True
 
+if "filters_key" not in st.session_state:
+    st.session_state.filters_key = None
+
+if "map_view" not in st.session_state:
+    st.session_state.map_view = None
+
+# Pays affiché quand rien n'est sélectionné
+DEFAULT_VIEW_COUNTRY = "France"
+
 
-def compute_filtered_df():
-    filtered = df.copy()
+def compute_filtered_rows():
+    filters = {
+        "country": selected_countries, "region": selected_regions,
+        "cuisine": selected_cuisines, "price": selected_prices, "min_rating": min_rating,
+    }
+    return filter_rows(df, filters, cuisine_col="cuisines_clean")
 
-    if selected_countries:
-        filtered = filtered[filtered["country"].isin(selected_countries)]
-    if selected_regions:
-        filtered = filtered[filtered["region"].isin(selected_regions)]
-    if selected_cuisines:
-        filtered = filtered[filtered["cuisines_clean"].isin(selected_cuisines)]
-    if selected_prices:
-        filtered = filtered[filtered["price_level"].isin(selected_prices)]
 
-    filtered = filtered[filtered["avg_rating"] >= min_rating]
-    return filtered
+def compute_map_view():
+    """(centre, zoom Leaflet) de la sélection, lus dans le catalogue des partitions."""
+    return catalog.view(selected_countries or [DEFAULT_VIEW_COUNTRY], selected_regions)
 
 
 # 👉 On met à jour :
 # - si l'utilisateur clique sur le bouton
 # - OU au tout premier chargement de la page
-if apply_filters or st.session_state.first_run:
-    st.session_state.filtered_df = compute_filtered_df()
+# Les row_id ne valent que pour un snapshot : on refiltre après un rafraîchissement
+stale = st.session_state.filtered_version != snapshot.version
+refilter = apply_filters or st.session_state.first_run or stale
+if refilter:
+    st.session_state.filtered_countries = tuple(sorted(selected_countries))
+
+# Partitions des pays du dernier filtre appliqué (tout le dataset si aucun pays)
+with st.spinner("Chargement des données... 🍽️"):
+    df = load_data(snapshot.version, st.session_state.filtered_countries, snapshot)
+st.success("Données prêtes à être explorées !")
+
+if refilter:
+    query = publish_filters(
+        {
+            "country": selected_countries, "region": selected_regions,
+            "cuisine": selected_cuisines, "price": selected_prices,
+            "min_rating": min_rating,
+        },
+        MAP_FILTERS,
+    )
+    # Même requête (même lien) -> même résultat pour toutes les sessions : on ne
+    # garde que les row_id, partagés via le cache de résultats du processus
+    cache_key = f"maps/{snapshot.version}?{query}"
+    st.session_state.filtered_rows = result_cache().get_or_compute(
+        cache_key, compute_filtered_rows
+    )
+    st.session_state.filtered_version = snapshot.version
+    st.session_state.map_view = compute_map_view()
+    st.session_state.filters_key = state_key(cache_key)
     st.session_state.first_run = False
 
-# Récupération du dernier DataFrame filtré
-filtered_df = st.session_state.filtered_df
+# Lignes du dernier filtre appliqué
+filtered_df = df.loc[st.session_state.filtered_rows]
+map_center, map_zoom = st.session_state.map_view
 
 
 # ==============================
-# 🗺️ AFFICHAGE DE LA CARTE (persistante)
+# 🗺️ FIGURE MÉMORISÉE (construite en arrière-plan)
 # ==============================
-st.markdown("### Carte interactive des restaurants filtrés")
-st.markdown(f"**{len(filtered_df)} restaurants affichés** sur la carte")
-
-# Résumé des filtres
-st.markdown("#### Filtres appliqués :")
-st.write(
-    f"**Pays :** {', '.join(selected_countries) if selected_countries else 'Aucun'} | "
-    f"**Régions :** {', '.join(selected_regions[:3]) if selected_regions else 'Aucune'} | "
-    f"**Cuisines :** {', '.join(selected_cuisines[:3]) if selected_cuisines else 'Aucune'} | "
-    f"**Prix :** {', '.join(selected_prices) if selected_prices else 'Aucun'} | "
-    f"**Note ≥ {min_rating} ⭐**"
-)
-
-# Carte
-if not filtered_df.empty:
+def build_map_figure(filtered_df, center, zoom):
     fig = px.scatter_mapbox(
         filtered_df,
         lat="latitude",
@@ -172,10 +193,13 @@ if not filtered_df.empty:
             "region": True,
             "price_level": True,
             "avg_rating": True,
-            "cuisines": True,
+            # Cuisine principale : la liste complète alourdit chaque point de la figure
+            "cuisines_clean": True,
         },
+        labels={"cuisines_clean": "cuisine"},
         color_continuous_scale="YlOrRd",
-        zoom=4,
+        center={"lat": center[0], "lon": center[1]},
+        zoom=zoom - 1,   # Mapbox : tuiles de 512 px, un niveau de moins que Leaflet
         height=650,
     )
 
@@ -184,7 +208,160 @@ if not filtered_df.empty:
         margin={"r": 0, "t": 0, "l": 0, "b": 0},
     )
 
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
+
+
+# Clé = filtres appliqués : bouger un widget sans cliquer sur "Appliquer"
+# ne reconstruit pas la figure. Éviction LRU au-delà de 16 figures.
+@st.cache_resource(max_entries=16)
+def map_figure_job(filters_key, _filtered_df, _center, _zoom):
+    """Figure complète en cours de construction (``Future``), partagée entre réexécutions et sessions."""
+    return submit(build_map_figure, _filtered_df, _center, _zoom)
+
+
+def render_full_map(filtered_df, filters_key):
+    job = cached_job(map_figure_job, filters_key, filtered_df, map_center, map_zoom)
+
+    def render_preview():
+        # Échantillon régulier : même répartition que le résultat, construit dans le budget
+        sample = filtered_df.iloc[preview_positions(len(filtered_df))]
+        st.caption(
+            f"Aperçu : {len(sample)} restaurants sur {len(filtered_df)} "
+            "— la carte complète s'affiche dès qu'elle est prête."
+        )
+        st.plotly_chart(build_map_figure(sample, map_center, map_zoom), width="stretch", key="map_preview")
+
+    show_progressively(
+        st.empty(), job, render_preview if len(filtered_df) > PREVIEW_ROWS else None,
+        lambda fig: st.plotly_chart(fig, width="stretch"),
+    )
+
+
+# ==============================
+# 🧭 CHARGEMENT PAR ZONE (VIEWPORT)
+# ==============================
+MAX_VIEWPORT_POINTS = 800
+
+
+@st.cache_resource(max_entries=8)
+def build_grid_index(filters_key, _filtered_df):
+    return GridIndex(
+        _filtered_df["latitude"],
+        _filtered_df["longitude"],
+        popularity(_filtered_df["avg_rating"], _filtered_df["total_reviews_count"]),
+    )
+
+
+def render_viewport_map(filtered_df, filters_key):
+    # La clé du composant change avec les filtres : la carte repart de la vue par défaut
+    map_key = f"viewport_map_{filters_key}"
+    state = st.session_state.get(map_key) or {}
+
+    if state.get("bounds") and state["bounds"].get("_southWest"):
+        sw, ne = state["bounds"]["_southWest"], state["bounds"]["_northEast"]
+        bounds = (sw["lat"], sw["lng"], ne["lat"], ne["lng"])
+        zoom = state["zoom"]
+        center = (state["center"]["lat"], state["center"]["lng"])
+    else:
+        # Premier affichage : vue cadrée sur la sélection
+        center, zoom = map_center, map_zoom
+        bounds = bounds_around(center, zoom)
+
+    grid = build_grid_index(filters_key, filtered_df)
+    idx, n_in_view = grid.query_viewport(bounds, zoom, max_points=MAX_VIEWPORT_POINTS)
+    visible = filtered_df.iloc[idx]
+
+    st.caption(
+        f"{len(visible)} restaurants affichés sur {n_in_view} dans la zone visible "
+        "— zoome ou déplace la carte pour en charger d'autres."
+    )
+
+    layer = folium.FeatureGroup(name="Restaurants")
+    # Infobulles générées une fois par restaurant : un déplacement de carte ne refait que les nouvelles
+    tooltips = VIEWPORT_TOOLTIPS.get(snapshot.version, visible)
+    for lat, lon, tooltip in zip(visible["latitude"], visible["longitude"], tooltips):
+        folium.CircleMarker(
+            location=[lat, lon],
+            radius=5,
+            color="#FF4B4B",
+            fill=True,
+            fill_opacity=0.8,
+            tooltip=tooltip,
+        ).add_to(layer)
+
+    st_folium(
+        folium.Map(location=center, zoom_start=zoom, tiles="OpenStreetMap"),
+        key=map_key,
+        center=center,
+        zoom=zoom,
+        feature_group_to_add=layer,
+        returned_objects=["bounds", "zoom", "center"],
+        height=650,
+        use_container_width=True,
+    )
+
+
+# ==============================
+# 🧱 TUILES VECTORIELLES (SERVEUR STATIQUE)
+# ==============================
+# Générées hors ligne : python -m culinary.tiles build --out tiles
+# Servies par :          python -m culinary.tiles serve --dir tiles --port 8001
+TILES_URL = os.environ.get("CULINARY_TILES_URL", "http://127.0.0.1:8001/{z}/{x}/{y}.pbf")
+
+
+def render_tile_map():
+    st.caption(
+        "Tuiles précalculées (tous les restaurants, les plus populaires d'abord) : "
+        "les filtres de la barre latérale ne s'appliquent pas à ce mode."
+    )
+    layer = pdk.Layer(
+        "MVTLayer",
+        data=TILES_URL,
+        min_zoom=0,
+        max_zoom=12,
+        point_type="circle",
+        get_fill_color=[255, 75, 75, 200],
+        get_point_radius=4,
+        point_radius_units="pixels",
+        pickable=True,
+    )
+    st.pydeck_chart(
+        pdk.Deck(
+            layers=[layer],
+            initial_view_state=pdk.ViewState(
+                latitude=map_center[0], longitude=map_center[1], zoom=map_zoom - 1,
+            ),
+            map_style="light",
+            tooltip={"text": "{restaurant_name}\n{city}, {country}\n⭐ {avg_rating} ({total_reviews_count} avis)"},
+        ),
+        height=650,
+    )
+
+
+# ==============================
+# 🗺️ AFFICHAGE DE LA CARTE (persistante)
+# ==============================
+st.markdown("### Carte interactive des restaurants filtrés")
+st.markdown(f"**{len(filtered_df)} restaurants affichés** sur la carte")
+
+# Résumé des filtres
+st.markdown("#### Filtres appliqués :")
+st.write(
+    f"**Pays :** {', '.join(selected_countries) if selected_countries else 'Aucun'} | "
+    f"**Régions :** {', '.join(selected_regions[:3]) if selected_regions else 'Aucune'} | "
+    f"**Cuisines :** {', '.join(selected_cuisines[:3]) if selected_cuisines else 'Aucune'} | "
+    f"**Prix :** {', '.join(selected_prices) if selected_prices else 'Aucun'} | "
+    f"**Note ≥ {min_rating} ⭐**"
+)
+
+# Carte
+if map_mode == "Tuiles vectorielles":
+    render_tile_map()
+elif not filtered_df.empty:
+    if map_mode == "Chargement par zone":
+        render_viewport_map(filtered_df, st.session_state.filters_key)
+    else:
+        render_full_map(filtered_df, st.session_state.filters_key)
 
     # 📋 Tableau
     with st.expander("Voir les détails des restaurants filtrés"):
@@ -192,7 +369,7 @@ if not filtered_df.empty:
             filtered_df[
                 ["restaurant_name", "city", "country", "region", "price_level", "avg_rating", "cuisines"]
             ].sort_values("avg_rating", ascending=False),
-            use_container_width=True,
+            width="stretch",
         )
 else:
     st.warning(
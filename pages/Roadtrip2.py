@@ -2,15 +2,25 @@ import streamlit as st
 import pandas as pd
 import folium
 from streamlit_folium import st_folium
-import numpy as np
+from datetime import date
+
+from culinary.data import with_labels
+from culinary.export import MIME_TYPES, export_text
+from culinary.figures import rows_key
+from culinary.geodesy import fit_bounds, great_circle_path, spherical_centroid
+from culinary.queries import parse_trip, trip_rows
+from culinary.querystate import FLOAT, LIST, TEXT, only_known, slider_value
+from culinary.render import STOP_ICON_CSS, TRIP_POPUPS, itinerary_html, result_cards_html, stop_icon_html
+from culinary.resources import current_snapshot, publish_filters, result_cache, url_filters
+from culinary.similar import SimilarityIndex
 
 
 # ===========================
 # 🔹 Chargement & préparation des données
 # ===========================
-@st.cache_data(ttl=3600)
-def load_data():
-    """Load and clean the European restaurants dataset"""
+@st.cache_data(max_entries=4)
+def load_data(version, countries, _snapshot):
+    """Load the restaurants of the selected countries (only their partitions are read)"""
     usecols = [
         "restaurant_name", "country", "region", "province", "city",
         "address", "latitude", "longitude",
@@ -18,47 +28,47 @@ def load_data():
         "cuisines",
         "avg_rating", "total_reviews_count"
     ]
-    
-    url = (
-        "https://huggingface.co/datasets/Amoham16/resto-europe/"
-        "resolve/main/tripadvisor_clean.csv"
-    )
-    df = pd.read_csv(url, usecols=usecols)
-
-
-    # Nettoyage des colonnes texte
-    text_cols = ["country", "region", "province", "city", "address", "price_level", "price_range", "cuisines"]
-    for col in text_cols:
-        df[col] = (
-            df[col]
-            .astype("string")
-            .fillna("Inconnu")
-            .str.strip()
-            .replace("", "Inconnu")
-        )
 
-    # Colonnes numériques
-    df["avg_rating"] = pd.to_numeric(df["avg_rating"], errors="coerce")
-    df["total_reviews_count"] = pd.to_numeric(df["total_reviews_count"], errors="coerce")
-    df["latitude"] = pd.to_numeric(df["latitude"], errors="coerce")
-    df["longitude"] = pd.to_numeric(df["longitude"], errors="coerce")
+    # Nettoyage (texte, numériques, doublons, cuisine principale) fait à l'ingestion
+    return with_labels(_snapshot.countries_df(countries), usecols + ["cuisine_main"])
+
+
+@st.cache_resource(max_entries=8)
+def similarity_index_for(version, countries, _df):
+    """Index « restaurants similaires » des pays du trip (les alternatives restent dans la même ville)."""
+    return SimilarityIndex(_df)
+
 
-    # On enlève les lignes sans coordonnées ou sans note
-    df = df.dropna(subset=["latitude", "longitude", "avg_rating"])
+snapshot = current_snapshot()
+catalog = snapshot.catalog
 
-    # Colonne "cuisine principale" (première cuisine de la liste)
-    def first_cuisine(x):
-        if x is None or pd.isna(x):
-            return "Inconnue"
-        parts = str(x).split(",")
-        return parts[0].strip() if parts else "Inconnue"
+# Coût estimé (optionnel) à partir de price_level
+PRICE_TO_COST = {
+    "€": 20,
+    "€€": 40,
+    "€€€": 80,
+    "€€€€": 150,
+}
 
-    df["cuisine_main"] = df["cuisines"].apply(first_cuisine)
 
-    return df
+def resolve_stops(row_ids, countries) -> pd.DataFrame:
+    """Étapes complètes du trip, relues dans les partitions partagées au moment de l'affichage.
 
+    La session ne garde que les row_id (index du dataset) et les pays du trip :
+    pas de copie des restaurants par utilisateur.
+    """
+    stops = load_data(snapshot.version, tuple(countries), snapshot).loc[row_ids].rename_axis("row_id").reset_index()
+    stops["estimated_cost"] = stops["price_level"].astype("string").map(PRICE_TO_COST).astype(float)
+    return stops
 
-df = load_data()
+
+# ===========================
+# 🔹 Filtres partageables (URL)
+# ===========================
+# « trip » garde l'ordre des villes (l'itinéraire) : « Rome:2,Paris:3 »
+ROADTRIP_FILTERS = {"min_rating": FLOAT, "cuisine": LIST, "country": LIST, "trip": TEXT}
+url = url_filters("roadtrip", ROADTRIP_FILTERS)
+url_days = parse_trip(url.get("trip", ""))
 
 # ===========================
 # 🔹 Titre principal
@@ -88,23 +98,27 @@ with c1:
         "Minimum Restaurant Rating",
         min_value=3.0,
         max_value=5.0,
-        value=4.0,
+        value=slider_value(url.get("min_rating"), 3.0, 5.0, 0.1, default=4.0),
         step=0.1,
     )
 
+    all_cuisines = catalog.options("cuisine_main")
     preferred_cuisines = st.multiselect(
         "Preferred Cuisines (optional)",
-        options=sorted(df["cuisine_main"].unique()),
-        default=None,
+        options=all_cuisines,
+        default=only_known(url.get("cuisine", []), all_cuisines),
     )
 
 with c2:
     st.subheader("Location Preferences")
 
-    all_countries = sorted(df["country"].unique())
+    all_countries = catalog.countries
 
     # 👉 Par défaut : France + Italy (si présents dans le dataset)
     default_countries = [c for c in ["France", "Italy"] if c in all_countries]
+    # Lien partagé : une liste absente de l'URL est une liste vide
+    if url:
+        default_countries = only_known(url.get("country", []), all_countries)
 
     preferred_countries = st.multiselect(
         "Countries to Visit",
@@ -112,12 +126,12 @@ with c2:
         default=default_countries,
     )
 
-    # 🔍 Villes selon les pays sélectionnés
+    # 🔍 Villes selon les pays sélectionnés (seules leurs partitions sont chargées)
+    trip_countries = tuple(sorted(preferred_countries))
     if preferred_countries:
-        base_df = df[df["country"].isin(preferred_countries)].copy()
-        possible_cities = sorted(base_df["city"].unique())
+        df = load_data(snapshot.version, trip_countries, snapshot)
+        possible_cities = sorted(df["city"].unique())
     else:
-        base_df = df.copy()
         possible_cities = []
 
         # 👉 Ne pré-sélectionner des villes QUE si des pays sont choisis
@@ -134,6 +148,9 @@ with c2:
     else:
         default_cities = []
 
+    if url:
+        default_cities = only_known(url_days, possible_cities)
+
     selected_cities = st.multiselect(
         "Cities to include in the trip",
         options=possible_cities,
@@ -159,7 +176,7 @@ for city in selected_cities:
         f"Days in {city}",
         min_value=1,
         max_value=30,
-        value=2,
+        value=url_days.get(city, 2),
         step=1,
         key=f"days_{city}",
     )
@@ -169,95 +186,144 @@ for city in selected_cities:
 # ======================
 #   GÉNÉRATION DU TRIP
 # ======================
+def generate_trip() -> dict:
+    """Étapes (row_id) et avertissements d'un trip ; résultat partagé entre les sessions."""
+    filters = {"min_rating": min_rating_trip, "cuisine": preferred_cuisines, "country": preferred_countries}
+    # 1 resto par jour : top n_days de chaque ville, lu dans ses candidats
+    # pré-classés ; le DataFrame ne sert qu'aux villes dont le pool ne suffit pas
+    return trip_rows(df, days_per_city, filters, pools=snapshot.city_pools)
+
+
 if st.button("🎯 Generate Road Trip", type="primary"):
     if not selected_cities:
         st.warning("Please select at least one city.")
         st.session_state.roadtrip_results = None
     else:
-        trip_df = df.copy()
-
-        # Appliquer les mêmes filtres que ceux utilisés pour la sélection
-        trip_df = trip_df[trip_df["avg_rating"] >= min_rating_trip]
-
-        if preferred_cuisines:
-            trip_df = trip_df[trip_df["cuisine_main"].isin(preferred_cuisines)]
-
-        if preferred_countries:
-            trip_df = trip_df[trip_df["country"].isin(preferred_countries)]
-
-        if selected_cities:
-            trip_df = trip_df[trip_df["city"].isin(selected_cities)]
-
-        # Coût estimé (optionnel) à partir de price_level / price_range
-        price_to_cost = {
-            "€": 20,
-            "€€": 40,
-            "€€€": 80,
-            "€€€€": 150,
-        }
-        trip_df["estimated_cost"] = trip_df["price_level"].map(price_to_cost)
-
-        selected_restaurants = []
-
-        for city, n_days in days_per_city.items():
-            city_df = trip_df[trip_df["city"] == city].sort_values(
-                ["avg_rating", "total_reviews_count"],
-                ascending=[False, False],
-            )
-
-            if len(city_df) == 0:
-                st.warning(f"No restaurants found for {city} with these filters.")
-                continue
-
-            if len(city_df) < n_days:
-                st.warning(
-                    f"Only {len(city_df)} restaurants found for {city} (need {n_days})."
-                )
-                n_days = len(city_df)
+        query = publish_filters(
+            {
+                "min_rating": min_rating_trip,
+                "cuisine": preferred_cuisines,
+                "country": preferred_countries,
+                "trip": ",".join(f"{city}:{n}" for city, n in days_per_city.items()),
+            },
+            ROADTRIP_FILTERS,
+        )
+        trip = result_cache().get_or_compute(f"roadtrip/{snapshot.version}?{query}", generate_trip)
 
-            # 1 resto par jour : top n_days
-            selected_restaurants.extend(
-                city_df.head(n_days).to_dict(orient="records")
-            )
+        for message in trip["warnings"]:
+            st.warning(message)
 
-        if len(selected_restaurants) == 0:
+        stop_rows = trip["row_ids"]
+        if len(stop_rows) == 0:
             st.warning(
                 "No restaurants found. Try relaxing your filters (rating, cuisine, etc.)."
             )
             st.session_state.roadtrip_results = None
         else:
-            total_cost = float(
-                sum(
-                    r.get("estimated_cost", 0)
-                    for r in selected_restaurants
-                    if not pd.isna(r.get("estimated_cost", np.nan))
-                )
-            )
-            countries_visited = len(set(r["country"] for r in selected_restaurants))
-            avg_rating_trip = float(np.mean([r["avg_rating"] for r in selected_restaurants]))
+            stops = resolve_stops(stop_rows, trip_countries)
+            total_cost = float(stops["estimated_cost"].sum())
+            countries_visited = int(stops["country"].nunique())
+            avg_rating_trip = float(stops["avg_rating"].mean())
 
             st.session_state.roadtrip_results = {
-                "selected_restaurants": selected_restaurants,
+                "version": snapshot.version,
+                "row_ids": stop_rows,
+                "countries": trip_countries,
                 "days_per_city": days_per_city,
                 "total_days": total_days,
                 "countries_visited": countries_visited,
                 "avg_rating": avg_rating_trip,
                 "total_cost": total_cost,
+                "distance_km": trip["distance_km"],
+                "city_distance_km": trip["city_distance_km"],
             }
 
             st.success("✅ Road trip generated and saved! Scroll to see it below 👇")
 
+# ======================
+#   CARTE MÉMORISÉE
+# ======================
+# Clé = restaurants du trip (dans l'ordre) : centre, cadrage, marqueurs et tracé ne
+# sont recalculés que si le trip change. Ce sont des données simples (copiées pour
+# chaque session par ``st.cache_data``) ; la carte folium, modifiable, est
+# reconstruite à chaque exécution. Éviction LRU au-delà de 32 trips.
+@st.cache_data(max_entries=32)
+def trip_map_layers(trip_key, version, _stops) -> dict:
+    # Popups générés une fois par restaurant (partagés entre trips et sessions)
+    popups = TRIP_POPUPS.get(version, _stops.set_index("row_id"))
+    markers = [
+        (lat, lon, f"<b>Stop {idx}: {popup}", f"Stop {idx}: {name}", idx)
+        for idx, (name, lat, lon, popup) in enumerate(
+            zip(_stops["restaurant_name"], _stops["latitude"], _stops["longitude"], popups), start=1
+        )
+    ]
+    return {
+        # Centre sur la sphère et cadrage sur toutes les étapes
+        "center": spherical_centroid(_stops["latitude"], _stops["longitude"]),
+        "bounds": fit_bounds(_stops["latitude"], _stops["longitude"]),
+        "markers": markers,
+        # Trajets le long des grands cercles (lignes droites trompeuses entre villes éloignées)
+        "path": great_circle_path(_stops["latitude"], _stops["longitude"]).tolist() if len(_stops) >= 2 else None,
+    }
+
+
+def build_trip_map(layers: dict) -> folium.Map:
+    south, west, north, east = layers["bounds"]
+    trip_map = folium.Map(
+        location=list(layers["center"]),
+        zoom_start=5,
+        tiles="OpenStreetMap",
+    )
+    trip_map.fit_bounds([[south, west], [north, east]], max_zoom=14)
+    # Style des icônes numérotées : une fois par carte, pas par marqueur
+    trip_map.get_root().header.add_child(folium.Element(STOP_ICON_CSS))
+
+    for lat, lon, popup, tooltip, number in layers["markers"]:
+        folium.Marker(
+            location=[lat, lon],
+            popup=popup,
+            tooltip=tooltip,
+            icon=folium.DivIcon(html=stop_icon_html(number)),
+        ).add_to(trip_map)
+
+    if layers["path"]:
+        folium.PolyLine(
+            layers["path"],
+            color="#FF4B4B",
+            weight=3,
+            opacity=0.7,
+            popup="Trip Route",
+        ).add_to(trip_map)
+
+    return trip_map
+
+
+# Fichiers d'export mémorisés par trip (et date de départ pour l'ICS), écrits
+# directement depuis les row_id du trip et les colonnes des partitions partagées
+@st.cache_data(max_entries=32)
+def build_export(trip_key, kind, _results, start=None):
+    options = {"start": start} if kind == "ics" else {}
+    trip_df = load_data(snapshot.version, tuple(_results["countries"]), snapshot)
+    cost = {"estimated_cost": lambda stop: PRICE_TO_COST.get(str(stop["price_level"]))}
+    return export_text(kind, trip_df, _results["row_ids"], computed=cost, **options)
+
+
 # ======================
 #   AFFICHAGE DU TRIP
 # ======================
 results = st.session_state.roadtrip_results
 
+# Les row_id ne valent que pour le snapshot sur lequel le trip a été généré
+if results is not None and results.get("version") != snapshot.version:
+    st.info("The restaurant data was updated since this trip was generated — please generate it again.")
+    st.session_state.roadtrip_results = results = None
+
 if results is None:
     st.info(
         "Choose countries, cities and days per city, then click **Generate Road Trip**."
     )
 else:
-    selected_restaurants = results["selected_restaurants"]
+    stops = resolve_stops(results["row_ids"], results["countries"])
     days_per_city = results["days_per_city"]
     total_days = results["total_days"]
 
@@ -267,114 +333,76 @@ else:
     with cc1:
         st.metric("Total Days", total_days)
     with cc2:
-        st.metric("Restaurant Stops", len(selected_restaurants))
+        st.metric("Restaurant Stops", len(stops))
     with cc3:
         st.metric("Countries", results["countries_visited"])
     with cc4:
         st.metric("Avg Rating", f"⭐ {results['avg_rating']:.2f}")
 
-    st.subheader("Your Itinerary")
-
-    day_idx = 0
-    for city, n_days in days_per_city.items():
-        if n_days == 0:
-            continue
-
-        st.markdown(f"## 📍 {city} — {n_days} day(s)")
-
-        for _ in range(n_days):
-            if day_idx >= len(selected_restaurants):
-                break
-
-            r = selected_restaurants[day_idx]
-
-            st.markdown(f"### Day {day_idx + 1}")
-            with st.container():
-                k1, k2, k3 = st.columns([3, 1, 1])
+    if "distance_km" in results:
+        st.caption(
+            f"🚗 ~{results['distance_km']:,.0f} km between stops "
+            f"({results['city_distance_km']:,.0f} km within cities, as the crow flies)"
+        )
 
-                with k1:
-                    st.markdown(f"**Restaurant: {r['restaurant_name']}**")
-                    st.markdown(f"📍 {r['city']}, {r['country']} | 🍴 {r['cuisines']}")
-                    st.markdown(
-                        f"📧 {r.get('address', 'Address not available')}"
-                    )
+    st.subheader("Your Itinerary")
 
-                with k2:
-                    st.markdown(f"⭐ **{r['avg_rating']}**")
-                    if not pd.isna(r.get("estimated_cost", np.nan)):
-                        st.markdown(
-                            f"💰 {r['price_level']} (~€{int(r['estimated_cost'])})"
-                        )
-                    else:
-                        st.markdown(f"💰 {r['price_level']}")
+    # Tout l'itinéraire en un seul bloc HTML (un message au lieu de plusieurs par jour)
+    st.markdown(
+        itinerary_html(stops, days_per_city),
+        unsafe_allow_html=True,
+    )
 
-                    st.markdown(f"🧾 {int(r['total_reviews_count'])} reviews")
+    with st.expander("🔁 Similar alternatives for a stop"):
+        stop_idx = st.selectbox(
+            "Stop",
+            options=range(len(stops)),
+            format_func=lambda i: f"Day {i + 1}: {stops.at[i, 'restaurant_name']}",
+        )
+        stop = stops.loc[stop_idx]
 
-                with k3:
-                    st.markdown(f"📞 {r.get('phone', 'N/A')}")  # dataset n'a pas phone, donc N/A
+        # Même ville, sans reprendre un restaurant déjà dans le trip
+        trip_df = load_data(snapshot.version, results["countries"], snapshot)
+        similarity_index = similarity_index_for(snapshot.version, results["countries"], trip_df)
+        candidates = (trip_df["city"] == stop["city"]) & ~trip_df.index.isin(results["row_ids"])
+        alternatives = similarity_index.similar(stop["row_id"], k=3, mask=candidates.to_numpy())
 
-            day_idx += 1
+        if alternatives.empty:
+            st.info(f"No other restaurant found in {stop['city']}.")
+        else:
+            st.markdown(
+                result_cards_html(trip_df.loc[alternatives.index], cuisine_col="cuisine_main"),
+                unsafe_allow_html=True,
+            )
 
-        st.divider()
+    st.divider()
 
     # ======================
     #        MAP
     # ======================
     st.subheader("🗺️ Trip Map")
 
-    trip_restaurants_df = pd.DataFrame(selected_restaurants)
-    center_lat = trip_restaurants_df["latitude"].mean()
-    center_lon = trip_restaurants_df["longitude"].mean()
-
-    trip_map = folium.Map(
-        location=[center_lat, center_lon],
-        zoom_start=5,
-        tiles="OpenStreetMap",
-    )
-
-    for idx, r in enumerate(selected_restaurants):
-        popup_html = f"""
-        <b>Stop {idx+1}: {r['restaurant_name']}</b><br>
-        {r['city']}, {r['country']}<br>
-        ⭐ {r['avg_rating']} ({int(r['total_reviews_count'])} reviews)<br>
-        🍴 {r['cuisines']}<br>
-        💰 {r['price_level']}
-        """
-        folium.Marker(
-            location=[r["latitude"], r["longitude"]],
-            popup=popup_html,
-            tooltip=f"Stop {idx+1}: {r['restaurant_name']}",
-            icon=folium.DivIcon(
-                html=f"""
-                <div style="
-                    background-color: #FF4B4B;
-                    color: white;
-                    border-radius: 50%;
-                    width: 30px;
-                    height: 30px;
-                    display: flex;
-                    align-items: center;
-                    justify-content: center;
-                    font-weight: bold;
-                    font-size: 14px;
-                    border: 2px solid white;">
-                    {idx+1}
-                </div>
-                """
-            ),
-        ).add_to(trip_map)
-
-    coordinates = [
-        [r["latitude"], r["longitude"]] for r in selected_restaurants
-    ]
-
-    if len(coordinates) >= 2:
-        folium.PolyLine(
-            coordinates,
-            color="#FF4B4B",
-            weight=3,
-            opacity=0.7,
-            popup="Trip Route",
-        ).add_to(trip_map)
-
+    trip_key = rows_key(snapshot.version, results["row_ids"])
+    trip_map = build_trip_map(trip_map_layers(trip_key, snapshot.version, stops))
     st_folium(trip_map, width=1400, height=500)
+
+    # ======================
+    #   EXPORT (GPS / AGENDA)
+    # ======================
+    st.subheader("📤 Export")
+    trip_start = st.date_input("Trip start date (calendar export)", value=date.today())
+
+    e1, e2, e3 = st.columns(3)
+    for col, kind, label in (
+        (e1, "gpx", "🧭 GPX (navigation apps)"),
+        (e2, "geojson", "🗺️ GeoJSON"),
+        (e3, "ics", "📅 Calendar (ICS)"),
+    ):
+        with col:
+            st.download_button(
+                label,
+                data=build_export(trip_key, kind, results, trip_start if kind == "ics" else None),
+                file_name=f"road_trip.{kind}",
+                mime=MIME_TYPES[kind],
+                width="stretch",
+            )
@@ -1,8 +1,16 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import pydeck as pdk
 import plotly.express as px
 
+from culinary.data import with_labels
+from culinary.figures import state_key
+from culinary.progressive import PREVIEW_ROWS, cached_job, preview_positions, show_progressively, submit
+from culinary.queries import filter_rows
+from culinary.querystate import FLOAT, LIST, TEXT, only_known, slider_value
+from culinary.resources import current_snapshot, publish_filters, result_cache, url_filters
+
 st.set_page_config(page_title="Stats & Visualisations", layout="wide")
 
 # Charger le CSS externe (optionnel)
@@ -22,8 +30,9 @@ page = st.sidebar.radio("Aller à", ["Carte 3D", "Statistiques"])
 # ==========================
 # 🔹 Chargement des données (cache)
 # ==========================
-@st.cache_data(ttl=3600)
-def load_data():
+@st.cache_data(max_entries=4)
+def load_data(version, countries, _snapshot):
+    """Restaurants des pays choisis (tous si aucun) : seules leurs partitions sont lues."""
     usecols = [
         "restaurant_name", "country", "city",
         "latitude", "longitude",
@@ -31,22 +40,45 @@ def load_data():
         "cuisines"
     ]
 
-    url = (
-        "https://huggingface.co/datasets/Amoham16/resto-europe/"
-        "resolve/main/tripadvisor_clean.csv"
-    )
-    df = pd.read_csv(url, usecols=usecols)
-    # Nettoyage de base
-    df = df.dropna(subset=["latitude", "longitude"])
-    df["cuisines"] = df["cuisines"].fillna("Inconnue")
-    df["cuisines_clean"] = df["cuisines"].apply(lambda x: x.split(",")[0].strip())
-    df["city"] = df["city"].fillna("Inconnue")
-    df["country"] = df["country"].fillna("Inconnu")
+    # Données déjà nettoyées à l'ingestion ; cuisine principale = première de la liste
+    df = with_labels(_snapshot.countries_df(countries), usecols + ["cuisine_main"])
+    return df.rename(columns={"cuisine_main": "cuisines_clean"})
+
 
-    return df
+snapshot = current_snapshot()
+catalog = snapshot.catalog
 
+# Au-delà, la page Statistiques démarre en mode approché (échantillon stratifié)
+APPROX_DEFAULT_ROWS = 200_000
 
-df = load_data()
+
+# ==========================
+# 🔹 Carte 3D : colonnes et tableaux construits en arrière-plan
+# ==========================
+COLUMN_FIELDS = ["longitude", "latitude", "height", "restaurant_name", "avg_rating", "total_reviews_count"]
+
+
+def build_3d_results(df_filtered):
+    """Colonnes de la carte (champs utiles seulement) et tableaux par pays / cuisine."""
+    records = df_filtered[COLUMN_FIELDS].to_dict("records")
+    aggregations = dict(
+        avg_rating_mean=("avg_rating", "mean"),
+        total_reviews_sum=("total_reviews_count", "sum"),
+        count_resto=("restaurant_name", "count"),
+    )
+    df_country = df_filtered.groupby("country", observed=True).agg(**aggregations).sort_values(
+        by="avg_rating_mean", ascending=False
+    )
+    df_cuisine = df_filtered.groupby("cuisines_clean", observed=True).agg(**aggregations).sort_values(
+        by="avg_rating_mean", ascending=False
+    )
+    return records, df_country, df_cuisine
+
+
+# Clé = filtres + mode d'affichage ; partagé entre réexécutions et sessions
+@st.cache_resource(max_entries=8)
+def stats_3d_job(key, _df_filtered):
+    return submit(build_3d_results, _df_filtered)
 
 
 # ===========================
@@ -55,41 +87,57 @@ df = load_data()
 if page == "Carte 3D":
     st.title("Carte 3D — Visualisation des restaurants")
 
-    # -------- Filtres ----------
+    # -------- Filtres (partageables : ?country=Belgium&min_rating=4.2…) ----------
+    STATS_FILTERS = {"cuisine": TEXT, "country": LIST, "min_rating": FLOAT}
+    url = url_filters("stats", STATS_FILTERS)
+
     col1, col2, col3 = st.columns(3)
 
     with col1:
+        cuisine_options = ["Toutes"] + catalog.options("cuisine_main")
         cuisine = st.selectbox(
             "Type de cuisine",
-            ["Toutes"] + sorted(df["cuisines_clean"].unique())
+            cuisine_options,
+            index=cuisine_options.index(url["cuisine"]) if url.get("cuisine") in cuisine_options else 0,
         )
     
     
     with col2:
     # Option spéciale "Tous les pays"
-        country_options = ["Tous les pays"] + sorted(df["country"].unique())
+        country_options = ["Tous les pays"] + catalog.countries
 
         selected_countries = st.multiselect(
             "Pays",
             options=country_options,
-            default=["Belgium"]  # par défaut : pas de filtre sur le pays
+            # Dans un lien, une liste absente veut dire « aucune sélection »
+            default=only_known(url.get("country", [] if url else ["Belgium"]), country_options),
         )
         
     with col3:
         min_rating = st.slider(
-            "Note minimum", 0.0, 5.0, 4.0, step=0.1
+            "Note minimum", 0.0, 5.0, slider_value(url.get("min_rating"), 0.0, 5.0, 0.1, default=4.0), step=0.1
         )
 
-    # Appliquer filtres
-    df_filtered = df.copy()
-
-    if cuisine != "Toutes":
-        df_filtered = df_filtered[df_filtered["cuisines_clean"] == cuisine]
-
-    if selected_countries and "Tous les pays" not in selected_countries:
-        df_filtered = df_filtered[df_filtered["country"].isin(selected_countries)]
+    # Seules les partitions des pays choisis sont chargées (toutes pour « Tous les pays »)
+    countries = () if "Tous les pays" in selected_countries else tuple(sorted(selected_countries))
+    df = load_data(snapshot.version, countries, snapshot)
 
-    df_filtered = df_filtered[df_filtered["avg_rating"] >= min_rating]
+    # Appliquer filtres
+    def compute_rows():
+        filters = {
+            "cuisine": [] if cuisine == "Toutes" else [cuisine],
+            "country": list(countries),
+            "min_rating": min_rating,
+        }
+        return filter_rows(df, filters, cuisine_col="cuisines_clean")
+
+    # Même lien -> mêmes row_id pour toutes les sessions
+    query = publish_filters(
+        {"cuisine": None if cuisine == "Toutes" else cuisine, "country": selected_countries, "min_rating": min_rating},
+        STATS_FILTERS,
+    )
+    cache_key = f"stats/{snapshot.version}?{query}"
+    df_filtered = df.loc[result_cache().get_or_compute(cache_key, compute_rows)]
 
     # -------- Mode d'affichage ----------
     st.subheader("Mode d'affichage (hauteur des colonnes)")
@@ -131,59 +179,57 @@ if page == "Carte 3D":
     if df_filtered.empty:
         st.warning("Aucun restaurant trouvé avec ces filtres.")
     else:
+        # Cadrage lu dans le catalogue des partitions (pas de moyenne sur les lignes)
+        (lat, lon), zoom = catalog.view(countries)
         view = pdk.ViewState(
-            latitude=df_filtered["latitude"].mean(),
-            longitude=df_filtered["longitude"].mean(),
-            zoom=4,
+            latitude=lat,
+            longitude=lon,
+            zoom=zoom - 1,   # deck.gl : tuiles de 512 px
             pitch=55,
         )
 
-        layer_3d = pdk.Layer(
-            "ColumnLayer",
-            data=df_filtered,
-            get_position=["longitude", "latitude"],
-            get_elevation="height",        # 🔹 on utilise la colonne calculée
-            elevation_scale=15,
-            radius=12000,
-            get_color=[60, 120, 255, 180],
-            pickable=True,
-            auto_highlight=True,
-        )
-
-        deck_3d = pdk.Deck(
-            initial_view_state=view,
-            layers=[layer_3d],
-            tooltip={
-                "text": "{restaurant_name}\n⭐ {avg_rating}\nAvis: {total_reviews_count}"
-            },
-        )
+        def render_deck(data):
+            layer_3d = pdk.Layer(
+                "ColumnLayer",
+                data=data,
+                get_position=["longitude", "latitude"],
+                get_elevation="height",        # 🔹 on utilise la colonne calculée
+                elevation_scale=15,
+                radius=12000,
+                get_color=[60, 120, 255, 180],
+                pickable=True,
+                auto_highlight=True,
+            )
 
-        st.pydeck_chart(deck_3d)
+            deck_3d = pdk.Deck(
+                initial_view_state=view,
+                layers=[layer_3d],
+                tooltip={
+                    "text": "{restaurant_name}\n⭐ {avg_rating}\nAvis: {total_reviews_count}"
+                },
+            )
 
-    # -------- Analyses graphiques ----------
-    st.subheader("Analyses complémentaires")
+            st.pydeck_chart(deck_3d)
 
-    if not df_filtered.empty:
-        df_country = (
-            df_filtered.groupby("country")
-            .agg(
-                avg_rating_mean=("avg_rating", "mean"),
-                total_reviews_sum=("total_reviews_count", "sum"),
-                count_resto=("restaurant_name", "count"),
+        def render_preview():
+            # Échantillon régulier tout de suite ; les colonnes exactes le remplacent ensuite
+            sample = df_filtered.iloc[preview_positions(len(df_filtered))]
+            st.caption(
+                f"Aperçu : {len(sample)} restaurants sur {len(df_filtered)} "
+                "— la carte complète s'affiche dès qu'elle est prête."
             )
-            .sort_values(by="avg_rating_mean", ascending=False)
-        )
+            render_deck(sample[COLUMN_FIELDS])
 
-        df_cuisine = (
-            df_filtered.groupby("cuisines_clean")
-            .agg(
-                avg_rating_mean=("avg_rating", "mean"),
-                total_reviews_sum=("total_reviews_count", "sum"),
-                count_resto=("restaurant_name", "count"),
-            )
-            .sort_values(by="avg_rating_mean", ascending=False)
+        job = cached_job(stats_3d_job, state_key(cache_key, mode), df_filtered)
+        records, df_country, df_cuisine = show_progressively(
+            st.empty(), job, render_preview if len(df_filtered) > PREVIEW_ROWS else None,
+            lambda result: render_deck(result[0]),
         )
 
+    # -------- Analyses graphiques ----------
+    st.subheader("Analyses complémentaires")
+
+    if not df_filtered.empty:
         st.write("Top pays (par note moyenne) :")
         st.dataframe(df_country.head(10))
 
@@ -199,8 +245,29 @@ if page == "Carte 3D":
 elif page == "Statistiques":
     st.header("Statistiques")
 
-    df_cuisine = df.copy()
-    
+    # Index globaux (pré-calculés avec le snapshot)
+    geo = snapshot.indexes["geo"]
+    distributions = snapshot.indexes["distributions"]
+
+    # Mode approché : réponses tirées de l'échantillon stratifié (latence constante),
+    # activé par défaut sur les gros datasets ; le mode exact relit toutes les lignes
+    approximate = st.sidebar.toggle(
+        "Mode approché (échantillon)",
+        value=catalog.total_rows >= APPROX_DEFAULT_ROWS,
+        help="Nombres de restaurants exacts ; notes moyennes estimées sur un échantillon "
+             "stratifié par pays et cuisine, avec un intervalle de confiance à 95 %.",
+    )
+    if approximate:
+        sample = snapshot.indexes["stratified_sample"]
+        sample_size = f"{len(sample):,}".replace(",", " ")
+        st.caption(
+            f"Mode approché : notes moyennes estimées sur {sample_size} restaurants "
+            "échantillonnés (± intervalle de confiance à 95 %)."
+        )
+    else:
+        # Vue d'ensemble exacte : tout le dataset
+        df = load_data(snapshot.version, (), snapshot)
+
     # ==========================
     # 2️⃣ FILTRE PAR PAYS (APPLIQUÉ APRÈS CUISINE)
     # ==========================
@@ -208,14 +275,20 @@ elif page == "Statistiques":
 
     country_filter = st.multiselect(
         "Filter by Cuisine",
-        options=sorted(df_cuisine["cuisines_clean"].unique()),  # 👈 dépend déjà du filtre cuisine
+        options=catalog.options("cuisine_main"),
         default=None,
     )
 
-    # df filtré sur cuisine ⬅️ puis pays ⬅️
-    filtered_df = df_cuisine.copy()
-    if country_filter:
-        filtered_df = filtered_df[filtered_df["cuisines_clean"].isin(country_filter)]
+    # Par pays, sur le filtre cuisine : nombre de restaurants et note moyenne
+    if approximate:
+        by_country = sample.estimate(cuisines=country_filter, by="country")
+    else:
+        filtered_df = df[df["cuisines_clean"].isin(country_filter)] if country_filter else df
+        by_country = filtered_df.groupby("country", observed=True).agg(
+            count=("restaurant_name", "count"),
+            mean_rating=("avg_rating", "mean"),
+        )
+    n_restaurants = int(by_country["count"].sum())
 
     # ==========================
     # METRICS (sur les deux filtres)
@@ -224,29 +297,29 @@ elif page == "Statistiques":
 
     c1, c2, c3 = st.columns(3)
     with c1:
-        st.metric("Total Restaurants", len(filtered_df))
+        st.metric("Total Restaurants", n_restaurants)
     with c2:
-        if len(filtered_df) > 0:
-            st.metric("Average Rating", f"{filtered_df['avg_rating'].mean():.2f}")
-        else:
+        if n_restaurants == 0:
             st.metric("Average Rating", "N/A")
+        elif approximate:
+            overall = sample.estimate(cuisines=country_filter).iloc[0]
+            st.metric("Average Rating", f"{overall['mean_rating']:.2f} ± {overall['ci']:.2f}")
+        else:
+            st.metric("Average Rating", f"{filtered_df['avg_rating'].mean():.2f}")
     with c3:
-        st.metric("Countries", filtered_df["country"].nunique())
+        st.metric("Countries", len(by_country))
 
     # ==========================
     # 2e GRAPHE : Top pays (cuisine + pays)
     # ==========================
     st.subheader("Top Countries by Restaurant Count (with both filters)")
     
-    if not filtered_df.empty:
+    if n_restaurants:
         country_stats = (
-            filtered_df.groupby("country")
-            .agg(
-                restaurant_count=("restaurant_name", "count"),
-                avg_rating_mean=("avg_rating", "mean"),
-            )
-            .sort_values("restaurant_count", ascending=False)
+            by_country.sort_values("count", ascending=False)
             .head(10)
+            .rename(columns={"count": "restaurant_count", "mean_rating": "avg_rating_mean"})
+            .rename_axis("country")
             .reset_index()
         )
 
@@ -258,6 +331,7 @@ elif page == "Statistiques":
             labels={
                 "restaurant_count": "Number of Restaurants",
                 "country": "Country",
+                "ci": "± IC 95 %",
             },
             color="avg_rating_mean",             # Couleur = moyenne des notes
             color_continuous_scale="Viridis",
@@ -265,6 +339,7 @@ elif page == "Statistiques":
                 "avg_rating_mean": ":.2f",       # ⭐ note moyenne
                 "restaurant_count": True,
                 "country": False,
+                **({"ci": ":.2f"} if approximate else {}),
             },
         )
 
@@ -273,7 +348,7 @@ elif page == "Statistiques":
             coloraxis_colorbar_title="Avg Rating ⭐",
         )
 
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(fig, width="stretch")
     else:
         st.info("No data to display for country distribution with current filters.")
 
@@ -287,22 +362,24 @@ elif page == "Statistiques":
 
     cuisine_filter = st.multiselect(
         "Filter by Pays",
-        options=sorted(df["country"].unique()),
+        options=catalog.countries,
         default=None,
     )
 
-    # df filtré UNIQUEMENT par pays
-    
-    if cuisine_filter:
-        df_cuisine = df_cuisine[df_cuisine["country"].isin(cuisine_filter)]
+    # Restaurants par cuisine, filtrés UNIQUEMENT par pays (exacts dans les deux modes)
+    if approximate:
+        cuisine_counts = sample.estimate(countries=cuisine_filter, by="cuisine_main")["count"]
+        cuisine_counts = cuisine_counts[cuisine_counts > 0].sort_values(ascending=False)
+    else:
+        df_cuisine = df[df["country"].isin(cuisine_filter)] if cuisine_filter else df
+        cuisine_counts = df_cuisine["cuisines_clean"].value_counts()
 
     # ==========================
     # 1er GRAPHE : dépend SEULEMENT du filtre cuisine
     # ==========================
     st.subheader("Cuisine Type Distribution (filtered by cuisine)")
 
-    if not df_cuisine.empty:
-        cuisine_counts = df_cuisine["cuisines_clean"].value_counts()
+    if len(cuisine_counts):
         fig2 = px.pie(
             values=cuisine_counts.values,
             names=cuisine_counts.index,
@@ -314,9 +391,119 @@ elif page == "Statistiques":
                            )
         
         fig2.update_layout(height=400)
-        st.plotly_chart(fig2, use_container_width=True)
+        st.plotly_chart(fig2, width="stretch")
     else:
         st.info("No data to display for cuisine distribution with current cuisine filter.")
 
     st.markdown("---")
 
+    # ==========================
+    # 📊 DISTRIBUTIONS (sketches pré-calculés par pays × cuisine, fusionnés)
+    # ==========================
+    st.subheader("Distribution des notes et des avis (filtres pays + cuisine)")
+
+    sketch = distributions.merge(countries=cuisine_filter or (), cuisines=country_filter or ())
+    if sketch.count:
+        percentiles = [0.1, 0.25, 0.5, 0.75, 0.9, 0.99]
+        s1, s2, s3 = st.columns(3)
+        with s1:
+            st.metric("Note médiane", f"{sketch.rating_quantiles(0.5)[0]:.1f}")
+        with s2:
+            st.metric("Avis (médiane)", f"{sketch.reviews_quantiles(0.5)[0]:.0f}")
+        with s3:
+            st.metric("Avis (90e percentile)", f"{sketch.reviews_quantiles(0.9)[0]:.0f}")
+
+        h1, h2 = st.columns(2)
+        with h1:
+            rating_hist = sketch.rating_histogram()
+            fig_rating = px.bar(
+                x=rating_hist.index, y=rating_hist.values,
+                labels={"x": "Note", "y": "Restaurants"},
+            )
+            fig_rating.update_layout(height=400)
+            st.plotly_chart(fig_rating, width="stretch")
+        with h2:
+            # Courbe des quantiles du nombre d'avis (échelle log : distribution très étalée)
+            qs = np.linspace(0.01, 0.99, 99)
+            fig_reviews = px.line(
+                x=qs * 100, y=sketch.reviews_quantiles(qs),
+                labels={"x": "Percentile", "y": "Nombre d'avis"},
+                log_y=True,
+            )
+            fig_reviews.update_layout(height=400)
+            st.plotly_chart(fig_reviews, width="stretch")
+
+        st.dataframe(
+            pd.DataFrame(
+                {
+                    "Note": sketch.rating_quantiles(percentiles),
+                    "Avis": np.round(sketch.reviews_quantiles(percentiles)),
+                },
+                index=[f"p{q * 100:g}" for q in percentiles],
+            ).T,
+            width="stretch",
+        )
+        st.caption("Nombre d'avis : percentiles à ±1 % près (sketch logarithmique).")
+    else:
+        st.info("No data to display for distributions with current filters.")
+
+    st.markdown("---")
+
+
+    # ==========================
+    # 🧭 EXPLORATION GÉOGRAPHIQUE (agrégats pré-calculés par niveau)
+    # ==========================
+    st.subheader("Exploration géographique")
+
+    level_labels = {"country": "Pays", "region": "Région", "province": "Province", "city": "Ville"}
+    path = []
+    level_cols = st.columns(len(geo.levels))
+    for level_col, level in zip(level_cols, geo.levels):
+        options = geo.children(path).index.tolist()
+        with level_col:
+            # Clé liée au parent : changer de pays repart de « Tous » pour les niveaux en dessous
+            choice = st.selectbox(
+                level_labels[level], ["Tous"] + options, key=f"geo_{level}_{'/'.join(path)}"
+            )
+        if choice == "Tous":
+            break
+        path.append(choice)
+
+    node = geo.node(path)
+    g1, g2, g3 = st.columns(3)
+    with g1:
+        st.metric("Restaurants", int(node["count"]))
+    with g2:
+        st.metric("Note moyenne", f"{node['mean_rating']:.2f}")
+    with g3:
+        st.metric("Avis cumulés", f"{int(node['reviews_sum']):,}".replace(",", " "))
+
+    children = geo.children(path)
+    d1, d2 = st.columns(2)
+    with d1:
+        if not children.empty:
+            top_children = children.sort_values("count", ascending=False).head(15).reset_index()
+            name_col = top_children.columns[0]
+            fig_geo = px.bar(
+                top_children,
+                x="count",
+                y=name_col,
+                orientation="h",
+                color="mean_rating",
+                color_continuous_scale="Viridis",
+                labels={"count": "Restaurants", name_col: "", "mean_rating": "Note ⭐"},
+                hover_data={"mean_rating": ":.2f"},
+            )
+            fig_geo.update_layout(height=450, yaxis={"categoryorder": "total ascending"})
+            st.plotly_chart(fig_geo, width="stretch")
+        else:
+            st.info("Pas de niveau plus fin pour cette sélection.")
+    with d2:
+        distribution = geo.rating_distribution(path)
+        fig_dist = px.bar(
+            x=distribution.index,
+            y=distribution.values,
+            labels={"x": "Note", "y": "Restaurants"},
+        )
+        fig_dist.update_layout(height=450)
+        st.plotly_chart(fig_dist, width="stretch")
@@ -5,6 +5,15 @@ import pandas as pd
 import folium
 from streamlit_folium import st_folium
 
+from culinary.data import with_labels
+from culinary.render import TOP_POPUPS, result_cards_html
+from culinary.figures import state_key
+from culinary.geodesy import fit_bounds, spherical_centroid
+from culinary.querystate import FLOAT, INT, TEXT, slider_value
+from culinary.resources import current_snapshot, publish_filters, result_cache, url_filters
+from culinary.queries import top_rows
+from culinary.scoring import Profile
+
 st.set_page_config(page_title="Top Restaurants", layout="wide")
 
 # Charger le CSS externe
@@ -15,36 +24,25 @@ with open("style.css") as f:
 # ==============================
 # 🔹 CHARGEMENT DES DONNÉES
 # ==============================
-@st.cache_data(ttl=3600, max_entries=1)
-def load_data():
+@st.cache_data(max_entries=1)
+def load_data(version, _snapshot):
     usecols = [
         "restaurant_name", "country", "region", "city",
         "latitude", "longitude",
         "avg_rating", "total_reviews_count",
         "price_level", "cuisines"
     ]
-    
-    url = (
-        "https://huggingface.co/datasets/Amoham16/resto-europe/"
-        "resolve/main/tripadvisor_clean.csv"
-    )
-    df = pd.read_csv(url, usecols=usecols)
-
-    # Nettoyage
-    df = df.dropna(subset=["avg_rating"])
-    df["price_level"] = df["price_level"].fillna("Inconnu")
-    df["region"] = df["region"].fillna("Inconnue")
-    df["city"] = df["city"].fillna("Inconnue")
-    df["country"] = df["country"].fillna("Inconnu")
-    df["cuisines"] = df["cuisines"].fillna("Inconnue")
 
-    # Type de cuisine principal (premier de la liste)
-    df["cuisines_clean"] = df["cuisines"].apply(lambda x: x.split(",")[0].strip())
+    # Données déjà nettoyées à l'ingestion ; cuisine principale = première de la liste
+    df = with_labels(_snapshot.df, usecols + ["cuisine_main"])
+    return df.rename(columns={"cuisine_main": "cuisines_clean"})
 
-    return df
 
-
-df = load_data()
+snapshot = current_snapshot()
+df = load_data(snapshot.version, snapshot)
+# Index construits avec le snapshot (mêmes lignes, même ordre que df)
+similarity_index = snapshot.indexes["similar"]
+scoring_data = snapshot.indexes["scoring"]
 
 # ==============================
 # 🔹 UI & FILTRES
@@ -53,18 +51,93 @@ st.title("Trending Restaurants")
 
 st.write("Filtre les restaurants selon tes préférences, puis affiche un Top N.")
 
+# ==============================
+# 🔹 RECHERCHE
+# ==============================
+search_index = snapshot.indexes["search"]
+FIELD_ICONS = {"restaurant_name": "🍽️", "city": "🏙️", "region": "🗺️", "address": "📍"}
+
+for key in ("top5_region", "top5_found"):
+    if key not in st.session_state:
+        st.session_state[key] = None
+
+# Filtres partageables : ?country=Italy&city=Rome&top=10…
+TOP5_FILTERS = {"cuisine": TEXT, "country": TEXT, "city": TEXT, "region": TEXT, "min_rating": FLOAT, "top": INT}
+url = url_filters("top5", TOP5_FILTERS)
+
+# Widgets à clé : valeurs du lien posées une seule fois, avant leur création
+if "top5_country" not in st.session_state and url.get("country") in set(df["country"]):
+    st.session_state.top5_country = url["country"]
+    if url.get("city") in set(df.loc[df["country"] == url["country"], "city"]):
+        st.session_state.top5_city = url["city"]
+    if url.get("region") in set(df.loc[df["country"] == url["country"], "region"]):
+        st.session_state.top5_region = url["region"]
+
+
+def apply_suggestion():
+    """Une ville/région remplit les filtres, un restaurant/une adresse l'affiche directement."""
+    pick = st.session_state.top5_suggestion
+    st.session_state.top5_suggestion = None
+    if pick is None:
+        return
+    suggestion = search_index.search(st.session_state.top5_search)[pick]
+    rows = df.index.intersection(suggestion.rows)
+    if rows.empty:
+        return
+
+    st.session_state.top5_region = None
+    st.session_state.top5_found = None
+    if suggestion.field == "city":
+        st.session_state.top5_country = df.at[rows[0], "country"]
+        st.session_state.top5_city = suggestion.text
+    elif suggestion.field == "region":
+        st.session_state.top5_country = df.at[rows[0], "country"]
+        st.session_state.top5_city = "Toutes villes"
+        st.session_state.top5_region = suggestion.text
+    else:
+        st.session_state.top5_found = rows.tolist()
+
+
+query = st.text_input(
+    "🔎 Rechercher un restaurant, une ville, une région ou une adresse",
+    key="top5_search",
+)
+if query:
+    suggestions = search_index.search(query)
+    if suggestions:
+        st.selectbox(
+            "Suggestions",
+            options=range(len(suggestions)),
+            index=None,
+            format_func=lambda i: (
+                f"{FIELD_ICONS[suggestions[i].field]} {suggestions[i].text}"
+                + (f" — {suggestions[i].context}" if suggestions[i].context not in ("", "Inconnue", "Inconnu") else "")
+            ),
+            placeholder="Choisir une suggestion…",
+            key="top5_suggestion",
+            on_change=apply_suggestion,
+        )
+    else:
+        st.caption("Aucune correspondance.")
+
+if st.session_state.top5_found:
+    st.markdown(result_cards_html(df.loc[st.session_state.top5_found].head(10)), unsafe_allow_html=True)
+
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
+    cuisine_options = ["Tous"] + sorted(df["cuisines_clean"].unique().tolist())
     cuisine = st.selectbox(
         "🍽 Type de cuisine",
-        ["Tous"] + sorted(df["cuisines_clean"].unique().tolist())
+        cuisine_options,
+        index=cuisine_options.index(url["cuisine"]) if url.get("cuisine") in cuisine_options else 0,
     )
 
 with col2:
     country = st.selectbox(
         "Pays",
-        ["France"] + sorted(df["country"].unique().tolist())
+        ["France"] + sorted(df["country"].unique().tolist()),
+        key="top5_country",
     )
 
 # Liste des villes dépendante du pays
@@ -83,65 +156,110 @@ cities_for_country = sorted(cities_for_country)
 with col3:
     city = st.selectbox(
         "Ville",
-        ["Toutes villes"] + cities_for_country
+        ["Toutes villes"] + cities_for_country,
+        key="top5_city",
     )
 
 with col4:
     top_n = st.select_slider(
         "Top N",
         options=[3, 5, 10],
-        value=5
+        value=url.get("top") if url.get("top") in (3, 5, 10) else 5,
     )
 
 # Filtre additionnel pour la note (en dessous)
 min_rating = st.slider(
     "⭐ Note minimum",
     min_value=0.0, max_value=5.0,
-    value=4.0, step=0.1
+    value=slider_value(url.get("min_rating"), 0.0, 5.0, 0.1, default=4.0), step=0.1
+)
+
+# Profil : classement pondéré au lieu du tri note puis avis
+with st.expander("🎯 Mon profil (classement personnalisé)"):
+    use_profile = st.toggle("Classer selon mon profil", value=False)
+
+    p1, p2 = st.columns(2)
+    with p1:
+        favorite_cuisines = st.multiselect(
+            "Cuisines préférées",
+            sorted(scoring_data.cuisine_codes),
+        )
+        budget = st.select_slider("Budget", options=["€", "€€-€€€", "€€€€"], value="€€-€€€")
+        start_city = st.selectbox("Point de départ", ["Aucun"] + cities_for_country)
+    with p2:
+        w_cuisine = st.slider("Importance : cuisine", 0.0, 1.0, 1.0, 0.1)
+        w_rating = st.slider("Importance : note", 0.0, 1.0, 1.0, 0.1)
+        w_popularity = st.slider("Importance : popularité", 0.0, 1.0, 0.5, 0.1)
+        w_budget = st.slider("Importance : budget", 0.0, 1.0, 0.5, 0.1)
+        w_distance = st.slider("Importance : proximité", 0.0, 1.0, 0.5, 0.1)
+
+location = None
+if start_city != "Aucun":
+    city_rows = df[(df["city"] == start_city) & (df["country"] == country)]
+    location = spherical_centroid(city_rows["latitude"], city_rows["longitude"])
+
+profile = Profile(
+    cuisines={c: 1.0 for c in favorite_cuisines},
+    budget=budget,
+    location=location,
+    w_cuisine=w_cuisine,
+    w_budget=w_budget,
+    w_popularity=w_popularity,
+    w_rating=w_rating,
+    w_distance=w_distance,
 )
 
 
 # ==============================
 # 🔹 APPLICATION DES FILTRES
 # ==============================
-df_filtered = df.copy()
-
-if cuisine != "Tous":
-    df_filtered = df_filtered[df_filtered["cuisines_clean"] == cuisine]
-
-if country != "Tous pays":
-    df_filtered = df_filtered[df_filtered["country"] == country]
-
-if city != "Toutes villes":
-    df_filtered = df_filtered[df_filtered["city"] == city]
+if st.session_state.top5_region:
+    if st.button(f"✖ Retirer le filtre région ({st.session_state.top5_region})"):
+        st.session_state.top5_region = None
+        st.rerun()
+
+
+def compute_top():
+    """row_id du Top N pour les filtres courants."""
+    filters = {
+        "cuisine": [] if cuisine == "Tous" else [cuisine],
+        "country": [] if country == "Tous pays" else [country],
+        "city": [] if city == "Toutes villes" else [city],
+        "region": [st.session_state.top5_region] if st.session_state.top5_region else [],
+        "min_rating": min_rating,
+    }
+    return top_rows(
+        df, filters, n=top_n,
+        profile=profile if use_profile else None, scoring=scoring_data, cuisine_col="cuisines_clean",
+    )
 
-df_filtered = df_filtered[df_filtered["avg_rating"] >= min_rating]
 
 # ==============================
-# 🔹 TOP N
+# 🔹 TOP N (mis en cache pour toutes les sessions, clé = lien canonique)
 # ==============================
-df_top = df_filtered.sort_values(
-    by=["avg_rating", "total_reviews_count"],
-    ascending=[False, False]
-).head(top_n)
+query = publish_filters(
+    {
+        "cuisine": None if cuisine == "Tous" else cuisine,
+        "country": country,
+        "city": None if city == "Toutes villes" else city,
+        "region": st.session_state.top5_region,
+        "min_rating": min_rating,
+        "top": top_n,
+    },
+    TOP5_FILTERS,
+)
+cache_key = f"top5/{snapshot.version}?{query}"
+if use_profile:
+    cache_key += f"#profile={state_key(vars(profile))}"
+df_top = df.loc[result_cache().get_or_compute(cache_key, compute_top)]
 
 st.subheader(f"✨ Top {len(df_top)} restaurants correspondant aux critères")
 
 if df_top.empty:
     st.warning("Aucun restaurant ne correspond à ces filtres.")
 else:
-    # Affichage des cartes résultat
-    for _, row in df_top.iterrows():
-        st.markdown(
-            f"""
-            <div class="result-card">
-                <h3>{row['restaurant_name']}</h3>
-                <p>{row['cuisines_clean']} • {row['city']} • {row['country']} • {row['price_level']}</p>
-                <p><strong>⭐ {row['avg_rating']:.1f}</strong> — {int(row['total_reviews_count'])} avis</p>
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
+    # Affichage des cartes résultat (un seul bloc HTML pour toute la liste)
+    st.markdown(result_cards_html(df_top), unsafe_allow_html=True)
 
     # ==============================
     # 🔹 MINI CARTE LEAFLET
@@ -154,22 +272,35 @@ else:
     if df_map.empty:
         st.info("Pas de coordonnées disponibles pour afficher la carte.")
     else:
-        # Centre de la carte = moyenne des lat/lon
-        center_lat = df_map["latitude"].mean()
-        center_lon = df_map["longitude"].mean()
-
-        m = folium.Map(location=[center_lat, center_lon], zoom_start=5)
-
-        for _, row in df_map.iterrows():
-            popup_html = f"""
-            <b>{row['restaurant_name']}</b><br>
-            {row['cuisines_clean']}<br>
-            {row['city']} – {row['country']}<br>
-            ⭐ {row['avg_rating']:.1f} ({int(row['total_reviews_count'])} avis)
-            """
-            folium.Marker(
-                location=[row["latitude"], row["longitude"]],
-                popup=popup_html
-            ).add_to(m)
+        # Centre sur la sphère, puis cadrage sur tous les résultats
+        center = spherical_centroid(df_map["latitude"], df_map["longitude"])
+        south, west, north, east = fit_bounds(df_map["latitude"], df_map["longitude"])
+
+        m = folium.Map(location=list(center), zoom_start=5)
+        if len(df_map) > 1:
+            m.fit_bounds([[south, west], [north, east]], max_zoom=14)
+
+        popups = TOP_POPUPS.get(snapshot.version, df_map)
+        for lat, lon, popup in zip(df_map["latitude"], df_map["longitude"], popups):
+            folium.Marker(location=[lat, lon], popup=popup).add_to(m)
 
         st_folium(m, width=900, height=400)
+
+    # ==============================
+    # 🔹 RESTAURANTS SIMILAIRES
+    # ==============================
+    st.subheader("🔁 Restaurants similaires")
+
+    reference = st.selectbox(
+        "Trouver des restaurants comme…",
+        options=df_top.index.tolist(),
+        format_func=lambda i: f"{df_top.at[i, 'restaurant_name']} ({df_top.at[i, 'city']})",
+    )
+    similar = similarity_index.similar(
+        reference, k=top_n, mask=(df["avg_rating"] >= min_rating).to_numpy()
+    )
+
+    if similar.empty:
+        st.info("Aucun restaurant similaire avec cette note minimum.")
+    else:
+        st.markdown(result_cards_html(df.loc[similar.index]), unsafe_allow_html=True)
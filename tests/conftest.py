@@ -0,0 +1,26 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Le dépôt n'est pas installé : on importe ``culinary`` depuis la racine,
+# et les aides de test (``synthetic``) depuis ce dossier
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "perf: mesures de temps et de mémoire comparées aux références")
+
+
+@pytest.fixture(scope="session")
+def restaurants(tmp_path_factory):
+    """Petit dataset synthétique passé par ``ingest`` (comme le DataFrame d'un snapshot)."""
+    from culinary.data import read_raw
+    from culinary.ingest import ingest
+    from synthetic import synthetic_frame
+
+    csv = tmp_path_factory.mktemp("restaurants") / "restaurants.csv"
+    synthetic_frame(3000, seed=7).to_csv(csv, index=False)
+    df, _ = ingest(read_raw(csv))
+    return df
@@ -0,0 +1,47 @@
+"""Dataset brut synthétique au format du CSV source, partagé par les tests."""
+import numpy as np
+import pandas as pd
+
+SEED = 20240601
+
+COUNTRIES = {
+    # pays : (lat, lon, villes)
+    "France": (46.6, 2.4, ["Paris", "Lyon", "Marseille", "Nice", "Bordeaux"]),
+    "Italy": (42.8, 12.5, ["Rome", "Milan", "Naples", "Florence", "Turin"]),
+    "Spain": (40.4, -3.7, ["Madrid", "Barcelona", "Seville", "Valencia"]),
+    "Germany": (51.2, 10.4, ["Berlin", "Munich", "Hamburg", "Cologne"]),
+    "Belgium": (50.6, 4.5, ["Brussels", "Antwerp", "Ghent", "Bruges"]),
+    "Portugal": (39.6, -8.0, ["Lisbon", "Porto", "Faro"]),
+}
+CUISINES = ["Italian", "Pizza", "French", "Spanish", "Japanese", "Asian", "Bar", "Cafe",
+            "Mediterranean", "European", "Seafood", "Vegetarian Friendly"]
+PRICES = ["€", "€€-€€€", "€€€€"]
+
+
+def synthetic_frame(n_rows: int, seed: int = SEED) -> pd.DataFrame:
+    """Dataset brut au format du CSV source, identique d'une exécution à l'autre."""
+    rng = np.random.default_rng(seed)
+    names = list(COUNTRIES)
+    weights = np.linspace(2, 1, len(names))   # premiers pays plus fournis
+    country = rng.choice(len(names), n_rows, p=weights / weights.sum())
+    lat = np.array([COUNTRIES[c][0] for c in names])[country]
+    lon = np.array([COUNTRIES[c][1] for c in names])[country]
+    slot = rng.integers(0, 5, n_rows)
+    city = np.array([COUNTRIES[names[c]][2][k % len(COUNTRIES[names[c]][2])] for c, k in zip(country, slot)])
+
+    n_tags = rng.integers(1, 4, n_rows)
+    tags = rng.integers(0, len(CUISINES), (n_rows, 3))
+    cuisines = [", ".join(CUISINES[t] for t in dict.fromkeys(row[:k])) for row, k in zip(tags, n_tags)]
+
+    return pd.DataFrame({
+        "restaurant_name": [f"Restaurant {i}" for i in range(n_rows)],
+        "country": np.array(names)[country],
+        "region": np.char.add("Region ", (slot % 3).astype(str)),
+        "city": city,
+        "latitude": lat + rng.normal(0, 1.0, n_rows),
+        "longitude": lon + rng.normal(0, 1.5, n_rows),
+        "price_level": rng.choice(PRICES + ["Inconnu"], n_rows, p=[0.3, 0.45, 0.1, 0.15]),
+        "cuisines": cuisines,
+        "avg_rating": rng.choice(np.arange(2, 10.5) / 2, n_rows),
+        "total_reviews_count": np.round(rng.lognormal(3, 1.5, n_rows)),
+    })
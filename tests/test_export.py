@@ -0,0 +1,66 @@
+import json
+import xml.etree.ElementTree as ET
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from culinary.export import export_text, stop_records
+
+STOPS = [
+    {"restaurant_name": "Chez <Léa> & fils", "city": "Paris", "country": "France", "latitude": 48.8566,
+     "longitude": 2.3522, "cuisines": "French, Bistro", "price_level": "€€-€€€", "avg_rating": 4.5,
+     "total_reviews_count": 120, "address": pd.NA},
+    {"restaurant_name": "Trattoria", "city": "Inconnue", "country": "Italy", "latitude": 41.9028,
+     "longitude": 12.4964, "cuisines": pd.NA, "price_level": "Inconnu", "avg_rating": np.nan,
+     "total_reviews_count": pd.NA},
+]
+# Colonnes d'un snapshot (index = row_id) ; le trip ne garde que ses row_id, dans l'ordre
+SNAPSHOT = pd.DataFrame(STOPS + [dict(STOPS[0], restaurant_name="Hors trip")], index=[10, 3, 7])
+SNAPSHOT["city"] = SNAPSHOT["city"].astype("category")
+ROW_IDS = np.array([10, 3])
+
+
+def test_geojson_points_and_route():
+    data = json.loads(export_text("geojson", SNAPSHOT, ROW_IDS))
+    points, line = data["features"][:2], data["features"][2]
+    assert [p["properties"]["day"] for p in points] == [1, 2]
+    assert points[0]["geometry"]["coordinates"] == [2.3522, 48.8566]
+    # NA et libellés « Inconnu(e) » exportés vides, nombres manquants en null
+    assert points[1]["properties"]["city"] == ""
+    assert points[1]["properties"]["cuisines"] == ""
+    assert points[1]["properties"]["avg_rating"] is None
+    assert points[1]["properties"]["total_reviews_count"] is None
+    assert line["geometry"]["type"] == "LineString" and len(line["geometry"]["coordinates"]) == 2
+
+
+def test_gpx_is_valid_xml_with_escaped_names():
+    root = ET.fromstring(export_text("gpx", SNAPSHOT, ROW_IDS))
+    ns = {"g": "http://www.topografix.com/GPX/1/1"}
+    waypoints = root.findall("g:wpt", ns)
+    assert [w.find("g:name", ns).text for w in waypoints] == ["Day 1: Chez <Léa> & fils", "Day 2: Trattoria"]
+    assert len(root.findall("g:rte/g:rtept", ns)) == 2
+
+
+def test_ics_events_folded_and_stable():
+    text = export_text("ics", SNAPSHOT, ROW_IDS, start=date(2024, 6, 1))
+    lines = text.split("\r\n")
+    assert all(len(line.encode()) <= 75 for line in lines)
+    assert text.count("BEGIN:VEVENT") == 2
+    assert "DTSTART;VALUE=DATE:20240602" in text
+    assert "LOCATION:Paris\\, France" in text
+    assert "<NA>" not in text
+    uids = [line for line in lines if line.startswith("UID:")]
+    again = [line for line in export_text("ics", SNAPSHOT, ROW_IDS, start=date(2024, 6, 1)).split("\r\n") if line.startswith("UID:")]
+    assert uids == again
+
+
+def test_stop_records_follow_trip_order_and_compute_fields():
+    cost = {"estimated_cost": lambda stop: 30.0 if stop["price_level"] == "€€-€€€" else None}
+    stops = list(stop_records(SNAPSHOT, [3, 10, 3], computed=cost))
+    assert [s["restaurant_name"] for s in stops] == ["Trattoria", "Chez <Léa> & fils", "Trattoria"]
+    assert stops[1]["city"] == "Paris" and stops[1]["estimated_cost"] == 30.0
+    assert set(stops[0]) >= {"latitude", "longitude", "address"}
+    with pytest.raises(KeyError):
+        list(stop_records(SNAPSHOT, [10, 99]))
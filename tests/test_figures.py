@@ -0,0 +1,16 @@
+from culinary.figures import rows_key, state_key
+
+
+def test_state_key_keeps_sequence_order():
+    assert state_key({"location": (48.85, 2.35)}) != state_key({"location": (2.35, 48.85)})
+    assert state_key({"ranked": ["Pizza", "Italian"]}) != state_key({"ranked": ["Italian", "Pizza"]})
+
+
+def test_state_key_ignores_dict_and_set_order():
+    assert state_key({"a": 1, "b": {"Italy", "France"}}) == state_key({"b": {"France", "Italy"}, "a": 1})
+    assert state_key("maps/v1?country=France") == state_key("maps/v1?country=France")
+
+
+def test_rows_key_depends_on_version_and_order():
+    assert rows_key("v1", [3, 1, 2]) != rows_key("v1", [1, 2, 3])
+    assert rows_key("v1", [1, 2, 3]) != rows_key("v2", [1, 2, 3])
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from culinary.data import with_labels
+from culinary.geo import RATING_BINS, GeoHierarchy
+
+
+@pytest.fixture(scope="module")
+def geo(restaurants):
+    return GeoHierarchy(restaurants)
+
+
+@pytest.mark.parametrize("depth", [1, 2, 3])
+def test_rollups_match_direct_groupby(restaurants, geo, depth):
+    levels = geo.levels[:depth]
+    keys = with_labels(restaurants, levels).astype(str)
+    rows = restaurants.assign(**{level: keys[level] for level in levels})
+    expected = rows.groupby(levels).agg(
+        count=("avg_rating", "size"), mean_rating=("avg_rating", "mean"),
+        lat=("latitude", "mean"), lon=("longitude", "mean"),
+        south=("latitude", "min"), north=("latitude", "max"),
+        west=("longitude", "min"), east=("longitude", "max"),
+    )
+    table = geo.rollups[levels[-1]]
+    assert table.index.tolist() == expected.index.tolist()
+    assert table["count"].tolist() == expected["count"].tolist()
+    for column in ["mean_rating", "lat", "lon", "south", "north", "west", "east"]:
+        np.testing.assert_allclose(table[column], expected[column], rtol=1e-6, err_msg=column)
+
+
+def test_node_children_and_combine(restaurants, geo):
+    italy = geo.node(("Italy",))
+    assert geo.children(("Italy",))["count"].sum() == italy["count"] == (restaurants["country"] == "Italy").sum()
+    assert geo.node()["count"] == len(restaurants)
+
+    both = restaurants[restaurants["country"].isin(["France", "Italy"])]
+    combined = geo.combine([("France",), ("Italy",)])
+    assert combined["count"] == len(both)
+    assert combined["mean_rating"] == pytest.approx(both["avg_rating"].mean(), rel=1e-6)
+    assert combined["north"] == pytest.approx(both["latitude"].max())
+
+
+def test_rating_distribution_matches_value_counts(restaurants, geo):
+    italy = restaurants[restaurants["country"] == "Italy"]
+    expected = (italy["avg_rating"] * 2).round().div(2).value_counts().reindex(RATING_BINS, fill_value=0)
+    distribution = geo.rating_distribution(("Italy",))
+    assert list(distribution.index) == list(RATING_BINS)
+    assert distribution.tolist() == expected.tolist()
+
+
+def test_view_frames_the_selection(geo):
+    (lat, lon), zoom = geo.view([("Italy",)])
+    assert 36 < lat < 48 and 6 < lon < 19 and 0 <= zoom <= 12
+    assert geo.view() == geo.view([])
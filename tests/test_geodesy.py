@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from culinary.geodesy import (
+    central_angle, distance_matrix, fit_bounds, haversine_km, nearest_km, path_length_km, spherical_centroid,
+)
+
+PARIS = (48.8566, 2.3522)
+ROME = (41.9028, 12.4964)
+
+
+@pytest.mark.parametrize("dtype", [np.int64, np.float32, np.float64])
+def test_central_angle_dtypes(dtype):
+    lat = np.array([1, 2], dtype=dtype)
+    lon = np.array([0, 1], dtype=dtype)
+    angle = central_angle(0.1, 0.1, lat, lon)
+    # Entiers calculés en float64, flottants gardés dans leur type
+    assert angle.dtype == (np.float64 if dtype is np.int64 else dtype)
+    expected = central_angle(0.1, 0.1, lat.astype(np.float64), lon.astype(np.float64))
+    np.testing.assert_allclose(angle, expected, rtol=1e-6)
+
+
+def test_haversine_paris_rome():
+    d = haversine_km(*PARIS, [ROME[0]], [ROME[1]])
+    assert d[0] == pytest.approx(1105.8, abs=1.0)
+    assert path_length_km([PARIS[0], ROME[0], PARIS[0]], [PARIS[1], ROME[1], PARIS[1]]) == pytest.approx(2 * d[0])
+
+
+def test_blocked_pairs_match_full_matrix():
+    rng = np.random.default_rng(0)
+    lat, lon = rng.uniform(-60, 60, 50), rng.uniform(-180, 180, 50)
+    full = distance_matrix(lat, lon, dtype=np.float64)
+    small = distance_matrix(lat, lon, dtype=np.float64, max_bytes=1000)
+    np.testing.assert_allclose(full, small)
+    index, dist = nearest_km(lat[:5], lon[:5], lat[5:], lon[5:], dtype=np.float64, max_bytes=1000)
+    np.testing.assert_array_equal(index, full[:5, 5:].argmin(axis=1))
+
+
+def test_antimeridian_centroid_and_bounds():
+    lat, lon = [10.0, 10.0], [179.0, -179.0]
+    center_lat, center_lon = spherical_centroid(lat, lon)
+    assert center_lat == pytest.approx(10.0, abs=0.01)
+    assert abs(center_lon) == pytest.approx(180.0)
+    south, west, north, east = fit_bounds(lat, lon)
+    assert (south, north) == (10.0, 10.0)
+    assert (west, east) == pytest.approx((179.0, 181.0))
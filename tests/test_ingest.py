@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+from culinary.data import ALL_COLUMNS
+from culinary.ingest import duplicate_rows, ingest
+
+
+def raw(rows):
+    df = pd.DataFrame(rows)
+    for col in ALL_COLUMNS:
+        if col not in df:
+            df[col] = pd.NA
+    return df[ALL_COLUMNS]
+
+
+BASE = {"country": "Italy", "region": "Lombardy", "latitude": 45.4642, "longitude": 9.19,
+        "avg_rating": 4.5, "total_reviews_count": 10.0, "cuisines": "Italian, Pizza", "price_level": "€"}
+
+
+def test_sentinels_whitespace_and_aliases():
+    df, report = ingest(raw([
+        {**BASE, "restaurant_name": "  Da   Mario ", "city": "Milano", "region": "N/A"},
+        {**BASE, "restaurant_name": "Luigi", "city": "Milan", "latitude": 45.47},
+        {**BASE, "restaurant_name": "Bar Roma", "city": "roma", "latitude": 41.9, "longitude": 12.5},
+    ]))
+    assert df["restaurant_name"].tolist()[0] == "Da Mario"
+    assert pd.isna(df["region"].iloc[0])
+    assert df["city"].astype(str).tolist() == ["Milan", "Milan", "Rome"]
+    assert report.renamed["city"] == {"Milano": "Milan", "roma": "Rome"}
+    assert report.sentinels_nulled["region"] == 1
+    assert df["cuisine_main"].astype(str).tolist() == ["Italian"] * 3
+    assert isinstance(df["country"].dtype, pd.CategoricalDtype) and df["avg_rating"].dtype == np.float32
+
+
+def test_unusable_rows_dropped():
+    df, report = ingest(raw([
+        {**BASE, "restaurant_name": "A", "city": "Milan"},
+        {**BASE, "restaurant_name": "B", "city": "Milan", "latitude": np.nan},
+        {**BASE, "restaurant_name": "C", "city": "Milan", "avg_rating": 7.0},
+    ]))
+    assert df["restaurant_name"].tolist() == ["A"]
+    assert report.dropped_missing == 2 and report.rows_out == 1
+
+
+def test_duplicates_keep_most_reviewed():
+    df, report = ingest(raw([
+        {**BASE, "restaurant_name": "Trattoria", "city": "Milan", "total_reviews_count": 5.0},
+        # Même nom (accents/casse), 30 m plus loin : doublon, plus d'avis -> gardé
+        {**BASE, "restaurant_name": "TRATTORIA", "city": "Milan", "latitude": 45.46447, "total_reviews_count": 50.0},
+        # Même nom à 2 km : autre restaurant
+        {**BASE, "restaurant_name": "Trattoria", "city": "Milan", "latitude": 45.4822},
+        # Autre nom au même endroit
+        {**BASE, "restaurant_name": "Osteria", "city": "Milan"},
+    ]))
+    assert report.duplicates_removed == 1
+    assert sorted(df["total_reviews_count"].tolist()) == [10.0, 10.0, 50.0]
+
+
+def test_duplicate_rows_without_candidates():
+    df = pd.DataFrame({"restaurant_name": ["A", "B"], "latitude": [0.0, 0.0], "longitude": [0.0, 0.0],
+                       "total_reviews_count": [1.0, 2.0]})
+    assert len(duplicate_rows(df)) == 0
@@ -0,0 +1,44 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from culinary.loadtest import report, run
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    """200 sur /ok, 404 ailleurs ; connexions keep-alive comme le service."""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"{}"
+        self.send_response(200 if self.path.startswith("/ok") else 404)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), OkHandler)
+    httpd.daemon_threads = True
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    thread.join()
+
+
+def test_run_counts_timings_and_errors_per_route(server):
+    results = run(server, concurrency=2, duration=0.3, paths=["/ok?n=1", "/missing"])
+    assert results["timings"]["/ok"] and results["timings"]["/missing"]
+    assert results["errors"]["/ok"] == 0
+    assert results["errors"]["/missing"] == len(results["timings"]["/missing"])
+    assert results["throughput"] > 0
+
+    lines = report(results).splitlines()
+    assert [line.split()[0] for line in lines[1:3]] == ["/missing", "/ok"]
+    assert lines[-1].startswith("débit :")
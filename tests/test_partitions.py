@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+from culinary.data import read_raw, with_labels
+from culinary.ingest import ingest
+from culinary.partitions import Catalog, PartitionCache, write_partitions
+from synthetic import synthetic_frame
+
+
+@pytest.fixture(scope="module")
+def written(tmp_path_factory):
+    folder = tmp_path_factory.mktemp("partitions")
+    raw = folder / "raw.csv"
+    synthetic_frame(3000, seed=7).to_csv(raw, index=False)
+    df, _ = ingest(read_raw(raw))
+    catalog = Catalog(write_partitions(df, folder))
+    return df, folder, catalog
+
+
+def test_catalog_describes_partitions(written):
+    df, folder, catalog = written
+    assert Catalog.read(folder).partitions == catalog.partitions
+    assert catalog.total_rows == len(df)
+    assert catalog.rows(["France", "Italy", "Atlantis"]) == int(df["country"].isin(["France", "Italy"]).sum())
+    portugal = with_labels(df[df["country"] == "Portugal"], ["price_level"])
+    assert catalog.options("price_level", ["Portugal"]) == sorted(portugal["price_level"].astype(str).unique())
+    center, zoom = catalog.view(["Spain"])
+    assert 35 < center[0] < 45 and -10 < center[1] < 2 and zoom >= 1
+
+
+def test_load_keeps_row_ids_and_order(written):
+    df, folder, catalog = written
+    cache = PartitionCache(folder, catalog)
+    part = cache.load(["Italy", "France"])
+    expected = df[df["country"].isin(["France", "Italy"])]
+    assert part.index.tolist() == expected.index.tolist()
+    pd.testing.assert_series_equal(part["restaurant_name"], expected["restaurant_name"], check_dtype=False)
+    assert cache.get("France") is cache.get("France")
+
+
+def test_empty_selection_reads_no_file(written, monkeypatch):
+    df, folder, catalog = written
+    cache = PartitionCache(folder, catalog)
+    monkeypatch.setattr(pd, "read_parquet", lambda *a, **k: pytest.fail("partition lue"))
+    empty = cache.load([])
+    assert empty.empty
+    assert list(empty.columns) == list(df.columns)
+    assert dict(empty.dtypes.astype(str)) == dict(df.dtypes.astype(str))
+
+
+def test_lru_respects_byte_budget(written):
+    _, folder, catalog = written
+    cache = PartitionCache(folder, catalog, max_bytes=1)
+    for country in catalog.countries:
+        cache.get(country)
+    assert cache.stats()["partitions"] == 1
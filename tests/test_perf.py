@@ -0,0 +1,222 @@
+"""Garde-fous de performance du pipeline de données, sur des datasets synthétiques fixes.
+
+Pour chaque dataset (graine et taille fixes, CSV écrit en local : aucun accès
+réseau), on mesure :
+
+* ``build``    : ingestion du CSV + écriture du snapshot (partitions, pools, index),
+  meilleur ratio sur ``BUILD_REPEATS`` reconstructions ;
+* ``load``     : lecture du snapshot + libellés des colonnes affichées (comme les pages) ;
+* ``peak_rss`` : pic de mémoire d'un processus neuf qui charge le snapshot et filtre ;
+* ``filter``   : ``filter_rows`` sur un jeu de filtres fixe (médiane) ;
+* ``topn``     : ``top_rows`` (note puis avis) sur les mêmes filtres (médiane) ;
+* ``scoring``  : ``culinary.scoring.top_k`` avec un profil complet (médiane), version
+  réduite du benchmark 1M lignes de ``python -m culinary.scoring``.
+
+Les valeurs absolues dépendent de la machine : chaque mesure est divisée par le
+temps d'une charge de référence NumPy / pandas exécutée juste avant elle (une
+variation de charge de la machine pèse alors sur les deux à la fois), et la
+mémoire ajoutée au pic par celle d'un processus qui importe les mêmes modules
+sans rien charger. Ce sont ces ratios qui sont comparés à ``perf_baselines.json`` : le test
+échoue si un ratio dépasse la référence de plus de ``CULINARY_PERF_TOLERANCE``
+(50 % par défaut pour les temps, ``CULINARY_PERF_RSS_TOLERANCE`` = 20 % pour la
+mémoire).
+
+Lancer / mettre à jour les références (après un changement voulu) ::
+
+    python -m pytest tests/test_perf.py -q
+    CULINARY_PERF_UPDATE=1 python -m pytest tests/test_perf.py -q
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from culinary.data import with_labels
+from culinary.queries import filter_rows, top_rows
+from culinary.scoring import Profile, ScoringData, top_k
+from culinary.snapshots import SnapshotStore
+from synthetic import synthetic_frame
+
+pytestmark = pytest.mark.perf
+
+BASELINES = Path(__file__).with_name("perf_baselines.json")
+UPDATE = os.environ.get("CULINARY_PERF_UPDATE") == "1"
+TIME_TOLERANCE = float(os.environ.get("CULINARY_PERF_TOLERANCE", 0.5))
+RSS_TOLERANCE = float(os.environ.get("CULINARY_PERF_RSS_TOLERANCE", 0.2))
+
+DATASETS = {"small": 20_000, "large": 100_000}
+REPEATS = 15
+# Le build dure plusieurs secondes : trop long pour une médiane, et une mesure isolée est
+# à la merci d'un pic de charge (GC, disque, autre processus). Le meilleur ratio de
+# quelques builds ne garde que le coût propre du build.
+BUILD_REPEATS = 3
+RSS_METRICS = {"peak_rss"}
+
+PAGE_COLUMNS = ["restaurant_name", "country", "region", "city", "price_level", "cuisines", "cuisine_main"]
+FILTER_SETS = [
+    {"country": ["France"], "min_rating": 4.0},
+    {"country": ["Italy", "Spain"], "cuisine": ["Italian", "Pizza"], "min_rating": 3.5},
+    {"cuisine": ["Japanese"], "price": ["€€€€"]},
+    {"city": ["Paris", "Rome", "Berlin"], "min_rating": 4.5},
+]
+PROFILE = Profile(cuisines={"Italian": 1.0, "Pizza": 0.6}, budget="€€-€€€", location=(48.85, 2.35))
+
+
+# ==============================
+# 🔹 DATASETS SYNTHÉTIQUES
+# ==============================
+@pytest.fixture(scope="module", params=list(DATASETS))
+def dataset(request, tmp_path_factory):
+    """(nom, dossier, CSV) d'un dataset synthétique écrit en local."""
+    name = request.param
+    folder = tmp_path_factory.mktemp(f"perf-{name}")
+    csv = folder / "restaurants.csv"
+    synthetic_frame(DATASETS[name]).to_csv(csv, index=False)
+    return name, folder, csv
+
+
+# ==============================
+# 🔹 RÉFÉRENCES
+# ==============================
+def _elapsed_s(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def _reference_workload():
+    """Tri, groupby et calcul vectorisé sur 1M de valeurs : l'étalon de vitesse de la machine."""
+    rng = np.random.default_rng(0)
+    values = rng.random(1_000_000)
+    keys = rng.integers(0, 1_000, len(values))
+    np.sort(values)
+    pd.Series(values).groupby(keys).mean()
+    np.sqrt(values * values + 1.0).sum()
+
+
+def _ratio(fn, repeats: int = REPEATS, reduce=np.median, warmup: bool = True) -> float:
+    """Temps de ``fn`` en multiple de la référence, chaque mesure appariée à une référence prise juste avant."""
+    if warmup:
+        fn()   # échauffement (caches, imports paresseux)
+    ratios = []
+    for _ in range(repeats):
+        reference = _elapsed_s(_reference_workload)
+        ratios.append(_elapsed_s(fn) / reference)
+    return float(reduce(ratios))
+
+
+def _check(dataset_name: str, metrics: dict):
+    """Compare les ratios ``metrics`` aux références (ou les enregistre avec CULINARY_PERF_UPDATE=1)."""
+    baselines = json.loads(BASELINES.read_text()) if BASELINES.exists() else {}
+    if UPDATE:
+        baselines.setdefault(dataset_name, {}).update({k: round(v, 4) for k, v in metrics.items()})
+        BASELINES.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        return
+
+    recorded = baselines.get(dataset_name, {})
+    missing = sorted(set(metrics) - set(recorded))
+    if missing:
+        pytest.skip(f"pas de référence pour {dataset_name}: {missing} (CULINARY_PERF_UPDATE=1 pour les créer)")
+
+    regressions = []
+    for metric, value in metrics.items():
+        tolerance = RSS_TOLERANCE if metric in RSS_METRICS else TIME_TOLERANCE
+        limit = recorded[metric] * (1 + tolerance)
+        if value > limit:
+            regressions.append(f"{metric}: {value:.4f} > {limit:.4f} (référence {recorded[metric]})")
+    assert not regressions, f"régressions sur {dataset_name} :\n" + "\n".join(regressions)
+
+
+# ==============================
+# 🔹 MESURES
+# ==============================
+def synthetic_snapshot_df(folder: Path, csv: Path) -> pd.DataFrame:
+    """DataFrame du snapshot du dataset (construit au premier appel)."""
+    return SnapshotStore(root=folder / "snapshots", source_url=str(csv)).current().df
+
+
+def test_build_and_load(dataset):
+    name, folder, csv = dataset
+    store = SnapshotStore(root=folder / "snapshots", source_url=str(csv))
+    build = _ratio(lambda: store.refresh(force=True), repeats=BUILD_REPEATS, reduce=min, warmup=False)
+
+    snapshot = store.current()
+
+    def load():
+        df = pd.read_parquet(snapshot.folder / "restaurants.parquet")
+        return with_labels(df, PAGE_COLUMNS)
+
+    _check(name, {"build": build, "load": _ratio(load, repeats=5)})
+
+
+def test_filter_and_top_latency(dataset):
+    name, folder, csv = dataset
+    df = synthetic_snapshot_df(folder, csv)
+
+    def filters():
+        for f in FILTER_SETS:
+            filter_rows(df, f)
+
+    def top():
+        for f in FILTER_SETS:
+            top_rows(df, f, n=10)
+
+    _check(name, {"filter": _ratio(filters), "topn": _ratio(top)})
+
+
+def test_scoring_latency(dataset):
+    name, folder, csv = dataset
+    data = ScoringData.from_frame(synthetic_snapshot_df(folder, csv))
+    # Moins d'une milliseconde sur le petit dataset : plus de répétitions pour une médiane stable
+    _check(name, {"scoring": _ratio(lambda: top_k(data, PROFILE, k=10), repeats=60)})
+
+
+# Processus neuf : le pic de mémoire ne mesure que le chargement et les requêtes.
+# En mode "imports-only", le même processus s'arrête après les imports (référence).
+# Sous Linux, ``ru_maxrss`` hérite du pic du processus parent (fork avant exec) :
+# on lit VmHWM, remis à zéro par exec, et ``ru_maxrss`` ailleurs (octets sous macOS).
+RSS_SCRIPT = """
+import resource, sys
+from culinary.data import with_labels
+from culinary.queries import filter_rows, top_rows
+from culinary.snapshots import SnapshotStore
+if sys.argv[3] == "full":
+    snapshot = SnapshotStore(root=sys.argv[1], source_url=sys.argv[2]).current()
+    df = snapshot.df
+    labels = with_labels(df, {columns!r})
+    for f in {filters!r}:
+        filter_rows(df, f)
+        top_rows(df, f, n=10)
+try:
+    with open("/proc/self/status") as status:
+        peak_kb = next(int(line.split()[1]) for line in status if line.startswith("VmHWM:"))
+except (OSError, StopIteration):
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_kb = peak / 1024 if sys.platform == "darwin" else peak
+print(peak_kb / 1024)
+"""
+
+
+def _peak_rss_mb(folder: Path, csv: Path, mode: str) -> float:
+    script = RSS_SCRIPT.format(columns=PAGE_COLUMNS, filters=FILTER_SETS)
+    out = subprocess.run(
+        [sys.executable, "-c", script, str(folder / "snapshots"), str(csv), mode],
+        check=True, capture_output=True, text=True,
+        env={**os.environ, "PYTHONPATH": str(Path(__file__).resolve().parent.parent)},
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def test_peak_rss(dataset):
+    pytest.importorskip("resource")
+    name, folder, csv = dataset
+    synthetic_snapshot_df(folder, csv)
+    imports = _peak_rss_mb(folder, csv, "imports-only")
+    # Mémoire ajoutée par le snapshot et les requêtes, en multiple de celle des imports
+    _check(name, {"peak_rss": (_peak_rss_mb(folder, csv, "full") - imports) / imports})
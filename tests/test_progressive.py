@@ -0,0 +1,69 @@
+import contextlib
+import threading
+
+import numpy as np
+
+from culinary.progressive import cached_job, preview_positions, show_progressively, submit
+
+
+class FakeCache:
+    """Comme une fonction ``st.cache_resource`` : un ``Future`` par clé, ``clear(clé)``."""
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.entries = {}
+
+    def __call__(self, key):
+        if key not in self.entries:
+            self.entries[key] = submit(self.fn)
+        return self.entries[key]
+
+    def clear(self, key):
+        self.entries.pop(key, None)
+
+
+class FakeSlot:
+    def container(self):
+        return contextlib.nullcontext()
+
+
+def test_cached_job_resubmits_failed_future():
+    attempts = []
+
+    def build():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("échec passager")
+        return "figure"
+
+    cache = FakeCache(build)
+    failed = cache("k")
+    assert isinstance(failed.exception(), RuntimeError)
+    assert cached_job(cache, "k").result() == "figure"
+    assert cached_job(cache, "k") is cache.entries["k"]
+    assert len(attempts) == 2
+
+
+def test_preview_positions_evenly_spaced():
+    np.testing.assert_array_equal(preview_positions(5, max_rows=10), np.arange(5))
+    positions = preview_positions(10_000, max_rows=100)
+    assert len(positions) == 100 and positions[0] == 0 and positions[-1] == 9_999
+    assert np.all(np.diff(positions) > 0)
+
+
+def test_show_progressively_previews_slow_results():
+    release = threading.Event()
+    shown = []
+    future = submit(lambda: release.wait(5) and "exact")
+    threading.Timer(0.2, release.set).start()
+    result = show_progressively(
+        FakeSlot(), future, lambda: shown.append("preview"), lambda r: shown.append(r), budget_s=0.01,
+    )
+    assert result == "exact"
+    assert shown == ["preview", "exact"]
+
+
+def test_show_progressively_without_preview_waits():
+    shown = []
+    show_progressively(FakeSlot(), submit(lambda: 42), None, shown.append, budget_s=0)
+    assert shown == [42]
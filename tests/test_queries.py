@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from culinary.queries import build_nearby_index, filter_rows, nearby_rows, parse_trip, top_rows, trip_rows
+
+
+def test_parse_trip():
+    assert parse_trip("Rome:2,Paris:3") == {"Rome": 2, "Paris": 3}
+    # Morceaux mal formés ignorés, jours bornés à 1..30, « : » dans le nom de ville conservé
+    assert parse_trip("Rome,Paris:x,Nice:0,Lyon:99,Saint:Malo:2,") == {"Nice": 1, "Lyon": 30, "Saint:Malo": 2}
+    assert parse_trip("") == {}
+
+
+def test_filter_rows_matches_pandas(restaurants):
+    df = restaurants
+    filters = {"country": ["France", "Italy"], "cuisine": ["Pizza"], "min_rating": 4.0, "region": []}
+    expected = df[df["country"].isin(["France", "Italy"]) & (df["cuisine_main"] == "Pizza") & (df["avg_rating"] >= 4)]
+    assert filter_rows(df, filters).tolist() == expected.index.tolist()
+    # Valeur absente des catégories : aucun résultat, pas d'erreur
+    assert len(filter_rows(df, {"country": ["Atlantis"]})) == 0
+
+
+def test_top_rows_rating_then_reviews(restaurants):
+    df = restaurants
+    rows = top_rows(df, {"city": ["Paris"]}, n=10)
+    top = df.loc[rows]
+    keys = list(zip(-top["avg_rating"], -top["total_reviews_count"]))
+    assert keys == sorted(keys)
+    best = df[df["city"] == "Paris"].sort_values(["avg_rating", "total_reviews_count"], ascending=False, kind="stable")
+    assert rows.tolist() == best.index[:10].tolist()
+
+
+def test_nearby_rows_sorted_within_radius(restaurants):
+    df = restaurants
+    grid = build_nearby_index(df)
+    lat, lon = float(df["latitude"].iloc[0]), float(df["longitude"].iloc[0])
+    rows, dist = nearby_rows(df, grid, lat, lon, radius_km=50, n=20)
+    # Coordonnées de la grille en float32 : quelques centimètres près
+    assert rows[0] == df.index[0] and dist[0] == pytest.approx(0, abs=1e-3)
+    assert np.all(np.diff(dist) >= 0) and np.all(dist <= 50)
+
+
+def test_trip_rows_warns_for_missing_cities(restaurants):
+    result = trip_rows(restaurants, {"Atlantis": 2, "Rome": 1})
+    assert result["warnings"] == ["No restaurants found for Atlantis with these filters."]
+    assert len(result["row_ids"]) == 1
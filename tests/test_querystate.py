@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from culinary.querystate import (
+    FLOAT, LIST, TEXT, ResultCache, decode, encode, float_text, query_string, slider_value,
+)
+
+SPEC = {"country": LIST, "min_rating": FLOAT, "trip": TEXT}
+
+
+def test_encode_is_canonical():
+    a = encode({"country": ["Italy", "France", "Italy"], "min_rating": 4.50, "trip": ""}, SPEC)
+    b = encode({"country": ["France", "Italy"], "min_rating": 4.5}, SPEC)
+    assert a == b == {"country": ["France", "Italy"], "min_rating": "4.5"}
+    assert query_string(a) == "country=France&country=Italy&min_rating=4.5"
+
+
+def test_float_keys_keep_full_precision():
+    spec = {"lat": FLOAT, "lon": FLOAT}
+    a = encode({"lat": 48.85661, "lon": 2.3522}, spec)
+    b = encode({"lat": 48.85669, "lon": 2.3522}, spec)
+    assert query_string(a) != query_string(b)
+    for value in (48.85661, 0.1 + 0.2, 1e-7, -3.0, 12345678.123456789):
+        assert float(float_text(value)) == value
+    assert float_text(4.0) == "4" and float_text(4.5) == "4.5"
+
+
+def test_decode_ignores_malformed_values():
+    raw = {"country": ["France", "France", "Spain"], "min_rating": ["abc"], "trip": ["Rome:2"]}
+    assert decode(lambda name: raw.get(name, []), SPEC) == {"country": ["France", "Spain"], "trip": "Rome:2"}
+
+
+@pytest.mark.parametrize("raw, expected", [
+    (None, 4.0), (7.0, 5.0), (-1.0, 0.0), (4.3, 4.5), (4.2, 4.0), (float("nan"), 4.0), (float("inf"), 4.0),
+])
+def test_slider_value_clamps_and_snaps(raw, expected):
+    assert slider_value(raw, 0.0, 5.0, 0.5, default=4.0) == expected
+
+
+def test_slider_value_fine_step_stays_on_grid():
+    assert slider_value(3.14159, 3.0, 5.0, 0.1, default=4.0) == 3.1
+    assert slider_value(2.0, 3.0, 5.0, 0.1, default=4.0) == 3.0
+
+
+def test_result_cache_evicts_by_bytes():
+    cache = ResultCache(max_bytes=3000)
+    for key in "abc":
+        cache.put(key, np.zeros(100, dtype=np.int64))   # 800 octets chacun
+    cache.get("a")
+    cache.put("d", np.zeros(100, dtype=np.int64))
+    assert cache.get("b") is None and cache.get("a") is not None
+    assert cache.bytes <= 3000
+    assert cache.get_or_compute("e", lambda: np.ones(3)).tolist() == [1, 1, 1]
@@ -0,0 +1,55 @@
+import html
+
+import pandas as pd
+
+from culinary.render import FragmentCache, escape, itinerary_html, result_cards_html
+
+ROWS = pd.DataFrame({
+    "restaurant_name": ["Fish & <Chips>", 'Le "Bistrot"'],
+    "cuisines_clean": ["British", None],
+    "cuisines": ["British", "French"],
+    "city": ["London", "Paris"],
+    "country": ["United Kingdom", "France"],
+    "price_level": ["€", pd.NA],
+    "avg_rating": [4.25, 3.0],
+    "total_reviews_count": [120.0, None],
+}, index=[7, 3])
+
+
+def test_escape_matches_html_escape():
+    names = pd.Series(["L'Osteria", 'Le "Bistrot" <b>', "Fish & Chips", "Plain"])
+    assert escape(names).tolist() == [html.escape(name, quote=True) for name in names]
+    assert escape(ROWS["restaurant_name"]).tolist() == ["Fish &amp; &lt;Chips&gt;", "Le &quot;Bistrot&quot;"]
+    assert escape(ROWS["price_level"]).tolist() == ["€", ""]
+
+
+def test_result_cards_keep_row_order():
+    html = result_cards_html(ROWS)
+    assert html.count('<div class="result-card">') == 2
+    assert html.index("Fish &amp;") < html.index("Bistrot")
+    assert "⭐ 4.2" in html and "0 avis" in html
+
+
+def test_itinerary_adds_a_header_per_city_change():
+    stops = pd.concat([ROWS, ROWS.iloc[[1]]])
+    html = itinerary_html(stops, {"London": 1, "Paris": 2})
+    assert html.count('class="itinerary-city"') == 2
+    assert "Paris — 2 day(s)" in html and "Day 3" in html
+    assert itinerary_html(stops.iloc[:0], {}) == ""
+
+
+def test_fragment_cache_builds_missing_rows_once():
+    calls = []
+
+    def build(df):
+        calls.append(df.index.tolist())
+        return "<b>" + escape(df["restaurant_name"]) + "</b>"
+
+    cache = FragmentCache(build, max_entries=2)
+    first = cache.get("v1", ROWS)
+    assert first == ["<b>Fish &amp; &lt;Chips&gt;</b>", "<b>Le &quot;Bistrot&quot;</b>"]
+    assert cache.get("v1", ROWS.iloc[::-1]) == first[::-1]
+    assert calls == [[7, 3]]
+    # Autre snapshot : nouvelles entrées, les plus anciennes sont évincées
+    cache.get("v2", ROWS.iloc[[0]])
+    assert calls[-1] == [7] and len(cache) == 2
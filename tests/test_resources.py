@@ -0,0 +1,56 @@
+"""Préchauffage et construction des index en parallèle."""
+import threading
+import time
+
+import pytest
+
+import culinary.snapshots as snapshots
+from culinary.resources import DEFAULT_COUNTRIES, _warm
+from culinary.snapshots import SnapshotStore, build_indexes
+from synthetic import synthetic_frame
+
+
+def _slow(fn):
+    def builder(df):
+        time.sleep(0.05)
+        return fn(df), threading.current_thread().name
+    return builder
+
+
+def test_build_indexes_matches_serial_build(restaurants, monkeypatch):
+    builders = {
+        "rows": _slow(len),
+        "cities": _slow(lambda df: sorted(df["city"].astype(str).unique())),
+        "best": _slow(lambda df: df["avg_rating"].idxmax()),
+    }
+    monkeypatch.setattr(snapshots, "INDEX_BUILDERS", builders)
+    serial = {name: builder(restaurants)[0] for name, builder in builders.items()}
+
+    start = time.perf_counter()
+    built = build_indexes(restaurants)
+    assert time.perf_counter() - start < 0.12   # les trois attentes se recouvrent
+    assert list(built) == list(builders)
+    assert {name: value for name, (value, _) in built.items()} == serial
+    assert all(thread.startswith("culinary-index") for _, thread in built.values())
+
+
+def test_build_indexes_surfaces_builder_errors(restaurants, monkeypatch):
+    def broken(df):
+        raise ValueError("index cassé")
+
+    monkeypatch.setattr(snapshots, "INDEX_BUILDERS", {"rows": _slow(len), "broken": broken})
+    with pytest.raises(ValueError, match="index cassé"):
+        build_indexes(restaurants)
+
+
+def test_warm_reads_default_partitions_and_builds_indexes(tmp_path):
+    csv = tmp_path / "restaurants.csv"
+    synthetic_frame(1500, seed=5).to_csv(csv, index=False)
+    SnapshotStore(root=tmp_path / "snapshots", source_url=str(csv)).current()
+    # Processus qui rouvre la version : rien n'est encore en mémoire
+    snapshot = SnapshotStore(root=tmp_path / "snapshots", source_url=str(csv)).current()
+    assert not snapshot.indexes.built
+
+    assert _warm(snapshot) == snapshot.version
+    assert all(c in snapshot.partitions for c in DEFAULT_COUNTRIES if c in snapshot.catalog.partitions)
+    assert snapshot.indexes.built == set(snapshots.INDEX_BUILDERS)
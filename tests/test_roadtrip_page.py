@@ -0,0 +1,59 @@
+"""Page Road Trip : le trip vit dans la session sous forme compacte (row_id + jours par ville)."""
+import functools
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("streamlit")
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import culinary.queries as queries  # noqa: E402
+import culinary.resources as resources  # noqa: E402
+from culinary.snapshots import SnapshotStore  # noqa: E402
+from synthetic import synthetic_frame  # noqa: E402
+
+PAGE = Path(__file__).resolve().parent.parent / "pages" / "Roadtrip2.py"
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    csv = tmp_path / "restaurants.csv"
+    synthetic_frame(2000, seed=11).to_csv(csv, index=False)
+    monkeypatch.setattr(
+        resources, "SnapshotStore",
+        functools.partial(SnapshotStore, root=tmp_path / "snapshots", source_url=str(csv)),
+    )
+    resources.get_store.clear()
+    yield AppTest.from_file(str(PAGE), default_timeout=120)
+    resources.get_store.clear()
+
+
+def test_trip_is_kept_as_row_ids_and_resolved_on_rerun(app, monkeypatch):
+    calls = []
+    trip_rows = queries.trip_rows
+    monkeypatch.setattr(queries, "trip_rows", lambda *a, **k: calls.append(a[1]) or trip_rows(*a, **k))
+
+    app.run()
+    app.button[0].click().run()
+    assert not app.exception
+    assert len(calls) == 1
+
+    results = app.session_state["roadtrip_results"]
+    assert isinstance(results["row_ids"], np.ndarray) and results["row_ids"].dtype == np.int64
+    assert results["days_per_city"] == calls[0] == {"Paris": 2, "Rome": 2, "Nice": 2}
+    # Rien d'autre que des scalaires, les row_id et les petits dicts / tuples de métadonnées
+    assert all(isinstance(v, (np.ndarray, dict, tuple, str, int, float)) for v in results.values())
+
+    snapshot = resources.get_store().current()
+    names = [f"Restaurant: {name}</strong>" for name in snapshot.df.loc[results["row_ids"], "restaurant_name"]]
+
+    # Nouvelle exécution sans clic : les étapes sont relues depuis la session, sans recalcul
+    app.run()
+    assert not app.exception
+    assert len(calls) == 1
+    assert app.session_state["roadtrip_results"]["row_ids"].tolist() == results["row_ids"].tolist()
+    itinerary = next(m.value for m in app.markdown if "itinerary-stop" in m.value)
+    assert all(name in itinerary for name in names)
+    assert itinerary.index(names[0]) < itinerary.index(names[-1])
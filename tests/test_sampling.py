@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from culinary.sampling import StratifiedSample
+
+
+def frame(n=20_000, seed=0):
+    rng = np.random.default_rng(seed)
+    country = rng.choice(["France", "Italy", "Spain"], n, p=[0.5, 0.3, 0.2])
+    cuisine = rng.choice(["Pizza", "French", None], n, p=[0.45, 0.45, 0.1])
+    rating = np.clip(np.where(country == "Italy", 4.2, 3.8) + rng.normal(0, 0.5, n), 1, 5)
+    df = pd.DataFrame({"country": country, "cuisine_main": cuisine, "avg_rating": rating})
+    # Strate rare : deux restaurants seulement
+    return pd.concat([df, pd.DataFrame({"country": ["Malta"] * 2, "cuisine_main": ["Pizza"] * 2,
+                                        "avg_rating": [3.0, 5.0]})], ignore_index=True)
+
+
+def test_counts_are_exact_and_labels_match_pages():
+    df = frame()
+    sample = StratifiedSample(df, size=2000)
+    est = sample.estimate(countries=["Italy"], by="cuisine_main")
+    expected = df[df["country"] == "Italy"]["cuisine_main"].fillna("Inconnue").value_counts()
+    assert est["count"].to_dict() == expected.to_dict()
+
+
+def test_estimate_close_to_exact_mean():
+    df = frame()
+    est = StratifiedSample(df, size=2000).estimate(by="country")
+    exact = df.groupby("country")["avg_rating"].mean()
+    for country in ["France", "Italy", "Spain"]:
+        assert abs(est.at[country, "mean_rating"] - exact[country]) <= est.at[country, "ci"] * 2
+        assert est.at[country, "ci"] > 0
+
+
+def test_fully_sampled_stratum_has_no_error():
+    est = StratifiedSample(frame(), size=2000).estimate(countries=["Malta"])
+    assert est["mean_rating"].iloc[0] == pytest.approx(4.0)
+    assert est["ci"].iloc[0] == 0
+    assert est["sampled"].iloc[0] == 2
+
+
+def test_partially_sampled_strata_keep_two_rows():
+    df = frame()
+    sample = StratifiedSample(df, size=50, min_per_stratum=1)
+    partial = sample.strata[sample.strata["sampled"] < sample.strata["population"]]
+    assert (partial["sampled"] >= 2).all()
+    assert (sample.estimate(by="country")["ci"].drop("Malta") > 0).all()
+
+
+def test_undefined_stratum_variance_uses_pooled_variance():
+    df = frame()
+    spain_pizza = (df["country"] == "Spain") & (df["cuisine_main"] == "Pizza")
+    # Une seule note connue dans la strate : variance non estimable
+    df.loc[spain_pizza, "avg_rating"] = np.nan
+    df.loc[df.index[spain_pizza][0], "avg_rating"] = 4.0
+    sample = StratifiedSample(df, size=2000)
+    est = sample.estimate(countries=["Spain"], cuisines=["Pizza"])
+    assert est["ci"].iloc[0] > 0
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from culinary.scoring import Profile, ScoringData, score, top_k
+
+DF = pd.DataFrame({
+    "cuisines": ["Italian, Pizza", "French", "Pizza", "Japanese", None],
+    "price_level": ["€", "€€€€", "€€-€€€", "€", "Inconnu"],
+    "avg_rating": [4.0, 4.0, 4.0, 4.0, 4.0],
+    "total_reviews_count": [100.0, 100.0, 100.0, 100.0, np.nan],
+    "latitude": [48.85, 45.76, 43.30, 48.86, np.nan],
+    "longitude": [2.35, 4.84, 5.37, 2.34, np.nan],
+})
+
+
+def test_cuisine_weight_orders_matches():
+    data = ScoringData.from_frame(DF)
+    profile = Profile(cuisines={"Italian": 1.0, "Pizza": 0.5}, w_popularity=0, w_rating=0, w_distance=0, w_budget=0)
+    s = score(data, profile)
+    assert s[0] == 1.0 and s[2] == 0.5 and s[1] == 0 and s[3] == 0
+
+
+def test_budget_and_distance():
+    data = ScoringData.from_frame(DF)
+    cheap = score(data, Profile(budget="€", w_cuisine=0, w_popularity=0, w_rating=0, w_distance=0))
+    assert cheap[0] == cheap[3] == 1.0 and cheap[1] == 0.0 and cheap[4] == 0.5   # prix inconnu neutre
+    near = score(data, Profile(location=(48.85, 2.35), w_budget=0, w_popularity=0, w_rating=0))
+    assert near[0] > near[3] > near[1] > near[2]
+    assert near[4] == 0   # sans coordonnées
+
+
+def test_top_k_respects_mask_and_ranking():
+    data = ScoringData.from_frame(DF)
+    profile = Profile(cuisines={"Pizza": 1.0}, location=(48.85, 2.35))
+    positions, scores = top_k(data, profile, k=2)
+    assert positions.tolist() == [0, 2] and scores[0] >= scores[1]
+    positions, _ = top_k(data, profile, k=10, mask=np.array([False, True, False, True, False]))
+    assert sorted(positions.tolist()) == [1, 3]
+    assert len(top_k(data, profile, k=3, mask=np.zeros(5, dtype=bool))[0]) == 0
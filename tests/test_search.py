@@ -0,0 +1,38 @@
+import pandas as pd
+
+from culinary.search import SearchIndex, fold, trigrams
+
+DF = pd.DataFrame({
+    "restaurant_name": ["Crêperie Saint-Malo", "Le Petit Paris", "Pizzeria Roma", "Inconnu", "Sushi Bar"],
+    "city": ["Rennes", "Paris", "Paris", "Lyon", "Paris"],
+    "country": ["France"] * 5,
+    "region": ["Bretagne", "Île-de-France", "Île-de-France", None, "Île-de-France"],
+    "address": [None, "1 rue de Rivoli", None, None, "3 rue Oberkampf"],
+}, index=[10, 11, 12, 13, 14])
+
+
+def test_fold_and_trigrams():
+    assert fold("  Crêperie   Saint-Malo ") == "creperie saint-malo"
+    assert trigrams("ab") == {"  a", " ab", "ab "}
+    assert "ab " not in trigrams("ab", prefix=True)
+
+
+def test_distinct_values_point_to_all_rows():
+    index = SearchIndex(DF)
+    paris = [s for s in index.search("paris") if s.field == "city"][0]
+    assert paris.text == "Paris" and paris.context == "France"
+    assert sorted(paris.rows.tolist()) == [11, 12, 14]
+
+
+def test_typos_and_prefixes():
+    index = SearchIndex(DF)
+    assert index.search("creprie")[0].text == "Crêperie Saint-Malo"
+    assert index.search("pizz")[0].text == "Pizzeria Roma"
+    assert index.search("rivoli", fields=["address"])[0].rows.tolist() == [11]
+
+
+def test_unknown_values_and_empty_queries():
+    index = SearchIndex(DF)
+    assert all(s.text != "Inconnu" for s in index.search("inconnu"))
+    assert index.search("   ") == []
+    assert index.search("zzzzzz") == []
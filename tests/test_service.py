@@ -0,0 +1,61 @@
+import pytest
+
+pytest.importorskip("starlette")
+
+from culinary.querystate import ResultCache  # noqa: E402
+from culinary.service import BadRequest, QueryService  # noqa: E402
+from culinary.snapshots import SnapshotStore  # noqa: E402
+from synthetic import synthetic_frame  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def service(tmp_path_factory):
+    folder = tmp_path_factory.mktemp("service")
+    csv = folder / "restaurants.csv"
+    synthetic_frame(2000, seed=3).to_csv(csv, index=False)
+    return QueryService(SnapshotStore(root=folder / "snapshots", source_url=str(csv)), ResultCache())
+
+
+def test_restaurants_pages_and_json_records(service):
+    first = service.restaurants({"country": ["France"], "limit": 5})
+    second = service.restaurants({"country": ["France"], "limit": 5, "offset": 5})
+    assert first["total"] == second["total"] > 10
+    assert len(first["results"]) == 5
+    assert {r["row_id"] for r in first["results"]}.isdisjoint(r["row_id"] for r in second["results"])
+    assert all(r["country"] == "France" for r in first["results"])
+
+
+def test_top_is_cached_per_canonical_query(service):
+    before = service.cache.stats()
+    a = service.top({"country": ["Spain", "Italy"], "n": 3})
+    b = service.top({"country": ["Italy", "Spain"], "n": 3})
+    assert a == b
+    ratings = [r["avg_rating"] for r in a["results"]]
+    assert ratings == sorted(ratings, reverse=True)
+    assert service.cache.stats()["hits"] == before["hits"] + 1
+
+
+def test_nearby_and_trip(service):
+    with pytest.raises(BadRequest):
+        service.nearby({"lat": 48.85})
+    stop = service.top({"city": ["Paris"], "n": 1})["results"][0]
+    nearby = service.nearby({"lat": stop["latitude"], "lon": stop["longitude"], "radius_km": 5, "n": 3})
+    distances = [r["distance_km"] for r in nearby["results"]]
+    assert distances == sorted(distances) and distances[0] == pytest.approx(0, abs=1e-3)
+
+    trip = service.trip({"trip": "Paris:2,Rome:1"})
+    assert [s["city"] for s in trip["stops"]] == ["Paris", "Paris", "Rome"]
+    kind, chunks = service.trip({"trip": "Paris:2", "format": "gpx"})
+    assert kind == "gpx" and "<gpx" in "".join(chunks)
+    with pytest.raises(BadRequest):
+        service.trip({"trip": "Paris:2", "format": "pdf"})
+    with pytest.raises(BadRequest):
+        service.trip({"trip": "Paris:2", "format": "ics", "start": "demain"})
+
+
+def test_nearby_cache_keys_keep_coordinate_precision(service):
+    # 48.85661 et 48.85664 (~3 m) ont les mêmes 6 chiffres significatifs : « 48.8566 »
+    service.nearby({"lat": 48.85661, "lon": 2.3522, "radius_km": 100, "n": 3})
+    misses = service.cache.stats()["misses"]
+    service.nearby({"lat": 48.85664, "lon": 2.3522, "radius_km": 100, "n": 3})
+    assert service.cache.stats()["misses"] == misses + 1
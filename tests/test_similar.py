@@ -0,0 +1,33 @@
+import pandas as pd
+
+from culinary.similar import SimilarityIndex, split_cuisines
+
+DF = pd.DataFrame({
+    "cuisines": ["Italian, Pizza", "Pizza, Italian", "Japanese, Sushi", "Italian", "Inconnue"],
+    "price_level": ["€", "€", "€€€€", "€", pd.NA],
+    "avg_rating": [4.5, 4.5, 4.5, 4.0, 3.0],
+    "total_reviews_count": [100.0, 120.0, 100.0, 80.0, 0.0],
+    "latitude": [48.85, 48.86, 48.85, 43.30, 48.85],
+    "longitude": [2.35, 2.34, 2.35, 5.37, 2.35],
+}, index=[100, 101, 102, 103, 104])
+
+
+def test_split_cuisines_drops_unknown():
+    tags = split_cuisines(DF["cuisines"])
+    assert tags[tags.index == 0].tolist() == ["Italian", "Pizza"]
+    assert 4 not in tags.index
+
+
+def test_similar_prefers_same_cuisine_and_place():
+    index = SimilarityIndex(DF)
+    result = index.similar(100, k=3)
+    assert 100 not in result.index
+    assert result.index[0] == 101
+    assert result.is_monotonic_decreasing
+
+
+def test_similar_mask_and_small_candidate_sets():
+    index = SimilarityIndex(DF)
+    mask = DF["price_level"].eq("€€€€").fillna(False).to_numpy()
+    assert index.similar(100, k=5, mask=mask).index.tolist() == [102]
+    assert index.similar(100, k=5, mask=[False] * 5).empty
@@ -0,0 +1,32 @@
+import numpy as np
+
+from culinary.sketches import REVIEWS_ALPHA, DistributionSketches
+
+
+def test_rating_quantiles_exact(restaurants):
+    df = restaurants
+    sketch = DistributionSketches(df).merge(countries=["Italy"])
+    ratings = df.loc[df["country"] == "Italy", "avg_rating"].to_numpy(dtype=float)
+    assert sketch.count == len(ratings)
+    for q in (0.1, 0.5, 0.9):
+        assert sketch.rating_quantiles([q])[0] == np.quantile(ratings, q, method="inverted_cdf")
+
+
+def test_reviews_quantiles_within_relative_error(restaurants):
+    df = restaurants
+    sketch = DistributionSketches(df).merge(cuisines=["Pizza", "Bar"])
+    reviews = df.loc[df["cuisine_main"].isin(["Pizza", "Bar"]), "total_reviews_count"].to_numpy(dtype=float)
+    for q in (0.25, 0.5, 0.9, 0.99):
+        exact = np.quantile(reviews, q, method="inverted_cdf")
+        estimate = sketch.reviews_quantiles([q])[0]
+        assert abs(estimate - exact) <= REVIEWS_ALPHA * exact + 1e-9
+
+
+def test_merge_is_additive(restaurants):
+    sketches = DistributionSketches(restaurants)
+    both = sketches.merge(countries=["France", "Spain"])
+    summed = sketches.merge(countries=["France"]) + sketches.merge(countries=["Spain"])
+    np.testing.assert_array_equal(both.rating, summed.rating)
+    np.testing.assert_array_equal(both.reviews, summed.reviews)
+    assert sketches.merge().count == len(restaurants)
+    assert np.isnan(sketches.merge(countries=["Atlantis"]).reviews_quantiles([0.5])[0])
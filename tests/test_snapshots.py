@@ -0,0 +1,134 @@
+"""Snapshots servis par un serveur HTTP local (remplace la source distante)."""
+import functools
+import gc
+import os
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from culinary.snapshots import BackgroundRefresher, SnapshotStore
+from synthetic import synthetic_frame
+
+N_ROWS = 1500
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def source(tmp_path):
+    """(url, publish) : ``publish(seed)`` remplace le CSV servi par une nouvelle version."""
+    served = tmp_path / "www"
+    served.mkdir()
+    csv = served / "restaurants.csv"
+    mtime = [1_700_000_000]
+
+    def publish(seed: int):
+        synthetic_frame(N_ROWS, seed=seed).to_csv(csv, index=False)
+        # Last-Modified est à la seconde près : on avance l'horloge à chaque publication
+        mtime[0] += 10
+        os.utime(csv, (mtime[0], mtime[0]))
+
+    publish(1)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=str(served)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/restaurants.csv", publish
+    server.shutdown()
+    thread.join()
+
+
+def versions(root):
+    return sorted(p.name for p in root.iterdir() if p.is_dir() and not p.name.startswith("."))
+
+
+def test_refresh_swaps_current_and_skips_unchanged_source(tmp_path, source):
+    url, publish = source
+    root = tmp_path / "snapshots"
+    store = SnapshotStore(root=root, source_url=url)
+
+    first = store.current()
+    assert (root / "CURRENT").read_text() == first.version
+    assert len(first.df) > 0
+    # Source inchangée : aucun téléchargement, même snapshot
+    assert store.refresh() is False
+    assert store.current() is first
+
+    publish(2)
+    assert store.refresh() is True
+    second = store.current()
+    assert second.version != first.version
+    assert second.source_tag != first.source_tag
+    assert (root / "CURRENT").read_text() == second.version
+
+    # Un nouveau processus retrouve la version active sans rien reconstruire
+    reopened = SnapshotStore(root=root, source_url=url)
+    assert reopened.current().version == second.version
+    assert reopened.refresh() is False
+
+
+def test_prune_keeps_recent_and_pinned_versions(tmp_path, source):
+    url, publish = source
+    root = tmp_path / "snapshots"
+    SnapshotStore(root=root, source_url=url).current()
+    # Processus qui rouvre la version sur disque : DataFrame, partitions et pools lus à la demande
+    store = SnapshotStore(root=root, source_url=url, keep=2)
+
+    # Une exécution de page garde le premier snapshot pendant deux rafraîchissements
+    held = store.current()
+    for seed in (2, 3):
+        publish(seed)
+        assert store.refresh()
+    assert len(versions(root)) == 3
+    assert held.version in versions(root)
+    country = next(iter(held.catalog.partitions))
+    assert len(held.partitions.load([country])) > 0
+    assert len(held.df) > 0
+    assert held.city_pools is not None
+
+    # Une fois libéré, il part au rafraîchissement suivant ; seuls les ``keep`` plus récents restent
+    held_version = held.version
+    del held
+    gc.collect()
+    publish(4)
+    assert store.refresh()
+    remaining = versions(root)
+    assert len(remaining) == 2
+    assert held_version not in remaining
+    assert store.current().version == remaining[-1]
+
+
+def test_background_refresher_picks_up_new_source(tmp_path, source):
+    url, publish = source
+    store = SnapshotStore(root=tmp_path / "snapshots", source_url=url)
+    first = store.current().version
+    publish(2)
+    refresher = BackgroundRefresher(store, interval=0.05).start()
+    try:
+        for _ in range(200):
+            if store.current().version != first:
+                break
+            threading.Event().wait(0.05)
+    finally:
+        refresher.stop(timeout=30)
+    assert store.current().version != first
+
+
+def test_background_refresher_warms_each_new_snapshot(tmp_path, source):
+    url, publish = source
+    store = SnapshotStore(root=tmp_path / "snapshots", source_url=url)
+    first = store.current().version
+    warmed = []
+    publish(2)
+    refresher = BackgroundRefresher(store, interval=0.05, on_refresh=lambda s: warmed.append(s.version)).start()
+    try:
+        for _ in range(200):
+            if warmed:
+                break
+            threading.Event().wait(0.05)
+    finally:
+        refresher.stop(timeout=30)
+    assert warmed == [store.current().version] and warmed[0] != first
@@ -0,0 +1,68 @@
+import threading
+
+import numpy as np
+import pytest
+
+from culinary.spatial import GridIndex, bounds_around, popularity, zoom_for_bounds
+
+
+def points(n=5000, seed=3):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(35, 60, n), rng.uniform(-10, 25, n), rng.random(n)
+
+
+def test_query_bbox_matches_brute_force():
+    lat, lon, prio = points()
+    grid = GridIndex(lat, lon, prio)
+    bbox = (45.0, 2.0, 48.3, 7.7)
+    expected = np.flatnonzero((grid.lat >= 45) & (grid.lat <= 48.3) & (grid.lon >= 2) & (grid.lon <= 7.7))
+    assert sorted(grid.query_bbox(*bbox).tolist()) == expected.tolist()
+
+
+def test_query_viewport_caps_points_by_priority():
+    lat, lon, prio = points()
+    grid = GridIndex(lat, lon, prio)
+    bounds = (35.0, -10.0, 60.0, 25.0)
+    idx, n_in_view = grid.query_viewport(bounds, zoom=4, max_points=200)
+    assert n_in_view == 5000 and 0 < len(idx) <= 200
+    assert np.all(np.diff(grid.priority[idx]) <= 0)
+    idx, _ = grid.query_viewport(bounds, zoom=4, max_points=10_000)
+    assert len(idx) == 5000
+
+
+def test_zoom_roundtrip_and_popularity():
+    south, west, north, east = bounds_around((48.85, 2.35), 10)
+    # Un peu plus petit que la vue d'un zoom 10 : tient à ce zoom, pas au suivant
+    assert zoom_for_bounds((south + 0.01, west + 0.01, north - 0.01, east - 0.01)) == 10
+    assert popularity([4.0, np.nan], [np.e - 1, 10]).tolist() == pytest.approx([4.0, 0.0])
+
+
+
+def test_level_buckets_do_not_collide_at_high_zoom():
+    # Au zoom 18, plus d'un million de colonnes : ligne k / colonne 10^6 et ligne k+1 / colonne 0
+    # tombaient dans la même case avec « ligne * 1_000_000 + colonne »
+    zoom = 18
+    lod = 360.0 / 2 ** zoom / 8
+    k = 262_144
+    lat = [-90 + (k + 0.5) * lod, -90 + (k + 1.5) * lod]
+    lon = [-180 + (1_000_000 + 0.5) * lod, -180 + 0.5 * lod]
+    keep, _ = GridIndex(np.float64(lat), np.float64(lon), [1.0, 2.0])._level(zoom)
+    assert sorted(keep.tolist()) == [0, 1]
+
+
+def test_levels_are_built_once_across_threads():
+    lat, lon, prio = points()
+    grid = GridIndex(lat, lon, prio)
+    barrier = threading.Barrier(8)
+    levels = []
+
+    def worker():
+        barrier.wait()
+        levels.append(grid._level(6))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert all(level is levels[0] for level in levels)
@@ -0,0 +1,84 @@
+import json
+
+import numpy as np
+
+from culinary.tiles import EXTENT, LAYER_NAME, _varint, _zigzag, build_tiles, encode_tile, mercator
+
+
+def read_message(data: bytes) -> list:
+    """(champ, valeur) d'un message protobuf : entiers pour les varints, octets sinon."""
+    fields, pos = [], 0
+
+    def varint():
+        nonlocal pos
+        value = shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            value |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                return value
+
+    while pos < len(data):
+        key = varint()
+        number, wire_type = key >> 3, key & 7
+        if wire_type == 0:
+            fields.append((number, varint()))
+        elif wire_type == 1:
+            fields.append((number, data[pos:pos + 8]))
+            pos += 8
+        else:
+            size = varint()
+            fields.append((number, data[pos:pos + size]))
+            pos += size
+    return fields
+
+
+def layer_of(tile: bytes) -> dict:
+    [(number, layer)] = read_message(tile)
+    assert number == 3
+    fields = read_message(layer)
+    return {
+        "name": dict(fields)[1].decode(),
+        "extent": dict(fields)[5],
+        "features": [read_message(f) for n, f in fields if n == 2],
+        "keys": [k.decode() for n, k in fields if n == 3],
+    }
+
+
+def test_varint_and_zigzag():
+    assert _varint(1) == b"\x01"
+    assert _varint(300) == b"\xac\x02"
+    assert [_zigzag(v) for v in (0, -1, 1, -2, 2)] == [0, 1, 2, 3, 4]
+
+
+def test_encode_tile_points():
+    layer = layer_of(encode_tile([0, 4096], [10, 20], {"city": ["Paris", None], "avg_rating": [4.5, 3.0]}))
+    assert layer["name"] == LAYER_NAME and layer["extent"] == EXTENT
+    assert layer["keys"] == ["city", "avg_rating"]
+    assert len(layer["features"]) == 2
+    # Valeur manquante : aucun tag pour cette propriété (ids < 128 : un octet par id)
+    tags = [list(dict(f)[2]) for f in layer["features"]]
+    assert tags == [[0, 0, 1, 1], [1, 2]]
+    assert all(dict(f)[3] == 1 for f in layer["features"])   # POINT
+
+
+def test_mercator_corners():
+    x, y = mercator([0.0, 85.0511], [-180.0, 180.0])
+    np.testing.assert_allclose(x, [0.0, 1.0])
+    np.testing.assert_allclose(y, [0.5, 0.0], atol=1e-6)
+
+
+def test_build_tiles_keeps_every_point_at_max_zoom(restaurants, tmp_path):
+    metadata = build_tiles(restaurants, tmp_path, max_zoom=3)
+    assert json.loads((tmp_path / "metadata.json").read_text()) == metadata
+    tiles = sorted(tmp_path.rglob("*.pbf"))
+    assert metadata["tile_count"] == len(tiles)
+    assert metadata["feature_count"] == restaurants[["latitude", "longitude"]].notna().all(axis=1).sum()
+
+    def features(z):
+        return sum(len(layer_of(p.read_bytes())["features"]) for p in (tmp_path / str(z)).rglob("*.pbf"))
+
+    # Zooms intermédiaires : un point par case ; zoom maximal : tous les points
+    assert features(0) < features(3) == metadata["feature_count"]
@@ -0,0 +1,95 @@
+import sys
+import types
+
+import numpy as np
+import pytest
+
+import culinary.trips as trips
+from culinary.queries import filter_mask, trip_rows
+from culinary.trips import CityPools, build_city_pools, plan_trip
+
+POOL_CASES = [
+    {},
+    {"min_rating": 4.0},
+    {"cuisine": ["Pizza", "Bar"], "price": ["€"]},
+    {"country": ["Italy"]},
+    {"country": ["Portugal", "Spain"], "min_rating": 3.5},
+]
+
+
+@pytest.fixture(scope="module")
+def same_name_cities(restaurants):
+    """Porto au Portugal et en Italie (Turin renommée) : deux pools pour un même nom."""
+    df = restaurants.copy()
+    df["city"] = df["city"].astype(object).replace({"Turin": "Porto"}).astype("category")
+    return df
+
+
+def test_plan_trip_process_pool_matches_serial(restaurants):
+    df = restaurants.copy()
+    # Égalités et notes manquantes : l'ordre doit rester celui du chemin séquentiel
+    df.loc[df.index[::7], "avg_rating"] = 4.5
+    df.loc[df.index[::11], "avg_rating"] = np.nan
+    days = {"Rome": 3, "Paris": 2, "Madrid": 4, "Atlantis": 1, "Lisbon": 30, "Berlin": 1}
+
+    serial = plan_trip(df, days, parallel=False)
+    pooled = plan_trip(df, days, parallel=True)
+    assert trips._pool is not None   # le pool de processus (spawn) a bien servi
+
+    assert [p.city for p in pooled] == list(days)
+    assert [p.rows for p in pooled] == [p.rows for p in serial]
+    assert [p.n_available for p in pooled] == [p.n_available for p in serial]
+    assert [p.route_km for p in pooled] == pytest.approx([p.route_km for p in serial])
+    assert trips.trip_distance_km(pooled) == pytest.approx(trips.trip_distance_km(serial))
+
+    # Chemin séquentiel = tri pandas stable (note, puis avis, valeurs manquantes en dernier)
+    rome = df[df["city"] == "Rome"].sort_values(["avg_rating", "total_reviews_count"], ascending=False, kind="stable")
+    assert serial[0].rows == rome.index[:3].tolist()
+
+
+
+def test_pool_workers_do_not_rerun_the_main_script(restaurants, tmp_path, monkeypatch):
+    # Sous Streamlit, ``__main__`` est la page en cours : un worker « spawn » la réexécuterait
+    page = tmp_path / "page.py"
+    page.write_text("raise SystemExit('page relancée dans un worker')\n")
+    main = types.ModuleType("__main__")
+    main.__file__ = str(page)
+    monkeypatch.setitem(sys.modules, "__main__", main)
+    if trips._pool is not None:
+        trips._pool.shutdown()
+        trips._pool = None
+
+    days = {"Rome": 2, "Paris": 1}
+    assert [p.rows for p in plan_trip(restaurants, days, parallel=True)] == \
+        [p.rows for p in plan_trip(restaurants, days, parallel=False)]
+    assert sys.modules["__main__"] is main
+
+@pytest.mark.parametrize("size", [5, 300])
+@pytest.mark.parametrize("filters", POOL_CASES)
+def test_city_pools_plan_matches_dataframe_path(same_name_cities, filters, size, tmp_path):
+    df = same_name_cities
+    build_city_pools(df, size=size).save(tmp_path / "pools.npz")
+    pools = CityPools.load(tmp_path / "pools.npz")
+    assert sorted(pools.countries[pools.cities == "Porto"]) == ["Italy", "Portugal"]
+
+    for city, n_days in {"Porto": 6, "Rome": 3, "Paris": 2, "Atlantis": 1}.items():
+        expected = plan_trip(df[filter_mask(df, {**filters, "city": [city]})], {city: n_days})[0]
+        plan = pools.plan(city, n_days, filters)
+        if plan is None:
+            assert size == 5   # pool tronqué : la ville repasse par le DataFrame
+            continue
+        assert plan.rows == expected.rows
+        assert plan.route_km == pytest.approx(expected.route_km)
+        if size == 300:
+            assert plan.n_available == expected.n_available
+
+
+@pytest.mark.parametrize("filters", POOL_CASES)
+def test_trip_rows_with_pools_match_full_planner(same_name_cities, filters):
+    df = same_name_cities
+    days = {"Porto": 4, "Rome": 3, "Paris": 2, "Lisbon": 4}
+    with_pools = trip_rows(df, days, filters, pools=build_city_pools(df, size=5))
+    without = trip_rows(df, days, filters)
+    assert with_pools["row_ids"].tolist() == without["row_ids"].tolist()
+    assert with_pools["distance_km"] == pytest.approx(without["distance_km"])
+    assert with_pools["warnings"] == without["warnings"]